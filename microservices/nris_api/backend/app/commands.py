@@ -1,15 +1,26 @@
+import click
+
 from app.extensions import db, sched
 from app.nris.models.nris_raw_data import NRISRawData
 from app.nris.etl.nris_etl import import_nris_xml, etl_nris_data, clean_nris_etl_data, clean_nris_xml_import
+from app.nris.etl.nris_staging import etl_nris_data_into_staging
+from app.nris.etl.nris_xml_source import DirectoryXmlSource
 from app.nris.scheduled_jobs import nris_jobs
 
 
 def register_commands(app):
     @app.cli.command()
-    def import_nris_raw_data():
+    @click.option(
+        '--fixture-dir', default=None, help='Reads the *.xml files of a directory, not NRIS.')
+    @click.option('--batch-size', default=None, type=int)
+    @click.option(
+        '--incremental', is_flag=True, help='Merges into the raw data instead of adding to it.')
+    def import_nris_raw_data(fixture_dir, batch_size, incremental):
         print("Importing Raw Data from NRIS...")
-        import_nris_xml()
-        print("Import complete")
+        source = DirectoryXmlSource(fixture_dir) if fixture_dir else None
+        stats = import_nris_xml(source, batch_size, incremental)
+        print(f"Import complete: {stats['documents']} documents, {stats['bytes']} bytes "
+              f"in {stats['seconds']:.1f}s")
 
     @app.cli.command()
     def clean_nris_data():
@@ -24,10 +35,86 @@ def register_commands(app):
         print("Cleanup complete")
 
     @app.cli.command()
-    def run_nris_etl():
+    @click.option('--batch-size', default=None, type=int)
+    @click.option('--workers', default=None, type=int, help='Processes parsing the XML.')
+    @click.option(
+        '--incremental',
+        is_flag=True,
+        help='Replaces the changed and removed inspections instead of expecting empty tables.')
+    @click.option(
+        '--swap',
+        is_flag=True,
+        help='Reloads everything into a staging schema and swaps it in for the nris tables.')
+    def run_nris_etl(batch_size, workers, incremental, swap):
         print("Running NRIS ETL...")
-        etl_nris_data()
-        print("NRIS ETL complete")
+        if swap:
+            stats = etl_nris_data_into_staging(batch_size, workers)
+        else:
+            stats = etl_nris_data(batch_size, workers, incremental)
+        print(f"{stats['new']} new, {stats['changed']} changed, {stats['unchanged']} unchanged "
+              f"and {stats['deleted']} deleted assessments")
+        print(f"NRIS ETL complete: {stats['inspections']} inspections, {stats['rows']} rows, "
+              f"{stats['parse_seconds']:.1f}s waiting on parsing, "
+              f"{stats['load_seconds']:.1f}s loading, {stats['persist_seconds']:.1f}s persisting, "
+              f"{stats['render_seconds']:.1f}s rendering (run {stats['etl_run_id']})")
+
+    @app.cli.command()
+    @click.option('--documents', default=2000)
+    @click.option('--max-workers', default=4, help='Benchmarks 1 to max-workers processes.')
+    @click.option('--stops', default=3, help='Stops per synthetic inspection.')
+    def benchmark_nris_parse(documents, max_workers, stops):
+        """Prints the ETL's XML parse throughput on a synthetic corpus against the worker count."""
+        from app.scripts.benchmark_nris_parse import run_benchmark
+        run_benchmark(documents, max_workers, stops=stops)
+
+    @app.cli.command()
+    @click.argument('path')
+    @click.option('--documents', default=2000)
+    @click.option('--seed', default=0)
+    @click.option('--stops', default=3, help='Stops per inspection.')
+    @click.option('--orders', default=1, help='Orders per stop.')
+    @click.option('--legislations', default=1, help='Legislations per order.')
+    @click.option('--attachments', default=1, help='Attachments per inspection, stop and order.')
+    def generate_nris_xml(path, documents, seed, stops, orders, legislations, attachments):
+        """Writes synthetic assessment XML files, to be imported with --fixture-dir."""
+        from app.scripts.nris_xml_generator import write_corpus
+        write_corpus(
+            path,
+            documents,
+            seed,
+            stops=stops,
+            orders=orders,
+            legislations=legislations,
+            attachments=attachments)
+
+    @app.cli.command()
+    @click.option('--documents', default=2000)
+    @click.option('--seed', default=0)
+    @click.option('--stops', default=3, help='Stops per inspection.')
+    @click.option('--orders', default=1, help='Orders per stop.')
+    @click.option('--legislations', default=1, help='Legislations per order.')
+    @click.option('--attachments', default=1, help='Attachments per inspection, stop and order.')
+    @click.option(
+        '--fixture-dir', default=None, help='Reads the *.xml files of a directory instead.')
+    @click.option('--batch-size', default=None, type=int)
+    @click.option('--workers', default=None, type=int, help='Processes parsing the XML.')
+    @click.option('--output', default=None, help='Appends the results to a JSON lines file.')
+    @click.confirmation_option(prompt='This empties the NRIS tables. Continue?')
+    def benchmark_nris_etl(documents, seed, stops, orders, legislations, attachments, fixture_dir,
+                           batch_size, workers, output):
+        """Runs the NRIS ETL on a synthetic corpus and prints its throughput, stage by stage."""
+        from app.scripts.benchmark_nris_etl import run_benchmark
+        run_benchmark(
+            documents,
+            seed,
+            fixture_dir,
+            batch_size,
+            workers,
+            output,
+            stops=stops,
+            orders=orders,
+            legislations=legislations,
+            attachments=attachments)
 
     @sched.app.cli.command()
     def run_nris_etl_job():
@@ -18,6 +18,8 @@ class Config(object):
 
     SQLALCHEMY_DATABASE_URI = DB_URL
     SQLALCHEMY_TRACK_MODIFICATIONS = True
+    # Sends executemany inserts, like the ETL's, as pages of statements rather than one per row
+    SQLALCHEMY_ENGINE_OPTIONS = {'use_batch_mode': True}
 
     JWT_OIDC_WELL_KNOWN_CONFIG = os.environ.get(
     'JWT_OIDC_WELL_KNOWN_CONFIG',
@@ -30,6 +32,19 @@ class Config(object):
     NRIS_DB_PORT = os.environ.get('NRIS_DB_PORT', 'localhost')
     NRIS_DB_SERVICENAME = os.environ.get('NRIS_DB_SERVICENAME', 'localhost')
     NRIS_DB_HOSTNAME = os.environ.get('NRIS_DB_HOSTNAME', 'localhost')
+    # Rows fetched from Oracle per round trip, and XML documents loaded per COPY
+    NRIS_ORACLE_ARRAYSIZE = os.environ.get('NRIS_ORACLE_ARRAYSIZE', '100')
+    NRIS_XML_BATCH_SIZE = os.environ.get('NRIS_XML_BATCH_SIZE', '100')
+    # Inspections transformed per flush
+    NRIS_ETL_BATCH_SIZE = os.environ.get('NRIS_ETL_BATCH_SIZE', '500')
+    # Processes parsing the XML during the ETL, 1 parses in the loading process
+    NRIS_ETL_WORKERS = os.environ.get('NRIS_ETL_WORKERS', str(os.cpu_count() or 1))
+    # Only load the assessments changed since the last run, instead of truncating and reloading
+    NRIS_ETL_INCREMENTAL = os.environ.get('NRIS_ETL_INCREMENTAL', '1')
+    # Reload everything into a staging schema and swap it in, instead of loading into nris
+    NRIS_ETL_SWAP = os.environ.get('NRIS_ETL_SWAP', '0')
+    # Fewest staged inspections to swap in, as a ratio of the live ones
+    NRIS_ETL_SWAP_MIN_RATIO = os.environ.get('NRIS_ETL_SWAP_MIN_RATIO', '0.9')
 
     # Elastic config
     ELASTIC_ENABLED = os.environ.get('ELASTIC_ENABLED', '0')
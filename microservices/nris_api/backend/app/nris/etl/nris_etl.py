@@ -1,11 +1,21 @@
+import csv
+import hashlib
+import io
+import json
 import re
-from xml.etree.ElementTree import fromstring
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from flask import current_app
-from json import dumps
-from xml.etree import ElementTree as ET
+from flask_restplus import marshal
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import selectinload
 from app.extensions import db
 
-from app.nris.models.inspection import Inspection
+from app.nris.models.inspection import Inspection, INSPECTION_RESPONSE_MODEL
+from app.nris.models.inspection_json import InspectionJson
 from app.nris.models.inspection_status import InspectionStatus
 from app.nris.models.location import Location
 from app.nris.models.inspected_location import InspectedLocation
@@ -23,8 +33,10 @@ from app.nris.models.document import Document
 from app.nris.models.document_type import DocumentType
 from app.nris.models.nris_raw_data import NRISRawData
 from app.nris.models.inspection_type import InspectionType
-
-import cx_Oracle
+from app.nris.etl.nris_xml_parser import parse_assessment
+from app.nris.etl.nris_xml_source import OracleXmlSource
+from app.nris.utils.logger import get_logger
+from app.nris.utils.pagination import loader_options
 
 # Truncates all tables on the nris schema, except for the alembic_version table and the nris_raw_data table.
 TRUNCATE_TABLES_SQL = """
@@ -39,9 +51,98 @@ BEGIN
 END $$;
 """
 
+# The raw documents of an incremental import are merged into nris_raw_data by assessment_id: the
+# assessments no longer in NRIS are removed, and the changed ones replaced. A row keeps the hash
+# of the content last transformed, so the ETL can tell which ones changed since.
+MERGE_RAW_DATA_SQL = """
+DELETE FROM nris_raw_data raw WHERE NOT EXISTS (
+    SELECT 1 FROM nris_raw_data_import new WHERE new.assessment_id = raw.assessment_id);
+UPDATE nris_raw_data raw
+    SET nris_data = new.nris_data, input_date = new.input_date, content_hash = new.content_hash
+    FROM nris_raw_data_import new
+    WHERE new.assessment_id = raw.assessment_id
+    AND new.content_hash IS DISTINCT FROM raw.content_hash;
+INSERT INTO nris_raw_data (nris_data, input_date, assessment_id, content_hash)
+    SELECT nris_data, input_date, assessment_id, content_hash FROM nris_raw_data_import new
+    WHERE NOT EXISTS (SELECT 1 FROM nris_raw_data raw WHERE raw.assessment_id = new.assessment_id);
+DROP TABLE nris_raw_data_import;
+"""
+
+# Renders the inspections of each mine, already rendered one by one, into a JSON array.
+MINE_INSPECTION_JSON_SQL = """
+DELETE FROM mine_inspection_json WHERE mine_no = ANY(:mine_nos);
+INSERT INTO mine_inspection_json (mine_no, etl_run_id, inspection_count, document)
+    SELECT mine_no, :etl_run_id, count(*), '[' || string_agg(
+        document, ',' ORDER BY inspection_date DESC NULLS LAST, inspection_id DESC) || ']'
+    FROM inspection_json WHERE mine_no = ANY(:mine_nos) GROUP BY mine_no;
+"""
+
+# Raw documents changed since they were last transformed.
+PENDING_RAW_DATA = 'etl_content_hash IS DISTINCT FROM content_hash'
+
+# Raw documents of the assessments deleted in NRIS, which the parser skips.
+DELETED_RAW_DATA = r"nris_data ~ '<(\w+:)?assessment_status>\s*Deleted\s*<'"
+
+# An extract can hold an assessment more than once: only the document imported last is kept.
+# The rows are ordered by {order_column}, which increases in the order they were copied.
+DELETE_DUPLICATE_RAW_DATA_SQL = """
+DELETE FROM {table} earlier USING {table} later
+    WHERE later.assessment_id = earlier.assessment_id
+    AND later.{order_column} > earlier.{order_column};
+"""
+
+# Deletes the inspections matching {condition} and every row that belongs to them, leaving their
+# ids in etl_deleted_inspection.
+DELETE_INSPECTIONS_SQL = """
+CREATE TEMP TABLE etl_deleted_inspection AS
+    SELECT inspection_id, external_id, mine_no FROM inspection WHERE {condition};
+CREATE TEMP TABLE etl_deleted_location AS
+    SELECT inspected_location_id, location_id FROM inspected_location
+    WHERE inspection_id IN (SELECT inspection_id FROM etl_deleted_inspection);
+CREATE TEMP TABLE etl_deleted_stop AS
+    SELECT order_stop_detail_id FROM order_stop_detail
+    WHERE inspected_location_id IN (SELECT inspected_location_id FROM etl_deleted_location);
+CREATE TEMP TABLE etl_deleted_document AS
+    SELECT document_id FROM inspection_document_xref
+    WHERE inspection_id IN (SELECT inspection_id FROM etl_deleted_inspection)
+    UNION SELECT document_id FROM inspected_location_document_xref
+    WHERE inspected_location_id IN (SELECT inspected_location_id FROM etl_deleted_location)
+    UNION SELECT document_id FROM order_stop_detail_document_xref
+    WHERE order_stop_detail_id IN (SELECT order_stop_detail_id FROM etl_deleted_stop);
+
+DELETE FROM noncompliance_legislation
+    WHERE order_stop_detail_id IN (SELECT order_stop_detail_id FROM etl_deleted_stop);
+DELETE FROM noncompliance_permit
+    WHERE order_stop_detail_id IN (SELECT order_stop_detail_id FROM etl_deleted_stop);
+DELETE FROM order_stop_detail_document_xref
+    WHERE order_stop_detail_id IN (SELECT order_stop_detail_id FROM etl_deleted_stop);
+DELETE FROM inspected_location_document_xref
+    WHERE inspected_location_id IN (SELECT inspected_location_id FROM etl_deleted_location);
+DELETE FROM inspection_document_xref
+    WHERE inspection_id IN (SELECT inspection_id FROM etl_deleted_inspection);
+DELETE FROM document WHERE document_id IN (SELECT document_id FROM etl_deleted_document);
+DELETE FROM order_stop_detail
+    WHERE order_stop_detail_id IN (SELECT order_stop_detail_id FROM etl_deleted_stop);
+DELETE FROM order_advisory_detail
+    WHERE inspected_locations_id IN (SELECT inspected_location_id FROM etl_deleted_location);
+DELETE FROM order_warning_detail
+    WHERE inspected_location_id IN (SELECT inspected_location_id FROM etl_deleted_location);
+DELETE FROM order_request_detail
+    WHERE inspected_location_id IN (SELECT inspected_location_id FROM etl_deleted_location);
+DELETE FROM inspected_location
+    WHERE inspected_location_id IN (SELECT inspected_location_id FROM etl_deleted_location);
+DELETE FROM location WHERE location_id IN (SELECT location_id FROM etl_deleted_location);
+DELETE FROM inspection_json
+    WHERE inspection_id IN (SELECT inspection_id FROM etl_deleted_inspection);
+DELETE FROM inspection WHERE inspection_id IN (SELECT inspection_id FROM etl_deleted_inspection);
+DROP TABLE etl_deleted_location, etl_deleted_stop, etl_deleted_document;
+"""
+
 
 def clean_nris_etl_data():
     db.session.execute(TRUNCATE_TABLES_SQL)
+    # Every raw document has to be transformed again.
+    db.session.execute('update nris_raw_data set etl_content_hash = null;')
     db.session.commit()
 
 
@@ -51,404 +152,447 @@ def clean_nris_xml_import():
     db.session.commit()
 
 
-def import_nris_xml():
-    dsn_tns = cx_Oracle.makedsn(
-        current_app.config['NRIS_DB_HOSTNAME'],
-        current_app.config['NRIS_DB_PORT'],
-        service_name=current_app.config['NRIS_DB_SERVICENAME'])
-    oracle_db = cx_Oracle.connect(
-        user=current_app.config['NRIS_DB_USER'],
-        password=current_app.config['NRIS_DB_PASSWORD'],
-        dsn=dsn_tns)
-
-    cursor = oracle_db.cursor()
-
-    cursor.execute(
-        "select xml_document from CORS.CORS_CV_ASSESSMENTS_XVW where business_area = 'EMPR'")
-
-    results = cursor.fetchall()
-    for result in results:
-        data = NRISRawData.create(result[0].read())
-        db.session.add(data)
-
+def _assessment_id(xml_document):
+    match = re.search(r'<(?:\w+:)?assessment_id>\s*(\d+)\s*<', xml_document)
+    return match.group(1) if match else None
+
+
+def _content_hash(encoded_document):
+    return hashlib.sha256(encoded_document).hexdigest()
+
+
+def import_nris_xml(source=None, batch_size=None, incremental=False):
+    """
+    Loads the NRIS XML documents into nris_raw_data, a batch at a time with COPY, so memory is
+    bounded by the batch size rather than by the whole corpus. Each document is stored with its
+    assessment id and content hash.
+
+    :param source: where the documents are read from, the NRIS Oracle database by default
+    :param incremental: merge the documents into nris_raw_data by assessment id, instead of
+                        adding them to an emptied table
+    :return: the documents and bytes loaded, the documents dropped for a later document of the
+             same assessment and the seconds it took
+    """
+    source = source or OracleXmlSource()
+    batch_size = batch_size or int(current_app.config['NRIS_XML_BATCH_SIZE'])
+    logger = get_logger()
+
+    table = NRISRawData.__tablename__
+    if incremental:
+        table = 'nris_raw_data_import'
+        db.session.execute(
+            f'CREATE TEMP TABLE {table} (import_order bigserial, nris_data text, '
+            'input_date timestamp, assessment_id integer, content_hash varchar(64));')
+
+    start = time.perf_counter()
+    documents, size = 0, 0
+    cursor = db.session.connection().connection.cursor()
+    for batch in source.batches(batch_size):
+        input_date = datetime.now()
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for xml_document in batch:
+            encoded_document = xml_document.encode('utf-8')
+            writer.writerow([
+                xml_document, input_date,
+                _assessment_id(xml_document),
+                _content_hash(encoded_document)
+            ])
+            size += len(encoded_document)
+        buffer.seek(0)
+        cursor.copy_expert(
+            f'COPY {table} (nris_data, input_date, assessment_id, content_hash) '
+            'FROM STDIN WITH (FORMAT csv)', buffer)
+
+        documents += len(batch)
+        elapsed = time.perf_counter() - start
+        logger.info(f'NRIS XML import: {documents} documents, {size / 2**20:.1f} MiB, '
+                    f'{documents / max(elapsed, 0.001):.0f} documents/s')
     cursor.close()
+    duplicates = 0
+    if incremental and documents == 0:
+        # An empty extract is far more likely a problem upstream than every assessment deleted.
+        logger.warning('NRIS XML import: no documents, nris_raw_data left as it was')
+        db.session.rollback()
+    else:
+        duplicates = db.session.execute(
+            DELETE_DUPLICATE_RAW_DATA_SQL.format(
+                table=table, order_column='import_order' if incremental else 'id')).rowcount
+        if duplicates:
+            logger.warning(f'NRIS XML import: {duplicates} documents replaced by a later '
+                           'document of the same assessment')
+        if incremental:
+            db.session.execute(MERGE_RAW_DATA_SQL)
     db.session.commit()
 
-
-def etl_nris_data():
-    nris_data = db.session.query(NRISRawData).all()
-    for item in nris_data:
-        _parse_nris_element(item.nris_data)
-
-
-def _parse_element_text(_element):
-    return _element.text if _element is not None else None
-
-
-def _parse_nris_element(input):
-
-    xmlstring = re.sub(' xmlns="[^"]+"', '', input, count=1)
-    data = ET.fromstring(xmlstring)
-    assessment_id = data.find('assessment_id')
-    assessment_status = data.find('assessment_status')
-
-    if assessment_status is not None:
-        assessment_status_code = assessment_status.text
-
-    if assessment_status_code != 'Deleted':
-        assessment_date = data.find('assessment_date')
-        business_area = data.find('businessArea').find('business_area_name')
-
-        inspection = Inspection(external_id=_parse_element_text(assessment_id))
-        inspection.inspection_date = _parse_element_text(assessment_date)
-        inspection.business_area = _parse_element_text(business_area)
-        status = _create_status(assessment_status_code)
-
-        inspection.inspection_status = status
-
-        if assessment_status_code == 'Complete':
-            completed_date = data.find('completion_date')
-            inspection.completed_date = _parse_element_text(completed_date)
-
-        mine_number = data.find('location').find('location_id')
-        inspector = data.find('assessor')
-        intro = data.find('report_introduction')
-        preamble = data.find('report_preamble')
-        closing = data.find('report_closing')
-        notes = data.find('officer_notes')
-
-        inspection.mine_no = _parse_element_text(mine_number)
-        inspection.inspector_idir = _parse_element_text(inspector)
-        inspection.inspection_introduction = _parse_element_text(intro)
-        inspection.inspection_preamble = _parse_element_text(preamble)
-        inspection.inspection_closing = _parse_element_text(closing)
-        inspection.officer_notes = _parse_element_text(notes)
-
-        db.session.add(inspection)
-
-        inspection_data = data.find('inspection')
-        inspection_type = inspection_data.find('inspection_type')
-        inspection_report_sent_date = inspection_data.find(
-            'inspct_report_sent_date')
-        inspection.inspection_report_sent_date = _parse_element_text(
-            inspection_report_sent_date)
-        if inspection_type is not None:
-            inspection_type_code = _find_or_save_inspection_type(
-                inspection_type)
-            inspection.inspection_type = inspection_type_code
-
-        for attachment in data.findall('attachment'):
-            doc = _save_document(attachment)
-            inspection.documents.append(doc)
-
-        if inspection_data is not None:
-            _save_stops(inspection_data, inspection)
-
-
-def _create_status(assessment_status_code):
-    status_codes = InspectionStatus.find_all_inspection_status()
-    code_exists = False
-    status = None
-
-    for code in status_codes:
-        if code.inspection_status_code == assessment_status_code:
-            code_exists = True
-            status = code
-
-    if not code_exists:
-        status = InspectionStatus(
-            inspection_status_code=assessment_status_code)
-        db.session.add(status)
-    return status
-
-
-def _save_stops(nris_inspection_data, inspection):
-    for stop in nris_inspection_data.findall('stops'):
-        order_location = stop.find('secondary_locations')
-        if order_location is not None:
-            latitude = order_location.find('secondary_latitude')
-            longitude = order_location.find('secondary_longitude')
-            desc = order_location.find('secondary_location_description')
-            notes = order_location.find('secondary_location_notes')
-            utm_info = order_location.find('secondary_location_utm')
-            if utm_info is not None:
-                utm_easting = utm_info.find('utm_easting')
-                utm_northing = utm_info.find('utm_northing')
-                utm_zone_number = utm_info.find('zone_number')
-                utm_zone_letter = utm_info.find('zone_letter')
-            location = Location(
-                description=_parse_element_text(desc),
-                notes=_parse_element_text(notes),
-                latitude=_parse_element_text(latitude),
-                longitude=_parse_element_text(longitude),
-                utm_easting=_parse_element_text(utm_easting),
-                utm_northing=_parse_element_text(utm_northing),
-                zone_number=_parse_element_text(utm_zone_number),
-                zone_letter=_parse_element_text(utm_zone_letter))
-            db.session.add(location)
-
-        stop_type = stop.find('stop_type')
-        inspected_location = InspectedLocation()
-        inspected_location.location = location
-        inspection.inspected_locations.append(inspected_location)
-
-        inspected_location_type = _find_or_save_inspected_location_type(
-            stop_type)
-        inspected_location.inspected_location_type_rel = inspected_location_type
-
-        for stop_order in stop.findall('stop_orders'):
-            stop_detail = _save_stop_order(stop_order)
-            inspected_location.stop_details.append(stop_detail)
-
-        for stop_advisory in stop.findall('stop_advisories'):
-            detail = stop_advisory.find('advisory_detail')
-            advisory = OrderAdvisoryDetail(detail=_parse_element_text(detail))
-            inspected_location.advisory_details.append(advisory)
-
-        for stop_warning in stop.findall('stop_warnings'):
-            detail = stop_warning.find('warning_detail')
-            respond_date = stop_warning.find('warning_respond_date')
-            warning = OrderWarningDetail(
-                detail=_parse_element_text(detail), respond_date=_parse_element_text(respond_date))
-            inspected_location.warning_details.append(warning)
-
-        for stop_request in stop.findall('stop_requests'):
-            detail = stop_request.find('request_detail')
-            response = stop_request.find('request_response')
-            respond_date = stop_request.find('request_respond_date')
-            request = OrderRequestDetail(
-                detail=_parse_element_text(detail),
-                respond_date=_parse_element_text(respond_date),
-                response=_parse_element_text(response))
-            inspected_location.request_details.append(request)
-
-        for attachment in stop.findall('attachment'):
-            doc = _save_document(attachment)
-            inspected_location.documents.append(doc)
-
-        db.session.add(inspected_location)
+    return {
+        'documents': documents,
+        'duplicates': duplicates,
+        'bytes': size,
+        'seconds': time.perf_counter() - start
+    }
+
+
+class CodeTables(object):
+    """
+    The NRIS code tables, loaded once per run and looked up in memory. A code first seen during the
+    run is added to the session and to its map, so it is created only once.
+    """
+
+    def __init__(self):
+        self.inspection_statuses = {
+            status.inspection_status_code: status
+            for status in InspectionStatus.find_all_inspection_status()
+        }
+        self.inspection_types = {
+            inspection_type.inspection_type_code: inspection_type
+            for inspection_type in InspectionType.find_all_inspection_types()
+        }
+        self.inspected_location_types = {
+            location_type.inspected_location_type: location_type
+            for location_type in InspectedLocationType.find_all_inspected_location_types()
+        }
+        self.document_types = {
+            document_type.document_type: document_type
+            for document_type in DocumentType.find_all_document_types()
+        }
+        legislation_acts = LegislationAct.query.options(selectinload(LegislationAct.sections)).all()
+        self.legislation_acts = {act.act: act for act in legislation_acts}
+        self.legislation_act_sections = {(act.act, section.section): section
+                                         for act in legislation_acts for section in act.sections}
+        self.compliance_articles = {
+            str(article.external_id): article
+            for article in LegislationComplianceArticle.find_all_legislation_compliance_articles()
+        }
+
+    def find_or_add(self, table, code, create):
+        row = table.get(code)
+        if row is None:
+            row = create()
+            db.session.add(row)
+            table[code] = row
+        return row
+
+
+def etl_nris_data(batch_size=None, workers=None, incremental=False, commit=True):
+    """
+    Transforms the raw NRIS XML into the nris schema. The raw documents are streamed a batch at a
+    time and parsed into plain records by `workers` processes, while this process loads the
+    previous batch. The inspections are flushed a batch at a time, with their primary keys drawn
+    from the sequences up front so every table is written with batched inserts.
+
+    Only the raw documents changed since they were last transformed are loaded. In incremental
+    mode the inspections of the changed documents, and of the assessments no longer in
+    nris_raw_data, are deleted first; otherwise the nris schema is expected to be empty. It all
+    happens in one transaction, so readers see the previous data until the run is committed.
+
+    Every inspection loaded is then rendered to JSON, and so are the inspections of every mine
+    that gained or lost one, for the API to serve as they are. The run id they are stored with
+    is what the API's ETags are made from.
+
+    :param commit: commit the run, or leave it to the caller's transaction
+    :return: the run id, the new, changed, unchanged and deleted assessments, the inspections
+             and rows written and the seconds spent waiting on the parsers, building the rows,
+             persisting and rendering them
+    """
+    batch_size = batch_size or int(current_app.config['NRIS_ETL_BATCH_SIZE'])
+    workers = workers or int(current_app.config['NRIS_ETL_WORKERS'])
+    logger = get_logger()
+    code_tables = CodeTables()
+    stats = {
+        'inspections': 0,
+        'rows': 0,
+        'parse_seconds': 0.0,
+        'load_seconds': 0.0,
+        'persist_seconds': 0.0,
+        'render_seconds': 0.0,
+        'etl_run_id': uuid.uuid4().hex
+    }
+    counts, mine_nos = _classify_raw_data(incremental)
+    stats.update(counts)
+    logger.info(f'NRIS ETL: {stats["new"]} new, {stats["changed"]} changed, '
+                f'{stats["unchanged"]} unchanged and {stats["deleted"]} deleted assessments')
+
+    raw_documents = (nris_data for (nris_data, ) in db.session.query(
+        NRISRawData.nris_data).filter(text(PENDING_RAW_DATA)).yield_per(batch_size))
+    loaded_ids = []
+    executor = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        for records in _parsed_batches(_batches(raw_documents, batch_size), executor, workers,
+                                       stats):
+            start = time.perf_counter()
+            # Nothing is written until the batch is flushed, with its primary keys assigned.
+            with db.session.no_autoflush:
+                inspections = [
+                    _load_inspection(record, code_tables) for record in records
+                    if record is not None
+                ]
+            stats['load_seconds'] += time.perf_counter() - start
+            _persist_batch(len(inspections), stats, logger)
+            loaded_ids.extend(inspection.inspection_id for inspection in inspections)
+            mine_nos.update(inspection.mine_no for inspection in inspections)
+    finally:
+        if executor:
+            executor.shutdown()
+
+    start = time.perf_counter()
+    _render_json(loaded_ids, mine_nos, stats['etl_run_id'], batch_size)
+    stats['render_seconds'] = time.perf_counter() - start
+    logger.info(f'NRIS ETL: rendered {len(loaded_ids)} inspections and {len(mine_nos)} mines '
+                f'in {stats["render_seconds"]:.1f}s')
+    db.session.execute('update nris_raw_data set etl_content_hash = content_hash, '
+                       f'processed_date = now() where {PENDING_RAW_DATA};')
+    if commit:
         db.session.commit()
 
+    return stats
 
-def _save_stop_order(stop_order):
-    stop_detail = OrderStopDetail()
 
-    detail = stop_order.find('order_detail')
-    stop_type = stop_order.find('order_type')
-    response_status = stop_order.find('order_response_status')
-    stop_status = stop_order.find('order_status')
-    observation = stop_order.find('order_observation')
-    response = stop_order.find('order_response')
-    response_received = stop_order.find('order_response_received_date')
-    completion_date = stop_order.find('order_completion_date')
-    authority_act = stop_order.find('order_authority_act')
-    authority_act_section = stop_order.find('order_authority_section')
+def _classify_raw_data(incremental):
+    pending, unchanged = db.session.execute(
+        f'select count(*) filter (where {PENDING_RAW_DATA}), '
+        f'count(*) filter (where not ({PENDING_RAW_DATA})) from nris_raw_data;').fetchone()
+    counts = {'new': pending, 'changed': 0, 'unchanged': unchanged, 'deleted': 0}
+    if not incremental:
+        return counts, set()
 
-    for order_legislation in stop_order.findall('order_legislations'):
-        noncompliance_legislation = _save_order_noncompliance_legislation(
-            order_legislation)
+    pending_assessments = f'select assessment_id from nris_raw_data where {PENDING_RAW_DATA}'
+    current_assessments = 'select assessment_id from nris_raw_data where assessment_id is not null'
+    deleted_assessments = f'{pending_assessments} and {DELETED_RAW_DATA}'
+    db.session.execute(
+        DELETE_INSPECTIONS_SQL.format(condition=f'external_id in ({pending_assessments}) or '
+                                      f'external_id not in ({current_assessments})'))
+    # An assessment deleted in NRIS is a changed document, but its inspection is not loaded again.
+    changed, marked_deleted, removed = db.session.execute(
+        f'select count(distinct external_id) filter (where external_id in ({pending_assessments}) '
+        f'and external_id not in ({deleted_assessments})), '
+        f'count(distinct external_id) filter (where external_id in ({deleted_assessments})), '
+        f'count(distinct external_id) filter (where external_id not in ({pending_assessments})) '
+        'from etl_deleted_inspection;').fetchone()
+    mine_nos = {
+        mine_no
+        for (mine_no, ) in db.session.execute(
+            'select distinct mine_no from etl_deleted_inspection;')
+    }
+    db.session.execute('drop table etl_deleted_inspection;')
+    counts.update({
+        'new': pending - changed - marked_deleted,
+        'changed': changed,
+        'deleted': marked_deleted + removed
+    })
+    return counts, mine_nos
+
+
+def _render_json(inspection_ids, mine_nos, etl_run_id, batch_size):
+    # Reload what was flushed, as the database typed it, rather than as it was parsed.
+    db.session.expire_all()
+    options = loader_options(Inspection, INSPECTION_RESPONSE_MODEL)
+    for start in range(0, len(inspection_ids), batch_size):
+        inspections = Inspection.query.options(*options).filter(
+            Inspection.inspection_id.in_(inspection_ids[start:start + batch_size])).all()
+        db.session.execute(InspectionJson.__table__.insert(), [{
+            'inspection_id': inspection.inspection_id,
+            'external_id': inspection.external_id,
+            'mine_no': inspection.mine_no,
+            'inspection_date': inspection.inspection_date,
+            'etl_run_id': etl_run_id,
+            'document': json.dumps(
+                marshal(inspection, INSPECTION_RESPONSE_MODEL), separators=(',', ':'))
+        } for inspection in inspections])
+
+    mine_nos = [mine_no for mine_no in mine_nos if mine_no is not None]
+    if mine_nos:
+        db.session.execute(MINE_INSPECTION_JSON_SQL, {
+            'mine_nos': mine_nos,
+            'etl_run_id': etl_run_id
+        })
+
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _parsed_batches(raw_batches, executor, workers, stats):
+    """
+    Yields the parsed records of each raw batch. With an executor the next batch is handed to the
+    workers before the current one is yielded, so parsing overlaps loading and at most two batches
+    are in flight.
+    """
+    if executor is None:
+        for raw_batch in raw_batches:
+            start = time.perf_counter()
+            records = [parse_assessment(document) for document in raw_batch]
+            stats['parse_seconds'] += time.perf_counter() - start
+            yield records
+        return
+
+    in_flight = None
+    for raw_batch in raw_batches:
+        chunksize = max(1, len(raw_batch) // (workers * 4))
+        submitted = executor.map(parse_assessment, raw_batch, chunksize=chunksize)
+        if in_flight is not None:
+            yield _wait_for(in_flight, stats)
+        in_flight = submitted
+    if in_flight is not None:
+        yield _wait_for(in_flight, stats)
+
+
+def _wait_for(results, stats):
+    start = time.perf_counter()
+    records = list(results)
+    stats['parse_seconds'] += time.perf_counter() - start
+    return records
+
+
+def _persist_batch(inspections, stats, logger):
+    start = time.perf_counter()
+    rows = list(db.session.new)
+    _assign_primary_keys(rows)
+    db.session.flush()
+    # The batch is written: let it go rather than keep every row of the run in the session. The
+    # code table rows are attached again by the next rows that refer to them.
+    db.session.expunge_all()
+    stats['persist_seconds'] += time.perf_counter() - start
+
+    stats['inspections'] += inspections
+    stats['rows'] += len(rows)
+    logger.info(
+        f'NRIS ETL: {stats["inspections"]} inspections, {stats["rows"]} rows; '
+        f'parse wait {stats["parse_seconds"]:.1f}s, '
+        f'load {stats["inspections"] / max(stats["load_seconds"], 0.001):.0f} inspections/s, '
+        f'persist {stats["rows"] / max(stats["persist_seconds"], 0.001):.0f} rows/s')
+
+
+def _assign_primary_keys(rows):
+    # The unit of work only batches the inserts of rows whose primary key is already known.
+    rows_by_mapper = defaultdict(list)
+    for row in rows:
+        mapper = inspect(row).mapper
+        if mapper.primary_key_from_instance(row)[0] is None:
+            rows_by_mapper[mapper].append(row)
+
+    for mapper, pending in rows_by_mapper.items():
+        column = mapper.primary_key[0]
+        ids = db.session.execute(
+            'select nextval(pg_get_serial_sequence(:table, :column)) '
+            'from generate_series(1, :count)', {
+                'table': mapper.local_table.name,
+                'column': column.name,
+                'count': len(pending)
+            })
+        key = mapper.get_property_by_column(column).key
+        for row, (id, ) in zip(pending, ids):
+            setattr(row, key, id)
+
+
+def _load_inspection(record, code_tables):
+    inspection = Inspection(**record['inspection'])
+    if record.get('status') is not None:
+        inspection.inspection_status = code_tables.find_or_add(
+            code_tables.inspection_statuses, record['status'],
+            lambda: InspectionStatus(inspection_status_code=record['status']))
+    if record.get('inspection_type') is not None:
+        inspection.inspection_type = code_tables.find_or_add(
+            code_tables.inspection_types, record['inspection_type'],
+            lambda: InspectionType(inspection_type_code=record['inspection_type']))
+
+    for document in record['documents']:
+        inspection.documents.append(_load_document(document, code_tables))
+
+    for stop in record['stops']:
+        inspection.inspected_locations.append(_load_stop(stop, code_tables))
+
+    db.session.add(inspection)
+    return inspection
+
+
+def _load_stop(stop, code_tables):
+    inspected_location = InspectedLocation()
+    if stop['location'] is not None:
+        inspected_location.location = Location(**stop['location'])
+    if stop['location_type'] is not None:
+        inspected_location.inspected_location_type_rel = code_tables.find_or_add(
+            code_tables.inspected_location_types, stop['location_type'],
+            lambda: InspectedLocationType(inspected_location_type=stop['location_type']))
+
+    for order in stop['orders']:
+        inspected_location.stop_details.append(_load_stop_order(order, code_tables))
+    for advisory in stop['advisories']:
+        inspected_location.advisory_details.append(OrderAdvisoryDetail(**advisory))
+    for warning in stop['warnings']:
+        inspected_location.warning_details.append(OrderWarningDetail(**warning))
+    for request in stop['requests']:
+        inspected_location.request_details.append(OrderRequestDetail(**request))
+    for document in stop['documents']:
+        inspected_location.documents.append(_load_document(document, code_tables))
+
+    return inspected_location
+
+
+def _load_stop_order(order, code_tables):
+    stop_detail = OrderStopDetail(**order['order'])
+    for legislation in order['legislations']:
         stop_detail.noncompliance_legislations.append(
-            noncompliance_legislation)
-
-    for order_permit in stop_order.findall('order_permits'):
-        noncompliance_permit = _save_order_noncompliance_permit(order_permit)
-        stop_detail.noncompliance_permits.append(noncompliance_permit)
-
-    stop_detail.detail = _parse_element_text(detail)
-    stop_detail.stop_type = _parse_element_text(stop_type)
-    stop_detail.response_status = _parse_element_text(response_status)
-    stop_detail.stop_status = _parse_element_text(stop_status)
-    stop_detail.observation = _parse_element_text(observation)
-    stop_detail.response = _parse_element_text(response)
-    stop_detail.response_received = _parse_element_text(response_received)
-    stop_detail.completion_date = _parse_element_text(completion_date)
-    stop_detail.authority_act = _parse_element_text(authority_act)
-    stop_detail.authority_act_section = _parse_element_text(
-        authority_act_section)
-
-    for attachment in stop_order.findall('attachment'):
-        doc = _save_document(attachment)
-        stop_detail.documents.append(doc)
-
+            _load_noncompliance_legislation(legislation, code_tables))
+    for permit in order['permits']:
+        stop_detail.noncompliance_permits.append(NonCompliancePermit(**permit))
+    for document in order['documents']:
+        stop_detail.documents.append(_load_document(document, code_tables))
     return stop_detail
 
 
-def _find_or_save_inspected_location_type(stop_type):
-    inspected_location_types = InspectedLocationType.find_all_inspected_location_types()
-    type_found = False
-    inspected_location_type = None
-    if stop_type is not None:
-        for type in inspected_location_types:
-            if type.inspected_location_type == stop_type.text:
-                type_found = True
-                inspected_location_type = type
-    if not type_found:
-        inspected_location_type = InspectedLocationType(
-            inspected_location_type=stop_type.text)
-        db.session.add(inspected_location_type)
-    return inspected_location_type
-
-
-def _save_order_noncompliance_permit(order_permit):
-    noncompliance_permit = NonCompliancePermit()
-
-    permit_section_number = order_permit.find('permit_section_number')
-    permit_section_text = order_permit.find('permit_section_text')
-    permit_section_title = order_permit.find('permit_section_title')
-
-    noncompliance_permit.section_number = _parse_element_text(
-        permit_section_number)
-    noncompliance_permit.section_title = _parse_element_text(
-        permit_section_title)
-    noncompliance_permit.section_text = _parse_element_text(
-        permit_section_text)
-
-    return noncompliance_permit
-
-
-def _save_order_noncompliance_legislation(order_legislation):
-    noncompliance_legislation = NonComplianceLegislation()
-
-    estimated_incident_date = order_legislation.find('estimated_incident_date')
-    noncompliant_description = order_legislation.find(
-        'noncompliant_description')
-    parent_act = order_legislation.find('parent_act')
-    act_regulation = order_legislation.find('act_regulation')
-    section = order_legislation.find('section')
-    compliance_article_id = order_legislation.find('compliance_article_id')
-    compliance_article_comments = order_legislation.find(
-        'compliance_article_comments')
-
-    noncompliance_legislation.estimated_incident_date = _parse_dumb_nris_date_string(
-        _parse_element_text(estimated_incident_date))
-    noncompliance_legislation.noncompliant_description = _parse_element_text(
-        noncompliant_description)
-
-    noncompliance_legislation.parent_legislation_act = _save_legislation_act(
-        parent_act)
-    legislation_act_regulation = _save_legislation_act(act_regulation)
-
-    noncompliance_legislation.regulation_legislation_act_section = _save_legislation_act_section(
-        legislation_act_regulation, section)
-    noncompliance_legislation.compliance_article = _save_compliance_article(
-        compliance_article_id, compliance_article_comments)
+def _load_noncompliance_legislation(legislation, code_tables):
+    noncompliance_legislation = NonComplianceLegislation(**legislation['noncompliance'])
+    noncompliance_legislation.parent_legislation_act = _find_or_add_legislation_act(
+        legislation['parent_act'], code_tables)
+    legislation_act_regulation = _find_or_add_legislation_act(legislation['act_regulation'],
+                                                              code_tables)
+    noncompliance_legislation.regulation_legislation_act_section = _find_or_add_legislation_act_section(
+        legislation_act_regulation, legislation['section'], code_tables)
+
+    compliance_article_id = legislation['compliance_article_id']
+    if compliance_article_id is not None:
+        noncompliance_legislation.compliance_article = code_tables.find_or_add(
+            code_tables.compliance_articles, compliance_article_id,
+            lambda: LegislationComplianceArticle(
+                external_id=compliance_article_id,
+                comments=legislation['compliance_article_comments']))
 
     return noncompliance_legislation
 
 
-def _parse_dumb_nris_date_string(_dumb_nris_date_string):
-    if _dumb_nris_date_string is None:
+def _find_or_add_legislation_act(act, code_tables):
+    if act is None:
         return None
 
-    return _replace_string_at_index(_dumb_nris_date_string, "T", 10)
+    return code_tables.find_or_add(code_tables.legislation_acts, act,
+                                   lambda: LegislationAct(act=act))
 
 
-def _replace_string_at_index(s, newstring, index, nofail=False):
-    if not nofail and index not in range(len(s)):
-        raise ValueError("index outside given string")
-    if index < 0:
-        return newstring + s
-    if index > len(s):
-        return s + newstring
-    return s[:index] + newstring + s[index + 1:]
-
-
-def _save_legislation_act(legislation_act_to_get):
-    legislation_acts = LegislationAct.find_all_legislation_acts()
-    act_found = False
-    legislation_act = None
-
-    if legislation_act_to_get is not None:
-        for act in legislation_acts:
-            if act.act == legislation_act_to_get.text:
-                act_found = True
-                legislation_act = act
-
-        if not act_found:
-            legislation_act = LegislationAct(act=legislation_act_to_get.text)
-            db.session.add(legislation_act)
-
-    return legislation_act
-
-
-def _save_legislation_act_section(legislation_act, section_to_get):
-    section_found = False
-    section = None
-
-    if legislation_act is not None and section_to_get is not None:
-        for legislation_act_section in legislation_act.sections:
-            if legislation_act_section.section == section_to_get.text:
-                section_found = True
-                section = legislation_act_section
-
-        if not section_found:
-            section = LegislationActSection(section=section_to_get.text)
-            legislation_act.sections.append(section)
-            db.session.add(section)
-
-    return section
-
-
-def _save_compliance_article(compliance_article_id, compliance_article_comments):
-    if compliance_article_id is not None:
-        compliance_article = LegislationComplianceArticle.find_legislation_compliance_article_by_external_id(
-            compliance_article_id.text)
-
-        if compliance_article is None:
-            compliance_article = LegislationComplianceArticle(
-                external_id=compliance_article_id.text, comments=compliance_article_comments.text)
-            db.session.add(compliance_article)
-
-        return compliance_article
-
-
-def _save_document(attachment):
-    external_id = attachment.find('attachment_id')
-    document_date = attachment.find('attachment_date')
-    file_name = attachment.find('file_path')
-    comment = attachment.find('attachment_comment')
+def _find_or_add_legislation_act_section(legislation_act, section, code_tables):
+    if legislation_act is None or section is None:
+        return None
 
-    doc = Document(
-        external_id=_parse_element_text(external_id),
-        document_date=_parse_element_text(document_date),
-        file_name=_parse_element_text(file_name),
-        comment=_parse_element_text(comment))
+    def create_section():
+        legislation_act_section = LegislationActSection(section=section)
+        legislation_act.sections.append(legislation_act_section)
+        return legislation_act_section
 
-    file_type = attachment.find('file_type')
-    doc_type = _find_or_save_doc_type(file_type)
+    return code_tables.find_or_add(code_tables.legislation_act_sections,
+                                   (legislation_act.act, section), create_section)
 
-    doc.document_type_rel = doc_type
 
-    db.session.add(doc)
+def _load_document(document, code_tables):
+    doc = Document(**document['document'])
+    if document['document_type'] is not None:
+        doc.document_type_rel = code_tables.find_or_add(
+            code_tables.document_types, document['document_type'],
+            lambda: DocumentType(document_type=document['document_type']))
     return doc
-
-
-def _find_or_save_doc_type(file_type):
-    types = DocumentType.find_all_document_types()
-    type_found = False
-    doc_type = None
-    if file_type is not None:
-        for type in types:
-            if type.document_type == file_type.text:
-                type_found = True
-                doc_type = type
-    if not type_found:
-        doc_type = DocumentType(document_type=file_type.text)
-        db.session.add(doc_type)
-
-    return doc_type
-
-
-def _find_or_save_inspection_type(inspection_type):
-    types = InspectionType.find_all_inspection_types()
-    type_found = False
-    inspec_type = None
-    if inspection_type is not None:
-        for type in types:
-            if type.inspection_type_code == inspection_type.text:
-                type_found = True
-                inspec_type = type
-    if not type_found:
-        inspec_type = InspectionType(inspection_type_code=inspection_type.text)
-        db.session.add(inspec_type)
-    return inspec_type
@@ -0,0 +1,153 @@
+import re
+
+from flask import current_app
+
+from app.extensions import db
+from app.nris.models.nris_raw_data import NRISRawData
+from app.nris.etl.nris_etl import etl_nris_data
+from app.nris.utils.logger import get_logger
+
+LIVE_SCHEMA = 'nris'
+STAGING_SCHEMA = 'nris_staging'
+PREVIOUS_SCHEMA = 'nris_previous'
+
+# The indexes of the live tables, other than those of their primary keys and unique constraints.
+LIVE_INDEXES_SQL = f"""
+SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i JOIN pg_class t ON t.oid = i.indrelid
+    WHERE t.relnamespace = '{LIVE_SCHEMA}'::regnamespace AND t.relname = ANY(:tables)
+    AND NOT EXISTS (SELECT 1 FROM pg_constraint c
+        WHERE c.conindid = i.indexrelid AND c.contype IN ('p', 'u', 'x'));
+"""
+
+# The primary key, unique and foreign key constraints of the live tables, foreign keys last.
+LIVE_CONSTRAINTS_SQL = f"""
+SELECT t.relname, c.conname, pg_get_constraintdef(c.oid)
+    FROM pg_constraint c JOIN pg_class t ON t.oid = c.conrelid
+    WHERE t.relnamespace = '{LIVE_SCHEMA}'::regnamespace AND t.relname = ANY(:tables)
+    AND c.contype IN ('p', 'u', 'f')
+    ORDER BY c.contype = 'f', t.relname, c.conname;
+"""
+
+# The sequences owned by the columns of the live tables.
+LIVE_SEQUENCES_SQL = f"""
+SELECT s.oid::regclass::text, t.relname, a.attname
+    FROM pg_depend d
+    JOIN pg_class s ON s.oid = d.objid AND s.relkind = 'S'
+    JOIN pg_class t ON t.oid = d.refobjid
+    JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = d.refobjsubid
+    WHERE d.deptype = 'a' AND t.relnamespace = '{LIVE_SCHEMA}'::regnamespace
+    AND t.relname = ANY(:tables);
+"""
+
+
+class StagingValidationError(Exception):
+    pass
+
+
+def _staged_table_names():
+    """Every table the ETL loads."""
+    return [
+        table.name for table in db.Model.metadata.sorted_tables
+        if table.name != NRISRawData.__tablename__
+    ]
+
+
+def _live_definitions(table_names):
+    """
+    The statements that build the indexes and constraints of the live tables on their staging
+    copies, with the same names, foreign keys last. The definitions are read from the catalog
+    with every name schema-qualified, and their live schema swapped for the staging one.
+    """
+    db.session.execute('set local search_path to pg_catalog;')
+    live_tables = rf'\b{LIVE_SCHEMA}\.({"|".join(table_names)})\b'
+    statements = [
+        re.sub(live_tables, rf'{STAGING_SCHEMA}.\1', definition)
+        for (definition, ) in db.session.execute(LIVE_INDEXES_SQL, {'tables': table_names})
+    ]
+    statements.extend(
+        f'alter table {STAGING_SCHEMA}.{table_name} add constraint "{name}" ' +
+        re.sub(live_tables, rf'{STAGING_SCHEMA}.\1', definition)
+        for (table_name, name, definition) in db.session.execute(LIVE_CONSTRAINTS_SQL,
+                                                                   {'tables': table_names}))
+    sequences = db.session.execute(LIVE_SEQUENCES_SQL, {'tables': table_names}).fetchall()
+    return statements, sequences
+
+
+def _count(schema, table_name):
+    return db.session.execute(f'select count(*) from {schema}.{table_name};').scalar()
+
+
+def _validate(stats, table_names):
+    inspections = _count(STAGING_SCHEMA, 'inspection')
+    if inspections != stats['inspections']:
+        raise StagingValidationError(
+            f'{inspections} inspections staged, {stats["inspections"]} were loaded.')
+    rendered = _count(STAGING_SCHEMA, 'inspection_json')
+    if rendered != inspections:
+        raise StagingValidationError(f'{rendered} of {inspections} inspections rendered.')
+
+    # A much smaller extract than the data it replaces is more likely a problem upstream.
+    live_inspections = _count(LIVE_SCHEMA, 'inspection')
+    min_ratio = float(current_app.config['NRIS_ETL_SWAP_MIN_RATIO'])
+    if inspections < live_inspections * min_ratio:
+        raise StagingValidationError(
+            f'{inspections} inspections staged to replace {live_inspections}.')
+
+    return {table_name: _count(STAGING_SCHEMA, table_name) for table_name in table_names}
+
+
+def etl_nris_data_into_staging(batch_size=None, workers=None):
+    """
+    Rebuilds the nris tables from every raw document in a staging schema and swaps them in.
+
+    The staging tables are created from the live ones, with their defaults and checks but without
+    their indexes and constraints, which are built once the ETL has loaded them, so the load does
+    not maintain them row by row. The sequences of the live tables are handed over to the staging
+    copies, which draw their keys from them. The staged counts are then checked, and the staged
+    tables are moved into the nris schema in place of the live ones. It all happens in one
+    transaction: readers see the previous data until it commits, and on any error the live tables
+    are left as they were.
+
+    :return: the ETL stats, with the row count of every staged table
+    """
+    logger = get_logger()
+    table_names = _staged_table_names()
+
+    db.session.execute(f'drop schema if exists {STAGING_SCHEMA} cascade;')
+    db.session.execute(f'create schema {STAGING_SCHEMA};')
+    definitions, sequences = _live_definitions(table_names)
+    for table_name in table_names:
+        db.session.execute(f'create table {STAGING_SCHEMA}.{table_name} '
+                           f'(like {LIVE_SCHEMA}.{table_name} including all excluding indexes);')
+    for sequence, table_name, column in sequences:
+        db.session.execute(
+            f'alter sequence {sequence} owned by {STAGING_SCHEMA}.{table_name}.{column};')
+
+    # The ETL's tables resolve to the staging copies, and nris_raw_data to the live one.
+    db.session.execute(f'set local search_path to {STAGING_SCHEMA}, {LIVE_SCHEMA};')
+    db.session.execute('update nris_raw_data set etl_content_hash = null;')
+    stats = etl_nris_data(batch_size, workers, commit=False)
+
+    for definition in definitions:
+        db.session.execute(definition)
+    stats['tables'] = _validate(stats, table_names)
+    logger.info(f'NRIS ETL: staged {stats["tables"]}')
+
+    db.session.execute(f'drop schema if exists {PREVIOUS_SCHEMA} cascade;')
+    db.session.execute(f'create schema {PREVIOUS_SCHEMA};')
+    # Owned sequences move along with their table, and these stay in the nris schema.
+    for sequence, _, _ in sequences:
+        db.session.execute(f'alter sequence {sequence} owned by none;')
+    for table_name in table_names:
+        db.session.execute(f'alter table if exists {LIVE_SCHEMA}.{table_name} '
+                           f'set schema {PREVIOUS_SCHEMA};')
+        db.session.execute(f'alter table {STAGING_SCHEMA}.{table_name} set schema {LIVE_SCHEMA};')
+    for sequence, table_name, column in sequences:
+        db.session.execute(
+            f'alter sequence {sequence} owned by {LIVE_SCHEMA}.{table_name}.{column};')
+    db.session.execute(f'drop schema {PREVIOUS_SCHEMA} cascade;')
+    db.session.execute(f'drop schema {STAGING_SCHEMA} cascade;')
+    db.session.commit()
+    logger.info('NRIS ETL: staged tables swapped in')
+
+    return stats
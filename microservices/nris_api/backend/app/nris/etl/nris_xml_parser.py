@@ -0,0 +1,189 @@
+import io
+from xml.etree.ElementTree import iterparse
+
+# Parsing runs in worker processes, so this module only turns an assessment's XML into plain
+# dicts and lists, keyed by the attribute names of the models they are loaded into.
+
+
+def _local_name(tag):
+    # {http://...}stops -> stops
+    return tag.rpartition('}')[2]
+
+
+def _text(element, path):
+    found = element.find(path)
+    return found.text if found is not None else None
+
+
+def _strip_namespaces(element):
+    for child in element.iter():
+        child.tag = _local_name(child.tag)
+    return element
+
+
+def parse_assessment(xml_document):
+    """
+    Parses one CORS_CV_ASSESSMENTS_XVW document into an inspection record, or None when the
+    assessment was deleted. The document is read with iterparse and every stop is dropped from
+    the tree once it is parsed, so a large inspection is never held in memory twice.
+    """
+    record = {'inspection': {}, 'documents': [], 'stops': []}
+    depth = 0
+    events = iterparse(io.BytesIO(xml_document.encode('utf-8')), events=('start', 'end'))
+    for event, element in events:
+        if event == 'start':
+            depth += 1
+            continue
+
+        depth -= 1
+        name = _local_name(element.tag)
+        if depth == 2 and name == 'stops':
+            record['stops'].append(_parse_stop(_strip_namespaces(element)))
+            element.clear()
+        elif depth == 1:
+            _parse_assessment_child(record, name, _strip_namespaces(element))
+            element.clear()
+
+    if record.get('status') == 'Deleted':
+        return None
+
+    inspection = record['inspection']
+    if record.get('status') != 'Complete':
+        inspection.pop('completed_date', None)
+    return record
+
+
+_INSPECTION_FIELDS = {
+    'assessment_id': 'external_id',
+    'assessment_date': 'inspection_date',
+    'completion_date': 'completed_date',
+    'assessor': 'inspector_idir',
+    'report_introduction': 'inspection_introduction',
+    'report_preamble': 'inspection_preamble',
+    'report_closing': 'inspection_closing',
+    'officer_notes': 'officer_notes',
+}
+
+
+def _parse_assessment_child(record, name, element):
+    inspection = record['inspection']
+    if name in _INSPECTION_FIELDS:
+        inspection[_INSPECTION_FIELDS[name]] = element.text
+    elif name == 'assessment_status':
+        record['status'] = element.text
+    elif name == 'businessArea':
+        inspection['business_area'] = _text(element, 'business_area_name')
+    elif name == 'location':
+        inspection['mine_no'] = _text(element, 'location_id')
+    elif name == 'inspection':
+        inspection['inspection_report_sent_date'] = _text(element, 'inspct_report_sent_date')
+        record['inspection_type'] = _text(element, 'inspection_type')
+    elif name == 'attachment':
+        record['documents'].append(_parse_document(element))
+
+
+def _parse_stop(stop):
+    location = None
+    order_location = stop.find('secondary_locations')
+    if order_location is not None:
+        location = {
+            'description': _text(order_location, 'secondary_location_description'),
+            'notes': _text(order_location, 'secondary_location_notes'),
+            'latitude': _text(order_location, 'secondary_latitude'),
+            'longitude': _text(order_location, 'secondary_longitude'),
+            'utm_easting': _text(order_location, 'secondary_location_utm/utm_easting'),
+            'utm_northing': _text(order_location, 'secondary_location_utm/utm_northing'),
+            'zone_number': _text(order_location, 'secondary_location_utm/zone_number'),
+            'zone_letter': _text(order_location, 'secondary_location_utm/zone_letter'),
+        }
+
+    return {
+        'location': location,
+        'location_type': _text(stop, 'stop_type'),
+        'orders': [_parse_stop_order(order) for order in stop.findall('stop_orders')],
+        'advisories': [{
+            'detail': _text(advisory, 'advisory_detail')
+        } for advisory in stop.findall('stop_advisories')],
+        'warnings': [{
+            'detail': _text(warning, 'warning_detail'),
+            'respond_date': _text(warning, 'warning_respond_date')
+        } for warning in stop.findall('stop_warnings')],
+        'requests': [{
+            'detail': _text(request, 'request_detail'),
+            'response': _text(request, 'request_response'),
+            'respond_date': _text(request, 'request_respond_date')
+        } for request in stop.findall('stop_requests')],
+        'documents': [_parse_document(attachment) for attachment in stop.findall('attachment')],
+    }
+
+
+def _parse_stop_order(stop_order):
+    return {
+        'order': {
+            'detail': _text(stop_order, 'order_detail'),
+            'stop_type': _text(stop_order, 'order_type'),
+            'response_status': _text(stop_order, 'order_response_status'),
+            'stop_status': _text(stop_order, 'order_status'),
+            'observation': _text(stop_order, 'order_observation'),
+            'response': _text(stop_order, 'order_response'),
+            'response_received': _text(stop_order, 'order_response_received_date'),
+            'completion_date': _text(stop_order, 'order_completion_date'),
+            'authority_act': _text(stop_order, 'order_authority_act'),
+            'authority_act_section': _text(stop_order, 'order_authority_section'),
+        },
+        'legislations': [
+            _parse_noncompliance_legislation(legislation)
+            for legislation in stop_order.findall('order_legislations')
+        ],
+        'permits': [{
+            'section_number': _text(permit, 'permit_section_number'),
+            'section_title': _text(permit, 'permit_section_title'),
+            'section_text': _text(permit, 'permit_section_text'),
+        } for permit in stop_order.findall('order_permits')],
+        'documents': [_parse_document(attachment) for attachment in stop_order.findall('attachment')],
+    }
+
+
+def _parse_noncompliance_legislation(order_legislation):
+    return {
+        'noncompliance': {
+            'estimated_incident_date':
+            _parse_dumb_nris_date_string(_text(order_legislation, 'estimated_incident_date')),
+            'noncompliant_description':
+            _text(order_legislation, 'noncompliant_description'),
+        },
+        'parent_act': _text(order_legislation, 'parent_act'),
+        'act_regulation': _text(order_legislation, 'act_regulation'),
+        'section': _text(order_legislation, 'section'),
+        'compliance_article_id': _text(order_legislation, 'compliance_article_id'),
+        'compliance_article_comments': _text(order_legislation, 'compliance_article_comments'),
+    }
+
+
+def _parse_document(attachment):
+    return {
+        'document': {
+            'external_id': _text(attachment, 'attachment_id'),
+            'document_date': _text(attachment, 'attachment_date'),
+            'file_name': _text(attachment, 'file_path'),
+            'comment': _text(attachment, 'attachment_comment'),
+        },
+        'document_type': _text(attachment, 'file_type'),
+    }
+
+
+def _parse_dumb_nris_date_string(_dumb_nris_date_string):
+    if _dumb_nris_date_string is None:
+        return None
+
+    return _replace_string_at_index(_dumb_nris_date_string, "T", 10)
+
+
+def _replace_string_at_index(s, newstring, index, nofail=False):
+    if not nofail and index not in range(len(s)):
+        raise ValueError("index outside given string")
+    if index < 0:
+        return newstring + s
+    if index > len(s):
+        return s + newstring
+    return s[:index] + newstring + s[index + 1:]
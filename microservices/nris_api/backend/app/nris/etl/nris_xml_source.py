@@ -0,0 +1,66 @@
+import glob
+import os
+
+from flask import current_app
+
+# The EMPR assessments, one XML document each.
+NRIS_XML_QUERY = "select xml_document from CORS.CORS_CV_ASSESSMENTS_XVW where business_area = 'EMPR'"
+
+
+class OracleXmlSource(object):
+    """
+    Streams the EMPR assessment XML documents out of the NRIS Oracle database in batches.
+
+    The CLOB column is fetched as a long string together with its row, instead of as a LOB
+    locator that needs a round trip per row to be read, and rows are fetched `arraysize` at a time,
+    so only one batch is held in memory.
+    """
+
+    def __init__(self, arraysize=None):
+        self.arraysize = arraysize or int(current_app.config['NRIS_ORACLE_ARRAYSIZE'])
+
+    def batches(self, batch_size):
+        # cx_Oracle is only needed when reading from NRIS.
+        import cx_Oracle
+
+        def fetch_lobs_as_strings(cursor, name, default_type, size, precision, scale):
+            if default_type == cx_Oracle.CLOB:
+                return cursor.var(cx_Oracle.LONG_STRING, arraysize=cursor.arraysize)
+
+        dsn_tns = cx_Oracle.makedsn(
+            current_app.config['NRIS_DB_HOSTNAME'],
+            current_app.config['NRIS_DB_PORT'],
+            service_name=current_app.config['NRIS_DB_SERVICENAME'])
+        oracle_db = cx_Oracle.connect(
+            user=current_app.config['NRIS_DB_USER'],
+            password=current_app.config['NRIS_DB_PASSWORD'],
+            dsn=dsn_tns)
+        try:
+            cursor = oracle_db.cursor()
+            cursor.arraysize = self.arraysize
+            cursor.outputtypehandler = fetch_lobs_as_strings
+            cursor.execute(NRIS_XML_QUERY)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [row[0] for row in rows]
+            cursor.close()
+        finally:
+            oracle_db.close()
+
+
+class DirectoryXmlSource(object):
+    """Reads the XML documents from the *.xml files of a local directory, to run offline."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def batches(self, batch_size):
+        file_names = sorted(glob.glob(os.path.join(self.path, '*.xml')))
+        for start in range(0, len(file_names), batch_size):
+            batch = []
+            for file_name in file_names[start:start + batch_size]:
+                with open(file_name, encoding='utf-8') as xml_file:
+                    batch.append(xml_file.read())
+            yield batch
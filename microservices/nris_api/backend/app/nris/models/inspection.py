@@ -32,8 +32,8 @@ INSPECTION_RESPONSE_MODEL = api.model(
 class Inspection(Base):
     __tablename__ = "inspection"
     inspection_id = db.Column(db.Integer, primary_key=True)
-    external_id = db.Column(db.Integer)
-    inspection_date = db.Column(db.DateTime)
+    external_id = db.Column(db.Integer, index=True)
+    inspection_date = db.Column(db.DateTime, index=True)
     completed_date = db.Column(db.DateTime)
     inspection_report_sent_date = db.Column(db.DateTime)
     inspection_status_id = db.Column(db.Integer,
@@ -44,8 +44,8 @@ class Inspection(Base):
     inspection_type = db.relationship("InspectionType")
     inspection_type_code = association_proxy('inspection_type', 'inspection_type_code')
     business_area = db.Column(db.String(256))
-    mine_no = db.Column(db.String(64))
-    inspector_idir = db.Column(db.String(256))
+    mine_no = db.Column(db.String(64), index=True)
+    inspector_idir = db.Column(db.String(256), index=True)
     inspection_introduction = db.Column(db.String())
     inspection_preamble = db.Column(db.String())
     inspection_closing = db.Column(db.String())
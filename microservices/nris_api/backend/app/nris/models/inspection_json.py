@@ -0,0 +1,26 @@
+from app.extensions import db
+from app.nris.utils.base_model import Base
+
+
+class InspectionJson(Base):
+    """An inspection rendered through INSPECTION_RESPONSE_MODEL by the ETL run that loaded it."""
+    __tablename__ = "inspection_json"
+    inspection_id = db.Column(db.Integer, primary_key=True)
+    external_id = db.Column(db.Integer, index=True)
+    mine_no = db.Column(db.String(64), index=True)
+    inspection_date = db.Column(db.DateTime)
+    etl_run_id = db.Column(db.String(32), nullable=False)
+    document = db.Column(db.Text, nullable=False)
+
+    def __repr__(self):
+        return f'<InspectionJson inspection_id={self.inspection_id} etl_run_id={self.etl_run_id}>'
+
+    @classmethod
+    def find_etl_run_id_by_external_id(cls, external_id):
+        return db.session.query(
+            cls.etl_run_id).filter_by(external_id=external_id).limit(1).scalar()
+
+    @classmethod
+    def find_document_by_external_id(cls, external_id):
+        return db.session.query(
+            cls.document).filter_by(external_id=external_id).limit(1).scalar()
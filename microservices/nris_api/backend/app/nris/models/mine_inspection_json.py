@@ -0,0 +1,18 @@
+from app.extensions import db
+from app.nris.utils.base_model import Base
+
+
+class MineInspectionJson(Base):
+    """The rendered inspections of a mine as one JSON array, newest first."""
+    __tablename__ = "mine_inspection_json"
+    mine_no = db.Column(db.String(64), primary_key=True)
+    etl_run_id = db.Column(db.String(32), nullable=False)
+    inspection_count = db.Column(db.Integer, nullable=False)
+    document = db.Column(db.Text, nullable=False)
+
+    def __repr__(self):
+        return f'<MineInspectionJson mine_no={self.mine_no} etl_run_id={self.etl_run_id}>'
+
+    @classmethod
+    def find_document_by_mine_no(cls, mine_no):
+        return db.session.query(cls.document).filter_by(mine_no=mine_no).scalar()
@@ -9,6 +9,10 @@ class NRISRawData(Base):
     nris_data = db.Column(db.Text)
     input_date = db.Column(db.DateTime, nullable=False, default=datetime.now())
     processed_date = db.Column(db.DateTime)
+    assessment_id = db.Column(db.Integer, index=True)
+    # The SHA-256 of nris_data, and of the nris_data last transformed into the nris schema.
+    content_hash = db.Column(db.String(64))
+    etl_content_hash = db.Column(db.String(64))
 
     def __repr__(self):
         return f'<id={self.id} NRISRawData({self.nris_data})>'
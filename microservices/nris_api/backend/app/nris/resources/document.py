@@ -1,10 +1,11 @@
 from flask import request
-from flask_restplus import Resource
+from flask_restplus import Resource, marshal
 
 from werkzeug.exceptions import BadRequest, NotFound, InternalServerError
 
 from app.extensions import api, db
 from app.nris.utils.access_decorators import requires_role_nris_view
+from app.nris.utils import pagination
 
 from app.nris.models.document import Document as Model, DOCUMENT_RESPONSE_MODEL as RESPONSE_MODEL
 
@@ -12,15 +13,48 @@ module_path = 'documents'
 filter_fields = ['document_type', 'file_name']
 
 
+date_params = {
+    'document_date_from': 'Dated on or after this date',
+    'document_date_to': 'Dated on or before this date',
+}
+
+PAGE_MODEL = pagination.page_model('document_page', RESPONSE_MODEL)
+
+
 @api.route(f'/{module_path}')
 class DocumentListResource(Resource):
-    @api.doc(params={field: "Filter by exact match" for field in filter_fields})
-    @api.marshal_with(RESPONSE_MODEL, envelope='records', code=200)
+    @api.doc(
+        description=pagination.PAGINATION_DESCRIPTION,
+        params={
+            **{field: "Filter by exact match"
+               for field in filter_fields},
+            **date_params,
+            **pagination.PAGINATION_PARAMS
+        })
+    @api.response(200, 'A page at a time', PAGE_MODEL)
     @requires_role_nris_view
     def get(self):
+        projected = pagination.projection_args(request.args, RESPONSE_MODEL)
+        per_page = pagination.per_page_arg(request.args)
+
         filtered_params = {k: v.strip() for (k, v) in request.args.items() if k in filter_fields}
-        filtered_results = Model.query.filter_by(**filtered_params).all()
-        return filtered_results
+        query = Model.query.filter_by(**filtered_params)
+
+        date_from = pagination.date_arg(request.args, 'document_date_from')
+        if date_from:
+            query = query.filter(Model.document_date >= date_from)
+        date_to = pagination.date_arg(request.args, 'document_date_to')
+        if date_to:
+            query = query.filter(Model.document_date <= date_to)
+        if request.args.get('cursor'):
+            document_id, = pagination.decode_cursor(request.args['cursor'], 1)
+            query = query.filter(Model.document_id > document_id)
+
+        records, more = pagination.fetch_page(query.order_by(Model.document_id), per_page)
+        return {
+            'records': marshal(records, projected),
+            'next_cursor': pagination.encode_cursor([records[-1].document_id]) if more else None
+        }
 
 
 @api.route(f'/{module_path}/<int:id>')
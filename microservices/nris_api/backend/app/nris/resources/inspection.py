@@ -1,34 +1,172 @@
-from flask import request
-from flask_restplus import Resource
+import hashlib
+import json
+
+from flask import request, Response
+from flask_restplus import Resource, marshal
+from sqlalchemy import and_, or_, tuple_
 
 from werkzeug.exceptions import BadRequest, NotFound, InternalServerError
 
 from app.extensions import api, db
 from app.nris.utils.access_decorators import requires_role_nris_view
+from app.nris.utils import pagination
 
 from app.nris.models.inspection import Inspection as Model, INSPECTION_RESPONSE_MODEL as RESPONSE_MODEL
+from app.nris.models.inspection_json import InspectionJson
+from app.nris.models.mine_inspection_json import MineInspectionJson
 
 module_path = 'inspections'
 filter_fields = ['inspection_status_code', 'business_area', 'mine_no', 'inspector_idir']
+date_params = {
+    'inspection_date_from': 'Inspected on or after this date',
+    'inspection_date_to': 'Inspected on or before this date',
+}
+
+PAGE_MODEL = pagination.page_model('inspection_page', RESPONSE_MODEL)
+
+
+def _after(cursor, model=Model):
+    # Newest first, the inspections without a date last.
+    inspection_date, inspection_id = pagination.decode_cursor(cursor, 2)
+    if inspection_date is None:
+        return and_(model.inspection_date == None, model.inspection_id < inspection_id)
+    return or_(
+        tuple_(model.inspection_date, model.inspection_id) < tuple_(
+            pagination.parse_date(inspection_date, 'cursor'), inspection_id),
+        model.inspection_date == None)
+
+
+def _newest_first(model):
+    return model.inspection_date.desc().nullslast(), model.inspection_id.desc()
+
+
+def _json_response(etag, body):
+    """The stored JSON, or 304 Not Modified when the client has it. `body` is only called for 200."""
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body(), mimetype='application/json')
+    response.set_etag(etag)
+    return response
+
+
+def _rendered_page(per_page):
+    """
+    The page as rendered by the ETL, when the request is one the stored documents can answer: no
+    projection and no filter other than mine_no and the dates. Returns None otherwise, and before
+    the ETL has rendered anything.
+    """
+    filters = {k for k in request.args if k in filter_fields}
+    if filters - {'mine_no'} or request.args.get('fields') or request.args.get('depth'):
+        return None
+    mine_no = request.args.get('mine_no', '').strip() or None
+
+    if mine_no and not any(request.args.get(k) for k in ['cursor', *date_params]):
+        # A mine that fits on one page is one stored document.
+        mine = MineInspectionJson.query.with_entities(
+            MineInspectionJson.etl_run_id,
+            MineInspectionJson.inspection_count).filter_by(mine_no=mine_no).first()
+        if mine and mine.inspection_count <= per_page:
+
+            def body():
+                document = MineInspectionJson.find_document_by_mine_no(mine_no)
+                return '{"records":' + document + ',"next_cursor":null}'
+
+            return _json_response(mine.etl_run_id, body)
+
+    query = db.session.query(InspectionJson.inspection_id, InspectionJson.inspection_date,
+                             InspectionJson.etl_run_id)
+    if mine_no:
+        query = query.filter(InspectionJson.mine_no == mine_no)
+    date_from = pagination.date_arg(request.args, 'inspection_date_from')
+    if date_from:
+        query = query.filter(InspectionJson.inspection_date >= date_from)
+    date_to = pagination.date_arg(request.args, 'inspection_date_to')
+    if date_to:
+        query = query.filter(InspectionJson.inspection_date <= date_to)
+    if request.args.get('cursor'):
+        query = query.filter(_after(request.args['cursor'], InspectionJson))
+
+    keys, more = pagination.fetch_page(query.order_by(*_newest_first(InspectionJson)), per_page)
+    if not keys and not db.session.query(InspectionJson.query.exists()).scalar():
+        return None
+    next_cursor = pagination.encode_cursor([keys[-1].inspection_date, keys[-1].inspection_id
+                                            ]) if more else None
+    etag = hashlib.md5(
+        json.dumps([[key.inspection_id, key.etl_run_id] for key in keys] +
+                   [next_cursor]).encode('utf-8')).hexdigest()
+
+    def body():
+        ids = [key.inspection_id for key in keys]
+        documents = dict(
+            db.session.query(InspectionJson.inspection_id, InspectionJson.document).filter(
+                InspectionJson.inspection_id.in_(ids)))
+
+        def generate():
+            yield '{"records":['
+            for index, inspection_id in enumerate(ids):
+                yield (',' if index else '') + documents[inspection_id]
+            yield '],"next_cursor":' + json.dumps(next_cursor) + '}'
+
+        return generate()
+
+    return _json_response(etag, body)
 
 
 @api.route(f'/{module_path}')
 class InspectionListResource(Resource):
-    @api.doc(params={field: "Filter by exact match" for field in filter_fields})
-    @api.marshal_with(RESPONSE_MODEL, envelope='records', code=200)
+    @api.doc(
+        description=pagination.PAGINATION_DESCRIPTION,
+        params={
+            **{field: "Filter by exact match"
+               for field in filter_fields},
+            **date_params,
+            **pagination.PAGINATION_PARAMS
+        })
+    @api.response(200, 'Newest first, a page at a time', PAGE_MODEL)
     @requires_role_nris_view
     def get(self):
+        per_page = pagination.per_page_arg(request.args)
+        rendered = _rendered_page(per_page)
+        if rendered is not None:
+            return rendered
+
+        projected = pagination.projection_args(request.args, RESPONSE_MODEL)
+
         filtered_params = {k: v.strip() for (k, v) in request.args.items() if k in filter_fields}
-        filtered_results = Model.query.filter_by(**filtered_params).all()
-        return filtered_results
+        query = Model.query.filter_by(**filtered_params).options(
+            *pagination.loader_options(Model, projected))
+
+        date_from = pagination.date_arg(request.args, 'inspection_date_from')
+        if date_from:
+            query = query.filter(Model.inspection_date >= date_from)
+        date_to = pagination.date_arg(request.args, 'inspection_date_to')
+        if date_to:
+            query = query.filter(Model.inspection_date <= date_to)
+        if request.args.get('cursor'):
+            query = query.filter(_after(request.args['cursor']))
+
+        records, more = pagination.fetch_page(query.order_by(*_newest_first(Model)), per_page)
+        last = records[-1] if records else None
+        return {
+            'records': marshal(records, projected),
+            'next_cursor':
+            pagination.encode_cursor([last.inspection_date, last.inspection_id]) if more else None
+        }
 
 
 @api.route(f'/{module_path}/<int:id>')
 class InspectionResource(Resource):
-    @api.marshal_with(RESPONSE_MODEL, code=200)
+    @api.response(200, 'Success', RESPONSE_MODEL)
     @requires_role_nris_view
     def get(self, id):
+        etl_run_id = InspectionJson.find_etl_run_id_by_external_id(id)
+        if etl_run_id:
+            return _json_response(etl_run_id,
+                                  lambda: InspectionJson.find_document_by_external_id(id))
+
+        # Not rendered by the ETL yet.
         result = Model.query.filter_by(external_id=id).first()
         if not result:
             raise NotFound(f"{Model.__name__} not found")
-        return result
+        return marshal(result, RESPONSE_MODEL)
@@ -0,0 +1,201 @@
+from datetime import datetime
+
+from dateutil.relativedelta import relativedelta
+from flask import request
+from flask_restplus import Resource, fields
+from sqlalchemy import and_, case, func, literal, select, union_all, exists
+from werkzeug.exceptions import BadRequest
+
+from app.extensions import api, db
+from app.nris.utils.access_decorators import requires_role_nris_view
+
+from app.nris.models.inspection import Inspection
+from app.nris.models.inspected_location import InspectedLocation
+from app.nris.models.legislation_act_section import LegislationActSection
+from app.nris.models.noncompliance_legislation import NonComplianceLegislation
+from app.nris.models.noncompliance_permit import NonCompliancePermit
+from app.nris.models.order_advisory_detail import OrderAdvisoryDetail
+from app.nris.models.order_request_detail import OrderRequestDetail
+from app.nris.models.order_stop_detail import OrderStopDetail
+from app.nris.models.order_warning_detail import OrderWarningDetail
+
+COMPLIANCE_ORDER_RESPONSE_MODEL = api.model(
+    'compliance_order', {
+        'order_no': fields.String,
+        'violation': fields.String,
+        'report_no': fields.Integer,
+        'inspector': fields.String,
+        'order_status': fields.String,
+        'due_date': fields.DateTime,
+        'overdue': fields.Boolean,
+    })
+
+COMPLIANCE_STATS_RESPONSE_MODEL = api.model(
+    'compliance_stats', {
+        'num_inspections': fields.Integer,
+        'num_advisories': fields.Integer,
+        'num_warnings': fields.Integer,
+        'num_requests': fields.Integer,
+    })
+
+COMPLIANCE_SUMMARY_RESPONSE_MODEL = api.model(
+    'compliance_summary', {
+        'last_inspection': fields.DateTime,
+        'last_inspector': fields.String,
+        'num_open_orders': fields.Integer,
+        'num_overdue_orders': fields.Integer,
+        'all_time': fields.Nested(COMPLIANCE_STATS_RESPONSE_MODEL),
+        'last_12_months': fields.Nested(COMPLIANCE_STATS_RESPONSE_MODEL),
+        'current_fiscal': fields.Nested(COMPLIANCE_STATS_RESPONSE_MODEL),
+        'orders': fields.List(fields.Nested(COMPLIANCE_ORDER_RESPONSE_MODEL)),
+    })
+
+PERIODS = ['all_time', 'last_12_months', 'current_fiscal']
+
+
+def _fiscal_year_start(now):
+    # The fiscal year starts on April 1st.
+    fiscal_year = now.year if now >= datetime(now.year, 4, 1) else now.year - 1
+    return datetime(fiscal_year, 4, 1)
+
+
+def _period_conditions(now):
+    """The all time, last 12 months and current fiscal conditions on the inspection date."""
+    last_12_months = Inspection.inspection_date > now - relativedelta(years=1)
+    current_fiscal = and_(last_12_months, Inspection.inspection_date > _fiscal_year_start(now))
+    return [None, last_12_months, current_fiscal]
+
+
+def _counts(column, conditions):
+    return [
+        func.count(column) if condition is None else func.count(column).filter(condition)
+        for condition in conditions
+    ]
+
+
+def _inspector(inspector_idir):
+    # IDIR\\USERNAME -> USERNAME
+    return inspector_idir.split('\\')[-1] if inspector_idir else None
+
+
+def get_compliance_summary(mine_no, now=None):
+    """
+    The compliance summary of a mine: inspection, advisory, warning and request counts for all
+    time, the last 12 months and the current fiscal year, the open and overdue order counts, the
+    last inspection and one row per order. Every count is computed by the database.
+    """
+    now = now or datetime.utcnow()
+    conditions = _period_conditions(now)
+    mine_inspections = Inspection.mine_no == mine_no
+
+    last_inspector = select([Inspection.inspector_idir]).where(mine_inspections).order_by(
+        Inspection.inspection_date.desc()).limit(1).correlate(None).as_scalar()
+    inspection_totals = db.session.query(
+        func.max(Inspection.inspection_date), last_inspector,
+        *_counts(Inspection.inspection_id, conditions)).filter(mine_inspections).one()
+    last_inspection, last_inspector_idir, *inspection_counts = inspection_totals
+
+    result = {
+        'last_inspection': last_inspection,
+        'last_inspector': _inspector(last_inspector_idir),
+        'num_open_orders': 0,
+        'num_overdue_orders': 0,
+        'orders': [],
+    }
+    for period, count in zip(PERIODS, inspection_counts):
+        result[period] = {
+            'num_inspections': count,
+            'num_advisories': 0,
+            'num_warnings': 0,
+            'num_requests': 0,
+        }
+
+    details = union_all(
+        select([
+            literal('num_advisories').label('detail_type'),
+            OrderAdvisoryDetail.inspected_locations_id.label('inspected_location_id')
+        ]),
+        select([
+            literal('num_warnings').label('detail_type'),
+            OrderWarningDetail.inspected_location_id.label('inspected_location_id')
+        ]),
+        select([
+            literal('num_requests').label('detail_type'),
+            OrderRequestDetail.inspected_location_id.label('inspected_location_id')
+        ])).alias('details')
+    detail_counts = db.session.query(details.c.detail_type, *_counts(
+        details.c.inspected_location_id, conditions)).select_from(details).join(
+            InspectedLocation,
+            InspectedLocation.inspected_location_id == details.c.inspected_location_id).join(
+                Inspection, Inspection.inspection_id == InspectedLocation.inspection_id).filter(
+                    mine_inspections).group_by(details.c.detail_type)
+    for detail_type, *counts in detail_counts:
+        for period, count in zip(PERIODS, counts):
+            result[period][detail_type] = count
+
+    result['orders'] = _orders(mine_inspections, now)
+    result['num_open_orders'] = sum(1 for order in result['orders'] if order['open'])
+    result['num_overdue_orders'] = sum(1 for order in result['orders'] if order['overdue'])
+    return result
+
+
+def _orders(mine_inspections, now):
+    """One row per stop order, newest inspection first, with only the fields of the summary."""
+    stop_id = OrderStopDetail.order_stop_detail_id
+    has_legislation = exists().where(NonComplianceLegislation.order_stop_detail_id == stop_id)
+    legislation_section = select([LegislationActSection.section]).select_from(
+        NonComplianceLegislation.__table__.outerjoin(
+            LegislationActSection.__table__,
+            LegislationActSection.legislation_act_section_id ==
+            NonComplianceLegislation.legislation_act_section_id)).where(
+                NonComplianceLegislation.order_stop_detail_id == stop_id).order_by(
+                    NonComplianceLegislation.noncompliance_legislation_id).limit(1).as_scalar()
+    permit_section = select([NonCompliancePermit.section_number]).where(
+        NonCompliancePermit.order_stop_detail_id == stop_id).order_by(
+            NonCompliancePermit.noncompliance_permit_id).limit(1).as_scalar()
+    # The legislation violated, or else the permit section.
+    violation = case([(has_legislation, legislation_section)], else_=permit_section)
+
+    is_open = OrderStopDetail.stop_status == 'Open'
+    overdue = and_(is_open, OrderStopDetail.completion_date != None,
+                   OrderStopDetail.completion_date < now - relativedelta(days=1))
+    order_number = func.row_number().over(
+        partition_by=Inspection.inspection_id,
+        order_by=[InspectedLocation.inspected_location_id, stop_id])
+
+    rows = db.session.query(Inspection.external_id, order_number, violation,
+                            Inspection.inspector_idir, OrderStopDetail.stop_status,
+                            OrderStopDetail.completion_date, is_open, overdue).join(
+                                InspectedLocation,
+                                InspectedLocation.inspection_id == Inspection.inspection_id).join(
+                                    OrderStopDetail, OrderStopDetail.inspected_location_id ==
+                                    InspectedLocation.inspected_location_id).filter(
+                                        mine_inspections).order_by(
+                                            Inspection.inspection_date.desc(),
+                                            Inspection.inspection_id, order_number)
+    return [{
+        'order_no': f'{external_id}-{number}',
+        'violation': violation,
+        'report_no': external_id,
+        'inspector': _inspector(inspector_idir),
+        'order_status': 'Overdue' if overdue else stop_status,
+        'due_date': completion_date,
+        'open': is_open_order,
+        'overdue': overdue,
+    } for external_id, number, violation, inspector_idir, stop_status, completion_date,
+            is_open_order, overdue in rows]
+
+
+@api.route('/inspections/summary')
+class InspectionSummaryResource(Resource):
+    @api.doc(
+        description=
+        'The compliance summary of a mine, aggregated by the database, with only the orders.',
+        params={'mine_no': 'The mine number.'})
+    @api.marshal_with(COMPLIANCE_SUMMARY_RESPONSE_MODEL, code=200)
+    @requires_role_nris_view
+    def get(self):
+        mine_no = request.args.get('mine_no', '').strip()
+        if not mine_no:
+            raise BadRequest('mine_no is required.')
+        return get_compliance_summary(mine_no)
@@ -1,10 +1,11 @@
 from flask import request
-from flask_restplus import Resource
+from flask_restplus import Resource, marshal
 
 from werkzeug.exceptions import BadRequest, NotFound, InternalServerError
 
 from app.extensions import api, db
 from app.nris.utils.access_decorators import requires_role_nris_view
+from app.nris.utils import pagination
 
 from app.nris.models.location import Location as Model, LOCATION_RESPONSE_MODEL as RESPONSE_MODEL
 
@@ -15,15 +16,35 @@ filter_fields = [
 ]
 
 
+PAGE_MODEL = pagination.page_model('location_page', RESPONSE_MODEL)
+
+
 @api.route(f'/{module_path}')
 class LocationListResource(Resource):
-    @api.doc(params={field: "Filter by exact match" for field in filter_fields})
-    @api.marshal_with(RESPONSE_MODEL, envelope='records', code=200)
+    @api.doc(
+        description=pagination.PAGINATION_DESCRIPTION,
+        params={
+            **{field: "Filter by exact match"
+               for field in filter_fields},
+            **pagination.PAGINATION_PARAMS
+        })
+    @api.response(200, 'A page at a time', PAGE_MODEL)
     @requires_role_nris_view
     def get(self):
+        projected = pagination.projection_args(request.args, RESPONSE_MODEL)
+        per_page = pagination.per_page_arg(request.args)
+
         filtered_params = {k: v.strip() for (k, v) in request.args.items() if k in filter_fields}
-        filtered_results = Model.query.filter_by(**filtered_params).all()
-        return filtered_results
+        query = Model.query.filter_by(**filtered_params)
+        if request.args.get('cursor'):
+            location_id, = pagination.decode_cursor(request.args['cursor'], 1)
+            query = query.filter(Model.location_id > location_id)
+
+        records, more = pagination.fetch_page(query.order_by(Model.location_id), per_page)
+        return {
+            'records': marshal(records, projected),
+            'next_cursor': pagination.encode_cursor([records[-1].location_id]) if more else None
+        }
 
 
 @api.route(f'/{module_path}/<int:id>')
@@ -1,6 +1,7 @@
 from app.extensions import db, sched, cache
 from app.nris.utils.apm import register_apm
 from app.nris.etl.nris_etl import import_nris_xml, clean_nris_xml_import, etl_nris_data, clean_nris_etl_data
+from app.nris.etl.nris_staging import etl_nris_data_into_staging
 from app.constants import ETL, TIMEOUT_12_HOURS, NRIS_JOB_PREFIX, NRIS_ETL_JOB
 from flask import current_app
 from random import randint
@@ -37,14 +38,23 @@ def _run_nris_etl():
 
         # Initiate Oracle ETL
         try:
-            clean_nris_xml_import()
-            import_nris_xml()
+            incremental = sched.app.config['NRIS_ETL_INCREMENTAL'] == '1'
+            swap = sched.app.config['NRIS_ETL_SWAP'] == '1'
+            if not incremental:
+                clean_nris_xml_import()
+            import_nris_xml(incremental=incremental)
             sched.app.logger.info('XML Import completed')
             # TODO: Insert update into status table
 
-            clean_nris_etl_data()
-            etl_nris_data()
-            sched.app.logger.info('NRIS ETL Completed!')
+            if swap:
+                stats = etl_nris_data_into_staging()
+            else:
+                if not incremental:
+                    clean_nris_etl_data()
+                stats = etl_nris_data(incremental=incremental)
+            sched.app.logger.info(
+                f'NRIS ETL Completed! {stats["new"]} new, {stats["changed"]} changed, '
+                f'{stats["unchanged"]} unchanged and {stats["deleted"]} deleted assessments.')
 
         except cx_Oracle.DatabaseError as e:
             sched.app.logger.error("Error establishing connection to NRIS database: " + str(e))
@@ -0,0 +1,141 @@
+import base64
+import json
+
+from dateutil import parser as date_parser
+from flask_restplus import fields
+from sqlalchemy import inspect
+from sqlalchemy.orm import noload, selectinload
+from werkzeug.exceptions import BadRequest
+
+from app.extensions import api
+
+DEFAULT_PER_PAGE = 100
+MAX_PER_PAGE = 1000
+
+PAGINATION_DESCRIPTION = (
+    f'Returns a page of at most per_page records ({DEFAULT_PER_PAGE} by default) as '
+    '{"records": [...], "next_cursor": ...}, rather than a list of every record. Pass '
+    'next_cursor back as cursor for the next page; it is null on the last page.')
+
+PAGINATION_PARAMS = {
+    'per_page': f'Records per page, {DEFAULT_PER_PAGE} by default and at most {MAX_PER_PAGE}.',
+    'cursor': 'The next_cursor of the previous page.',
+    'fields': 'Comma separated top level fields to return, all by default.',
+    'depth': 'Levels of nested records to return, 0 for none. All by default.',
+}
+
+
+def page_model(name, record_model):
+    return api.model(name, {
+        'records': fields.List(fields.Nested(record_model)),
+        'next_cursor': fields.String,
+    })
+
+
+def int_arg(args, name, default=None, minimum=0, maximum=None):
+    value = args.get(name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise BadRequest(f'{name} must be a number.')
+    if maximum is None and value < minimum:
+        raise BadRequest(f'{name} must be at least {minimum}.')
+    if maximum is not None and not minimum <= value <= maximum:
+        raise BadRequest(f'{name} must be between {minimum} and {maximum}.')
+    return value
+
+
+def parse_date(value, name):
+    try:
+        return date_parser.parse(value)
+    except (ValueError, OverflowError, TypeError):
+        raise BadRequest(f'{name} must be a date.')
+
+
+def date_arg(args, name):
+    value = args.get(name)
+    return parse_date(value, name) if value is not None else None
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values, default=str).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, length):
+    """The values of a cursor, the last of which is the id of the last record of the page."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    except (ValueError, UnicodeError):
+        raise BadRequest('cursor is not valid.')
+    if not isinstance(values, list) or len(values) != length or not isinstance(values[-1], int):
+        raise BadRequest('cursor is not valid.')
+    return values
+
+
+def per_page_arg(args):
+    return int_arg(args, 'per_page', DEFAULT_PER_PAGE, minimum=1, maximum=MAX_PER_PAGE)
+
+
+def fetch_page(query, per_page):
+    """The first `per_page` rows of the query, and whether there are more."""
+    rows = query.limit(per_page + 1).all()
+    return rows[:per_page], len(rows) > per_page
+
+
+def _nested_model(field):
+    if isinstance(field, fields.List):
+        field = field.container
+    return field.model if isinstance(field, fields.Nested) else None
+
+
+def project(model, names=None, depth=None):
+    """
+    The fields of a response model, limited to the top level `names`, and without the nested
+    records more than `depth` levels down.
+    """
+    projected = {}
+    for name, field in model.items():
+        if names is not None and name not in names:
+            continue
+        nested = _nested_model(field)
+        if nested is not None:
+            if depth == 0:
+                continue
+            nested_field = fields.Nested(
+                project(nested, depth=None if depth is None else depth - 1),
+                allow_null=getattr(field, 'allow_null', False))
+            field = fields.List(nested_field) if isinstance(field, fields.List) else nested_field
+        projected[name] = field
+    return projected
+
+
+def projection_args(args, model):
+    names = None
+    if args.get('fields'):
+        names = [name.strip() for name in args['fields'].split(',') if name.strip()]
+        unknown = set(names) - set(model.keys())
+        if unknown:
+            raise BadRequest(f'Unknown fields: {", ".join(sorted(unknown))}.')
+    return project(model, names, int_arg(args, 'depth'))
+
+
+def loader_options(model_class, projected, parent=None):
+    """
+    Loads the collections the projection renders with one query each per page, and skips the
+    ones it does not.
+    """
+    options = []
+    for relationship in inspect(model_class).relationships:
+        if not relationship.uselist or relationship.viewonly:
+            continue
+        attribute = getattr(model_class, relationship.key)
+        nested = _nested_model(projected.get(relationship.key))
+        if nested is None:
+            options.append(parent.noload(attribute) if parent else noload(attribute))
+        else:
+            load = parent.selectinload(attribute) if parent else selectinload(attribute)
+            options.append(load)
+            options.extend(loader_options(relationship.mapper.class_, nested, load))
+    return options
@@ -0,0 +1,73 @@
+import json
+import resource
+import time
+
+from app.nris.etl.nris_etl import (import_nris_xml, etl_nris_data, clean_nris_etl_data,
+                                   clean_nris_xml_import)
+from app.nris.etl.nris_xml_source import DirectoryXmlSource
+from app.scripts.nris_xml_generator import GeneratedXmlSource
+
+
+def _peak_rss_mib(who):
+    # ru_maxrss is in KiB on Linux. For the children, it is the largest of the parse workers.
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+def run_benchmark(documents=2000,
+                  seed=0,
+                  fixture_dir=None,
+                  batch_size=None,
+                  workers=None,
+                  output=None,
+                  **nesting):
+    """
+    Runs the whole NRIS ETL on a synthetic corpus against the configured database, which is
+    emptied first, and prints the time and documents per second of each stage and the peak RSS.
+
+    :param fixture_dir: reads the *.xml files of a directory, written by generate_nris_xml,
+                        instead of generating the documents as they are imported
+    :param output: a file the results are appended to as a line of JSON, to compare runs
+    """
+    source = DirectoryXmlSource(fixture_dir) if fixture_dir else GeneratedXmlSource(
+        documents, seed, **nesting)
+    clean_nris_xml_import()
+    clean_nris_etl_data()
+
+    imported = import_nris_xml(source, batch_size)
+    start = time.perf_counter()
+    stats = etl_nris_data(batch_size, workers)
+    etl_seconds = time.perf_counter() - start
+
+    stages = [
+        ('extract', imported['seconds']),
+        ('parse wait', stats['parse_seconds']),
+        ('load', stats['load_seconds']),
+        ('persist', stats['persist_seconds']),
+        ('render', stats['render_seconds']),
+        ('transform', etl_seconds),
+    ]
+    results = {
+        'documents': imported['documents'],
+        'mib': imported['bytes'] / 2**20,
+        'nesting': nesting,
+        'inspections': stats['inspections'],
+        'rows': stats['rows'],
+        'seconds': {name: seconds for name, seconds in stages},
+        'docs_per_second': imported['documents'] / (imported['seconds'] + etl_seconds),
+        'peak_rss_mib': _peak_rss_mib(resource.RUSAGE_SELF),
+        'peak_worker_rss_mib': _peak_rss_mib(resource.RUSAGE_CHILDREN),
+    }
+
+    print(f'{results["documents"]} documents, {results["mib"]:.1f} MiB, '
+          f'{results["inspections"]} inspections, {results["rows"]} rows')
+    print(f'{"stage":>10} {"seconds":>10} {"docs/s":>10}')
+    for name, seconds in stages:
+        print(f'{name:>10} {seconds:>10.2f} {results["documents"] / max(seconds, 0.001):>10.0f}')
+    print(f'{results["docs_per_second"]:.0f} docs/s end to end, '
+          f'peak RSS {results["peak_rss_mib"]:.0f} MiB, '
+          f'{results["peak_worker_rss_mib"]:.0f} MiB per parse worker')
+
+    if output:
+        with open(output, 'a') as output_file:
+            output_file.write(json.dumps(results) + '\n')
+    return results
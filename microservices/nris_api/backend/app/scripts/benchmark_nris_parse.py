@@ -0,0 +1,35 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.nris.etl.nris_etl import _batches, _parsed_batches
+from app.scripts.nris_xml_generator import generate_corpus
+
+
+def _time_parse(corpus, workers, batch_size):
+    stats = {'parse_seconds': 0.0}
+    executor = ProcessPoolExecutor(workers) if workers > 1 else None
+    start = time.perf_counter()
+    try:
+        records = sum(
+            len(batch)
+            for batch in _parsed_batches(_batches(corpus, batch_size), executor, workers, stats))
+    finally:
+        if executor:
+            executor.shutdown()
+    return records, time.perf_counter() - start
+
+
+def run_benchmark(documents=2000, max_workers=4, batch_size=500, stops=3):
+    """Prints the XML parse throughput of the ETL on a synthetic corpus, from 1 to max_workers."""
+    corpus = generate_corpus(documents, stops=stops)
+    size = sum(len(document) for document in corpus)
+    print(f'{documents} documents, {size / 2**20:.1f} MiB')
+
+    print(f'{"workers":>8} {"seconds":>10} {"docs/s":>10} {"speedup":>8}')
+    baseline = None
+    for workers in range(1, max_workers + 1):
+        records, seconds = _time_parse(corpus, workers, batch_size)
+        assert records == documents
+        baseline = baseline or seconds
+        print(f'{workers:>8} {seconds:>10.2f} {documents / seconds:>10.0f} '
+              f'{baseline / seconds:>8.2f}')
@@ -0,0 +1,137 @@
+import os
+import random
+from datetime import datetime, timedelta
+from xml.sax.saxutils import escape
+
+NAMESPACE = 'http://www.nrs.gov.bc.ca/cors/assessment'
+
+STATUSES = ['Complete', 'Complete', 'Complete', 'Incomplete', 'Deleted']
+INSPECTION_TYPES = ['Health and Safety', 'Geotechnical', 'Environmental', 'Reclamation']
+STOP_TYPES = ['Site', 'Pit', 'Mill', 'Tailings Storage Facility', 'Waste Dump']
+ORDER_STATUSES = ['Open', 'Closed']
+ACTS = ['Mines Act', 'Health, Safety and Reclamation Code for Mines in British Columbia']
+FILE_TYPES = ['Report', 'Photo', 'Map', 'Letter']
+
+
+def _element(name, value):
+    return f'<{name}>{escape(str(value))}</{name}>' if value is not None else ''
+
+
+def _date(rng, base):
+    return (base - timedelta(days=rng.randint(0, 3650))).strftime('%Y-%m-%d %H:%M')
+
+
+def _attachment(rng, base):
+    return ('<attachment>' + _element('attachment_id', rng.randint(1, 10**8)) +
+            _element('attachment_date', _date(rng, base)) +
+            _element('file_path', f'\\\\nris\\docs\\{rng.randint(1, 10**8)}.pdf') +
+            _element('file_type', rng.choice(FILE_TYPES)) +
+            _element('attachment_comment', 'Attached by the inspector.') + '</attachment>')
+
+
+def _legislation(rng, base):
+    return ('<order_legislations>' +
+            _element('estimated_incident_date', f'{_date(rng, base)[:10]} 00:00') +
+            _element('noncompliant_description', 'The berm was below the required height.') +
+            _element('parent_act', ACTS[0]) + _element('act_regulation', rng.choice(ACTS)) +
+            _element('section', f'{rng.randint(1, 10)}.{rng.randint(1, 20)}.{rng.randint(1, 5)}') +
+            _element('compliance_article_id', rng.randint(1, 500)) +
+            _element('compliance_article_comments', 'Comply by the due date.') +
+            '</order_legislations>')
+
+
+def _stop_order(rng, base, legislations, attachments):
+    return ('<stop_orders>' + _element('order_detail', 'Repair the guard on the conveyor.') +
+            _element('order_type', 'Order') + _element('order_status', rng.choice(ORDER_STATUSES)) +
+            _element('order_response_status', 'Accepted') +
+            _element('order_observation', 'The guard was missing.') +
+            _element('order_response', 'The guard was replaced.') +
+            _element('order_completion_date', _date(rng, base)) +
+            _element('order_authority_act', ACTS[0]) +
+            _element('order_authority_section', '15(4)') +
+            ''.join(_legislation(rng, base) for _ in range(legislations)) +
+            '<order_permits>' + _element('permit_section_number', rng.randint(1, 30)) +
+            _element('permit_section_title', 'Reclamation') +
+            _element('permit_section_text', 'The permittee shall reclaim the site.') +
+            '</order_permits>' + ''.join(_attachment(rng, base) for _ in range(attachments)) +
+            '</stop_orders>')
+
+
+def _stop(rng, base, orders, legislations, attachments):
+    return ('<stops>' + _element('stop_type', rng.choice(STOP_TYPES)) + '<secondary_locations>' +
+            _element('secondary_latitude', round(rng.uniform(48.3, 59.9), 6)) +
+            _element('secondary_longitude', round(rng.uniform(-139, -114), 6)) +
+            _element('secondary_location_description', 'North wall of the pit.') +
+            '<secondary_location_utm>' + _element('utm_easting', rng.randint(3 * 10**5, 7 * 10**5)) +
+            _element('utm_northing', rng.randint(5 * 10**6, 7 * 10**6)) +
+            _element('zone_number', rng.randint(7, 11)) + _element('zone_letter', 'U') +
+            '</secondary_location_utm></secondary_locations>' +
+            ''.join(_stop_order(rng, base, legislations, attachments) for _ in range(orders)) +
+            '<stop_advisories>' + _element('advisory_detail', 'Keep the road graded.') +
+            '</stop_advisories><stop_warnings>' +
+            _element('warning_detail', 'The signage is faded.') +
+            _element('warning_respond_date', _date(rng, base)) +
+            '</stop_warnings><stop_requests>' +
+            _element('request_detail', 'Send the updated dam safety review.') +
+            _element('request_response', 'Sent.') +
+            _element('request_respond_date', _date(rng, base)) + '</stop_requests>' +
+            ''.join(_attachment(rng, base) for _ in range(attachments)) + '</stops>')
+
+
+def generate_assessment(assessment_id, rng, stops=3, orders=1, legislations=1, attachments=1):
+    """One CORS_CV_ASSESSMENTS_XVW document, with `stops` stops of `orders` orders each."""
+    base = datetime(2019, 6, 1)
+    status = rng.choice(STATUSES)
+    return (f'<assessment xmlns="{NAMESPACE}">' + _element('assessment_id', assessment_id) +
+            _element('assessment_status', status) + _element('assessment_date', _date(rng, base)) +
+            _element('completion_date', _date(rng, base) if status == 'Complete' else None) +
+            '<businessArea>' + _element('business_area_name', 'EMPR') + '</businessArea>' +
+            '<location>' + _element('location_id', f'{rng.randint(100000, 1999999):07d}') +
+            '</location>' + _element('assessor', f'IDIR\\INSPECTOR{rng.randint(1, 60)}') +
+            _element('report_introduction', 'The mine was inspected.') +
+            _element('report_preamble', 'The inspector was accompanied by the manager.') +
+            _element('report_closing', 'Respond to the orders by the due dates.') +
+            _element('officer_notes', 'None.') + '<inspection>' +
+            _element('inspection_type', rng.choice(INSPECTION_TYPES)) +
+            _element('inspct_report_sent_date', _date(rng, base)) +
+            ''.join(_stop(rng, base, orders, legislations, attachments) for _ in range(stops)) +
+            '</inspection>' + ''.join(_attachment(rng, base) for _ in range(attachments)) +
+            '</assessment>')
+
+
+def generate_corpus(documents, seed=0, **nesting):
+    rng = random.Random(seed)
+    return [
+        generate_assessment(assessment_id, rng, **nesting)
+        for assessment_id in range(1, documents + 1)
+    ]
+
+
+class GeneratedXmlSource(object):
+    """
+    Generates the assessments a batch at a time, like OracleXmlSource reads them, so the ETL can
+    be run offline on a corpus of any size without holding it in memory.
+    """
+
+    def __init__(self, documents, seed=0, **nesting):
+        self.documents = documents
+        self.seed = seed
+        self.nesting = nesting
+
+    def batches(self, batch_size):
+        rng = random.Random(self.seed)
+        for start in range(1, self.documents + 1, batch_size):
+            yield [
+                generate_assessment(assessment_id, rng, **self.nesting)
+                for assessment_id in range(start, min(start + batch_size, self.documents + 1))
+            ]
+
+
+def write_corpus(path, documents, seed=0, **nesting):
+    """Writes the assessments to one .xml file each, to be read with DirectoryXmlSource."""
+    os.makedirs(path, exist_ok=True)
+    rng = random.Random(seed)
+    for assessment_id in range(1, documents + 1):
+        with open(os.path.join(path, f'{assessment_id:08d}.xml'), 'w',
+                  encoding='utf-8') as xml_file:
+            xml_file.write(generate_assessment(assessment_id, rng, **nesting))
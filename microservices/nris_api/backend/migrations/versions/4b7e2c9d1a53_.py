@@ -0,0 +1,33 @@
+"""Content hashes on nris_raw_data for the incremental ETL
+
+Revision ID: 4b7e2c9d1a53
+Revises: ce5572d67c90
+Create Date: 2019-07-02 10:14:37.512846
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '4b7e2c9d1a53'
+down_revision = 'ce5572d67c90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('nris_raw_data', sa.Column('assessment_id', sa.Integer(), nullable=True))
+    op.add_column('nris_raw_data', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.add_column('nris_raw_data',
+                  sa.Column('etl_content_hash', sa.String(length=64), nullable=True))
+    op.create_index(
+        op.f('ix_nris_raw_data_assessment_id'), 'nris_raw_data', ['assessment_id'], unique=False)
+    op.create_index(op.f('ix_inspection_external_id'), 'inspection', ['external_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_inspection_external_id'), table_name='inspection')
+    op.drop_index(op.f('ix_nris_raw_data_assessment_id'), table_name='nris_raw_data')
+    op.drop_column('nris_raw_data', 'etl_content_hash')
+    op.drop_column('nris_raw_data', 'content_hash')
+    op.drop_column('nris_raw_data', 'assessment_id')
@@ -0,0 +1,28 @@
+"""Indexes on the inspection list filters
+
+Revision ID: 8d21f6a0c3e7
+Revises: 4b7e2c9d1a53
+Create Date: 2019-07-04 15:41:09.273518
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '8d21f6a0c3e7'
+down_revision = '4b7e2c9d1a53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f('ix_inspection_mine_no'), 'inspection', ['mine_no'], unique=False)
+    op.create_index(
+        op.f('ix_inspection_inspector_idir'), 'inspection', ['inspector_idir'], unique=False)
+    op.create_index(
+        op.f('ix_inspection_inspection_date'), 'inspection', ['inspection_date'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_inspection_inspection_date'), table_name='inspection')
+    op.drop_index(op.f('ix_inspection_inspector_idir'), table_name='inspection')
+    op.drop_index(op.f('ix_inspection_mine_no'), table_name='inspection')
@@ -0,0 +1,45 @@
+"""Inspections rendered to JSON by the ETL
+
+Revision ID: e5a93b07d2f1
+Revises: 8d21f6a0c3e7
+Create Date: 2019-07-09 11:02:51.604733
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e5a93b07d2f1'
+down_revision = '8d21f6a0c3e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('inspection_json',
+    sa.Column('inspection_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('external_id', sa.Integer(), nullable=True),
+    sa.Column('mine_no', sa.String(length=64), nullable=True),
+    sa.Column('inspection_date', sa.DateTime(), nullable=True),
+    sa.Column('etl_run_id', sa.String(length=32), nullable=False),
+    sa.Column('document', sa.Text(), nullable=False),
+    sa.PrimaryKeyConstraint('inspection_id')
+    )
+    op.create_index(op.f('ix_inspection_json_external_id'), 'inspection_json', ['external_id'], unique=False)
+    op.create_index(op.f('ix_inspection_json_mine_no'), 'inspection_json', ['mine_no'], unique=False)
+    op.create_table('mine_inspection_json',
+    sa.Column('mine_no', sa.String(length=64), nullable=False),
+    sa.Column('etl_run_id', sa.String(length=32), nullable=False),
+    sa.Column('inspection_count', sa.Integer(), nullable=False),
+    sa.Column('document', sa.Text(), nullable=False),
+    sa.PrimaryKeyConstraint('mine_no')
+    )
+    # Nothing is rendered yet: the next ETL run reloads, and so renders, every assessment.
+    op.execute('update nris_raw_data set etl_content_hash = null;')
+
+
+def downgrade():
+    op.drop_table('mine_inspection_json')
+    op.drop_index(op.f('ix_inspection_json_mine_no'), table_name='inspection_json')
+    op.drop_index(op.f('ix_inspection_json_external_id'), table_name='inspection_json')
+    op.drop_table('inspection_json')
@@ -0,0 +1,214 @@
+import hashlib
+import os
+import re
+
+from app.nris.etl.nris_etl import import_nris_xml, etl_nris_data
+from app.nris.etl.nris_xml_source import DirectoryXmlSource
+from app.nris.models.inspection import Inspection
+from app.nris.models.nris_raw_data import NRISRawData
+from app.scripts.nris_xml_generator import write_corpus
+
+# Rows left behind by a delete: each query counts the rows whose parent is gone.
+ORPHAN_QUERIES = {
+    'inspected_location':
+    'select count(*) from inspected_location where inspection_id not in '
+    '(select inspection_id from inspection)',
+    'location':
+    'select count(*) from location where location_id not in '
+    '(select location_id from inspected_location where location_id is not null)',
+    'order_stop_detail':
+    'select count(*) from order_stop_detail where inspected_location_id not in '
+    '(select inspected_location_id from inspected_location)',
+    'order_advisory_detail':
+    'select count(*) from order_advisory_detail where inspected_locations_id not in '
+    '(select inspected_location_id from inspected_location)',
+    'order_warning_detail':
+    'select count(*) from order_warning_detail where inspected_location_id not in '
+    '(select inspected_location_id from inspected_location)',
+    'order_request_detail':
+    'select count(*) from order_request_detail where inspected_location_id not in '
+    '(select inspected_location_id from inspected_location)',
+    'noncompliance_legislation':
+    'select count(*) from noncompliance_legislation where order_stop_detail_id not in '
+    '(select order_stop_detail_id from order_stop_detail)',
+    'noncompliance_permit':
+    'select count(*) from noncompliance_permit where order_stop_detail_id not in '
+    '(select order_stop_detail_id from order_stop_detail)',
+    'inspection_document_xref':
+    'select count(*) from inspection_document_xref where inspection_id not in '
+    '(select inspection_id from inspection)',
+    'inspected_location_document_xref':
+    'select count(*) from inspected_location_document_xref where inspected_location_id not in '
+    '(select inspected_location_id from inspected_location)',
+    'order_stop_detail_document_xref':
+    'select count(*) from order_stop_detail_document_xref where order_stop_detail_id not in '
+    '(select order_stop_detail_id from order_stop_detail)',
+    'document':
+    'select count(*) from document where document_id not in '
+    '(select document_id from inspection_document_xref '
+    'union select document_id from inspected_location_document_xref '
+    'union select document_id from order_stop_detail_document_xref)',
+    'inspection_json':
+    'select count(*) from inspection_json where inspection_id not in '
+    '(select inspection_id from inspection)',
+}
+
+
+def _file_names(path):
+    return sorted(name for name in os.listdir(path) if name.endswith('.xml'))
+
+
+def _is_deleted(path, file_name):
+    with open(os.path.join(path, file_name), encoding='utf-8') as xml_file:
+        return '<assessment_status>Deleted</assessment_status>' in xml_file.read()
+
+
+def test_import_copies_every_document(db_session, tmp_path):
+    write_corpus(str(tmp_path), 9, seed=1, stops=1, orders=1, legislations=1, attachments=1)
+    # Text that has to be quoted in CSV, and characters longer than a byte in UTF-8.
+    special = _file_names(tmp_path)[0]
+    with open(tmp_path / special, encoding='utf-8') as xml_file:
+        document = xml_file.read()
+    with open(tmp_path / special, 'w', encoding='utf-8') as xml_file:
+        xml_file.write(
+            document.replace('The mine was inspected.', 'Inspecté, "again",\non the 2nd line.'))
+    documents = {}
+    for name in _file_names(tmp_path):
+        with open(tmp_path / name, 'rb') as xml_file:
+            documents[int(name[:-4])] = xml_file.read()
+
+    stats = import_nris_xml(DirectoryXmlSource(str(tmp_path)), batch_size=4)
+
+    assert stats['documents'] == len(documents)
+    assert stats['bytes'] == sum(len(document) for document in documents.values())
+    rows = NRISRawData.query.order_by(NRISRawData.assessment_id).all()
+    assert [row.assessment_id for row in rows] == sorted(documents)
+    for row in rows:
+        assert row.nris_data.encode('utf-8') == documents[row.assessment_id]
+        assert row.content_hash == hashlib.sha256(documents[row.assessment_id]).hexdigest()
+        assert row.etl_content_hash is None
+
+
+def _run_incremental_etl(path):
+    import_nris_xml(DirectoryXmlSource(str(path)), batch_size=7, incremental=True)
+    return etl_nris_data(batch_size=7, workers=1, incremental=True)
+
+
+def test_incremental_etl_replaces_changed_and_removed_assessments(db_session, tmp_path):
+    write_corpus(str(tmp_path), 30, seed=3, stops=2, orders=2, legislations=1, attachments=1)
+    live = [name for name in _file_names(tmp_path) if not _is_deleted(tmp_path, name)]
+
+    stats = _run_incremental_etl(tmp_path)
+    assert (stats['new'], stats['changed'], stats['unchanged'], stats['deleted']) == (30, 0, 0, 0)
+    assert stats['inspections'] == len(live)
+
+    changed, removed = live[0], live[1]
+    with open(tmp_path / changed, encoding='utf-8') as xml_file:
+        document = xml_file.read()
+    with open(tmp_path / changed, 'w', encoding='utf-8') as xml_file:
+        xml_file.write(document.replace('The mine was inspected.', 'The mine was inspected again.'))
+    os.remove(tmp_path / removed)
+
+    stats = _run_incremental_etl(tmp_path)
+
+    assert (stats['new'], stats['changed'], stats['unchanged'], stats['deleted']) == (0, 1, 28, 1)
+    assert stats['inspections'] == 1
+    assert Inspection.query.count() == len(live) - 1
+    assert Inspection.query.filter_by(external_id=int(removed[:-4])).count() == 0
+    changed_inspection = Inspection.query.filter_by(external_id=int(changed[:-4])).one()
+    assert changed_inspection.inspection_introduction == 'The mine was inspected again.'
+    for table, query in ORPHAN_QUERIES.items():
+        assert db_session.execute(query).scalar() == 0, f'orphan {table} rows'
+    assert db_session.execute('select count(*) from inspection_json').scalar() == len(live) - 1
+    assert db_session.execute(
+        'select sum(inspection_count) from mine_inspection_json').scalar() == len(live) - 1
+
+    # Nothing changed since: nothing is loaded again.
+    stats = _run_incremental_etl(tmp_path)
+    assert (stats['new'], stats['changed'], stats['unchanged'], stats['deleted']) == (0, 0, 29, 0)
+    assert stats['inspections'] == 0
+
+    # An assessment deleted in NRIS is still in the extract, with the Deleted status.
+    marked_deleted = live[2]
+    with open(tmp_path / marked_deleted, encoding='utf-8') as xml_file:
+        document = xml_file.read()
+    with open(tmp_path / marked_deleted, 'w', encoding='utf-8') as xml_file:
+        xml_file.write(
+            re.sub(r'<assessment_status>\w+</assessment_status>',
+                   '<assessment_status>Deleted</assessment_status>', document))
+
+    stats = _run_incremental_etl(tmp_path)
+
+    assert (stats['new'], stats['changed'], stats['unchanged'], stats['deleted']) == (0, 0, 28, 1)
+    assert stats['inspections'] == 0
+    assert Inspection.query.count() == len(live) - 2
+    assert Inspection.query.filter_by(external_id=int(marked_deleted[:-4])).count() == 0
+
+
+def _add_duplicate(path, file_name):
+    """Copies an assessment under a name read after every other, with another introduction."""
+    with open(path / file_name, encoding='utf-8') as xml_file:
+        document = xml_file.read()
+    with open(path / f'zz-{file_name}', 'w', encoding='utf-8') as xml_file:
+        xml_file.write(document.replace('The mine was inspected.', 'The mine was inspected twice.'))
+    return int(file_name[:-4])
+
+
+def _live_file_names(path):
+    return [name for name in _file_names(path) if not _is_deleted(path, name)]
+
+
+def test_import_keeps_the_last_document_of_a_duplicated_assessment(db_session, tmp_path):
+    write_corpus(str(tmp_path), 10, seed=3, stops=1, orders=1, legislations=1, attachments=1)
+    assessment_id = _add_duplicate(tmp_path, _live_file_names(tmp_path)[0])
+
+    stats = import_nris_xml(DirectoryXmlSource(str(tmp_path)), batch_size=4)
+
+    assert (stats['documents'], stats['duplicates']) == (11, 1)
+    rows = NRISRawData.query.filter_by(assessment_id=assessment_id).all()
+    assert len(rows) == 1
+    assert 'The mine was inspected twice.' in rows[0].nris_data
+
+
+def test_incremental_import_keeps_the_last_document_of_a_duplicated_assessment(
+        db_session, tmp_path):
+    write_corpus(str(tmp_path), 10, seed=3, stops=1, orders=1, legislations=1, attachments=1)
+    _run_incremental_etl(tmp_path)
+    assessment_id = _add_duplicate(tmp_path, _live_file_names(tmp_path)[0])
+
+    stats = _run_incremental_etl(tmp_path)
+
+    assert (stats['new'], stats['changed'], stats['unchanged'], stats['deleted']) == (0, 1, 9, 0)
+    assert NRISRawData.query.filter_by(assessment_id=assessment_id).count() == 1
+    inspection = Inspection.query.filter_by(external_id=assessment_id).one()
+    assert inspection.inspection_introduction == 'The mine was inspected twice.'
+
+
+def test_etl_draws_the_keys_of_every_batch_from_the_sequences(db_session, tmp_path):
+    write_corpus(str(tmp_path), 20, seed=7, stops=2, orders=2, legislations=2, attachments=2)
+    import_nris_xml(DirectoryXmlSource(str(tmp_path)), batch_size=3)
+    first_id = db_session.execute(
+        "select nextval(pg_get_serial_sequence('inspection', 'inspection_id'))").scalar()
+
+    stats = etl_nris_data(batch_size=3, workers=1)
+
+    inspection_ids = [
+        inspection_id for (inspection_id, ) in db_session.execute(
+            'select inspection_id from inspection order by inspection_id')
+    ]
+    assert len(inspection_ids) == stats['inspections'] > 3
+    assert inspection_ids[0] > first_id
+
+    # The sequences moved past every key drawn, so the next insert does not collide.
+    inspection = Inspection(external_id=0)
+    db_session.add(inspection)
+    db_session.flush()
+    assert inspection.inspection_id > inspection_ids[-1]
+    for table, column in [('inspected_location', 'inspected_location_id'),
+                          ('order_stop_detail', 'order_stop_detail_id'),
+                          ('document', 'document_id')]:
+        count, distinct, highest, next_id = db_session.execute(
+            f'select count(*), count(distinct {column}), max({column}), '
+            f"nextval(pg_get_serial_sequence('{table}', '{column}')) from {table}").fetchone()
+        assert count == distinct > 0
+        assert next_id > highest
@@ -0,0 +1,107 @@
+import pytest
+
+from app.nris.etl.nris_etl import import_nris_xml, etl_nris_data
+from app.nris.etl.nris_staging import (etl_nris_data_into_staging, StagingValidationError,
+                                       LIVE_SCHEMA, STAGING_SCHEMA, PREVIOUS_SCHEMA)
+from app.nris.etl.nris_xml_source import DirectoryXmlSource
+from app.scripts.nris_xml_generator import write_corpus
+from tests.etl.test_nris_etl import ORPHAN_QUERIES
+
+CATALOG_QUERIES = {
+    'indexes':
+    'select indexname, indexdef from pg_indexes where schemaname = :schema order by indexname',
+    'constraints':
+    'select t.relname, c.conname, c.contype from pg_constraint c join pg_class t on t.oid = '
+    'c.conrelid join pg_namespace n on n.oid = t.relnamespace where n.nspname = :schema '
+    'order by t.relname, c.conname',
+    'sequences':
+    "select c.relname, pg_get_serial_sequence(:schema || '.' || c.relname, a.attname) "
+    'from pg_class c join pg_namespace n on n.oid = c.relnamespace join pg_attribute a on '
+    "a.attrelid = c.oid where n.nspname = :schema and c.relkind = 'r' and a.attnum > 0 "
+    'and pg_get_serial_sequence(:schema || \'.\' || c.relname, a.attname) is not null '
+    'order by c.relname',
+}
+
+
+def _catalog(db_session):
+    return {
+        name: db_session.execute(query, {
+            'schema': LIVE_SCHEMA
+        }).fetchall()
+        for name, query in CATALOG_QUERIES.items()
+    }
+
+
+def _schemas(db_session):
+    return {
+        nspname
+        for (nspname, ) in db_session.execute(
+            'select nspname from pg_namespace where nspname in (:staging, :previous)', {
+                'staging': STAGING_SCHEMA,
+                'previous': PREVIOUS_SCHEMA
+            })
+    }
+
+
+def _live_external_ids(db_session):
+    return [
+        external_id for (external_id, ) in db_session.execute(
+            f'select external_id from {LIVE_SCHEMA}.inspection order by external_id')
+    ]
+
+
+def _load_live(db_session, path, documents):
+    write_corpus(str(path), documents, seed=11, stops=2, orders=2, legislations=1, attachments=1)
+    import_nris_xml(DirectoryXmlSource(str(path)), batch_size=7)
+    etl_nris_data(batch_size=7, workers=1)
+    return _catalog(db_session)
+
+
+def test_staging_swaps_in_the_reloaded_tables(db_session, tmp_path):
+    catalog = _load_live(db_session, tmp_path, 20)
+    external_ids = _live_external_ids(db_session)
+
+    stats = etl_nris_data_into_staging(batch_size=7, workers=1)
+
+    assert stats['inspections'] == len(external_ids)
+    assert stats['tables']['inspection'] == len(external_ids)
+    assert _live_external_ids(db_session) == external_ids
+    # The swapped in tables have the live indexes, constraints and sequences, by name.
+    assert _catalog(db_session) == catalog
+    for table, query in ORPHAN_QUERIES.items():
+        assert db_session.execute(query).scalar() == 0, f'orphan {table} rows'
+    assert _schemas(db_session) == set()
+
+    # Again, drawing the keys from the sequences handed over to the swapped in tables.
+    stats = etl_nris_data_into_staging(batch_size=7, workers=1)
+
+    assert stats['inspections'] == len(external_ids)
+    assert _live_external_ids(db_session) == external_ids
+    assert _catalog(db_session) == catalog
+
+
+def test_staging_failing_validation_leaves_the_live_tables(db_session, tmp_path):
+    _load_live(db_session, tmp_path, 20)
+    external_ids = _live_external_ids(db_session)
+    live_index_count = len(_catalog(db_session)['indexes'])
+    # An extract much smaller than the live data.
+    db_session.execute('delete from nris_raw_data where assessment_id > 3')
+
+    with pytest.raises(StagingValidationError):
+        etl_nris_data_into_staging(batch_size=7, workers=1)
+
+    assert _live_external_ids(db_session) == external_ids
+    assert len(_catalog(db_session)['indexes']) == live_index_count
+    assert PREVIOUS_SCHEMA not in _schemas(db_session)
+
+
+def test_staging_drops_the_schemas_left_by_a_failed_run(db_session, tmp_path):
+    _load_live(db_session, tmp_path, 5)
+    for schema in [STAGING_SCHEMA, PREVIOUS_SCHEMA]:
+        db_session.execute(f'create schema {schema}')
+        db_session.execute(f'create table {schema}.inspection (inspection_id integer)')
+
+    etl_nris_data_into_staging(batch_size=7, workers=1)
+
+    assert _schemas(db_session) == set()
+    assert db_session.execute(f'select count(*) from {LIVE_SCHEMA}.inspection').scalar() > 0
@@ -0,0 +1,146 @@
+import random
+
+from app.nris.etl.nris_xml_parser import parse_assessment
+from app.scripts.nris_xml_generator import generate_assessment
+
+ASSESSMENT_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<assessment xmlns="http://www.nrs.gov.bc.ca/cors/assessment">
+  <assessment_id>162409</assessment_id>
+  <assessment_status>{status}</assessment_status>
+  <assessment_date>2018-09-17 14:00</assessment_date>
+  <completion_date>2018-09-20 09:30</completion_date>
+  <businessArea><business_area_name>EMPR</business_area_name></businessArea>
+  <location><location_id>0100001</location_id></location>
+  <assessor>IDIR\\APOOLEY</assessor>
+  <inspection>
+    <inspection_type>Health and Safety</inspection_type>
+    <inspct_report_sent_date>2018-09-21 10:00</inspct_report_sent_date>
+    <stops>
+      <stop_type>Pit</stop_type>
+      <secondary_locations>
+        <secondary_latitude>49.1</secondary_latitude>
+        <secondary_longitude>-120.5</secondary_longitude>
+        <secondary_location_utm><zone_number>10</zone_number></secondary_location_utm>
+      </secondary_locations>
+      <stop_orders>
+        <order_detail>Repair the berm.</order_detail>
+        <order_status>Open</order_status>
+        <order_legislations>
+          <estimated_incident_date>2018-09-17 00:00</estimated_incident_date>
+          <parent_act>Mines Act</parent_act>
+          <section>1.2.3</section>
+          <compliance_article_id>42</compliance_article_id>
+        </order_legislations>
+        <order_permits><permit_section_number>12</permit_section_number></order_permits>
+        <attachment><attachment_id>7</attachment_id><file_type>Photo</file_type></attachment>
+      </stop_orders>
+      <stop_advisories><advisory_detail>Grade the road.</advisory_detail></stop_advisories>
+      <stop_warnings><warning_detail>Faded signs.</warning_detail></stop_warnings>
+    </stops>
+    <stops>
+      <stop_requests><request_detail>Send the review.</request_detail></stop_requests>
+    </stops>
+  </inspection>
+  <attachment><attachment_id>8</attachment_id><file_type>Report</file_type></attachment>
+</assessment>
+"""
+
+
+def test_parse_assessment():
+    record = parse_assessment(ASSESSMENT_XML.format(status='Complete'))
+
+    assert record['inspection'] == {
+        'external_id': '162409',
+        'inspection_date': '2018-09-17 14:00',
+        'completed_date': '2018-09-20 09:30',
+        'business_area': 'EMPR',
+        'mine_no': '0100001',
+        'inspector_idir': 'IDIR\\APOOLEY',
+        'inspection_report_sent_date': '2018-09-21 10:00',
+    }
+    assert record['status'] == 'Complete'
+    assert record['inspection_type'] == 'Health and Safety'
+    assert record['documents'] == [{
+        'document': {
+            'external_id': '8',
+            'document_date': None,
+            'file_name': None,
+            'comment': None
+        },
+        'document_type': 'Report'
+    }]
+
+    pit, _ = record['stops']
+    assert pit['location_type'] == 'Pit'
+    assert pit['location']['latitude'] == '49.1'
+    assert pit['location']['zone_number'] == '10'
+    assert pit['location']['utm_easting'] is None
+    assert [advisory['detail'] for advisory in pit['advisories']] == ['Grade the road.']
+    assert [warning['detail'] for warning in pit['warnings']] == ['Faded signs.']
+
+    order, = pit['orders']
+    assert order['order']['detail'] == 'Repair the berm.'
+    assert order['order']['stop_status'] == 'Open'
+    legislation, = order['legislations']
+    assert legislation['noncompliance']['estimated_incident_date'] == '2018-09-17T00:00'
+    assert legislation['section'] == '1.2.3'
+    assert legislation['compliance_article_id'] == '42'
+    assert legislation['act_regulation'] is None
+    assert [permit['section_number'] for permit in order['permits']] == ['12']
+    assert [document['document_type'] for document in order['documents']] == ['Photo']
+
+
+def test_parse_assessment_stop_without_location_or_type():
+    record = parse_assessment(ASSESSMENT_XML.format(status='Complete'))
+    other = record['stops'][1]
+
+    assert other['location'] is None
+    assert other['location_type'] is None
+    assert other['orders'] == []
+    assert [request['detail'] for request in other['requests']] == ['Send the review.']
+
+
+def test_parse_assessment_without_inspection_type():
+    xml = ASSESSMENT_XML.format(status='Complete').replace(
+        '<inspection_type>Health and Safety</inspection_type>', '')
+
+    assert parse_assessment(xml)['inspection_type'] is None
+
+
+def test_parse_deleted_assessment():
+    assert parse_assessment(ASSESSMENT_XML.format(status='Deleted')) is None
+
+
+def test_parse_incomplete_assessment_drops_completed_date():
+    record = parse_assessment(ASSESSMENT_XML.format(status='Incomplete'))
+
+    assert record['status'] == 'Incomplete'
+    assert 'completed_date' not in record['inspection']
+
+
+def test_parse_generated_assessment_nesting():
+    rng = random.Random(0)
+    documents = [
+        generate_assessment(assessment_id, rng, stops=3, orders=2, legislations=2, attachments=1)
+        for assessment_id in range(1, 51)
+    ]
+    records = [parse_assessment(document) for document in documents]
+
+    deleted = [record for record in records if record is None]
+    assert 0 < len(deleted) < len(records)
+    for assessment_id, (document, record) in enumerate(zip(documents, records), start=1):
+        if record is None:
+            assert '<assessment_status>Deleted</assessment_status>' in document
+            continue
+        assert record['inspection']['external_id'] == str(assessment_id)
+        assert ('completed_date' in record['inspection']) == (record['status'] == 'Complete')
+        assert len(record['documents']) == 1
+        assert len(record['stops']) == 3
+        for stop in record['stops']:
+            assert stop['location'] is not None
+            assert len(stop['documents']) == 1
+            assert len(stop['orders']) == 2
+            for order in stop['orders']:
+                assert len(order['legislations']) == 2
+                assert len(order['permits']) == 1
+                assert len(order['documents']) == 1
@@ -0,0 +1,107 @@
+import json
+
+from flask_restplus import marshal
+
+from app.nris.etl.nris_etl import import_nris_xml, etl_nris_data
+from app.nris.etl.nris_xml_source import DirectoryXmlSource
+from app.nris.models.inspection import Inspection, INSPECTION_RESPONSE_MODEL
+from app.nris.models.inspection_json import InspectionJson
+from app.scripts.nris_xml_generator import write_corpus
+
+
+def _load_corpus(path):
+    write_corpus(str(path), 20, seed=5, stops=2, orders=2, legislations=1, attachments=1)
+    import_nris_xml(DirectoryXmlSource(str(path)), batch_size=5)
+    return etl_nris_data(batch_size=5, workers=1)
+
+
+def _orm_json(inspection):
+    return json.loads(json.dumps(marshal(inspection, INSPECTION_RESPONSE_MODEL)))
+
+
+def test_rendered_inspections_match_the_orm_marshalling(db_session, tmp_path):
+    stats = _load_corpus(tmp_path)
+    rendered = InspectionJson.query.all()
+
+    assert len(rendered) == stats['inspections'] > 0
+    for row in rendered:
+        inspection = Inspection.query.get(row.inspection_id)
+        assert row.etl_run_id == stats['etl_run_id']
+        assert json.loads(row.document) == _orm_json(inspection)
+
+
+def test_get_inspection_returns_the_rendered_document_with_an_etag(test_client, db_session,
+                                                                   auth_headers, tmp_path):
+    stats = _load_corpus(tmp_path)
+    inspection = Inspection.query.first()
+
+    get_resp = test_client.get(
+        f'/inspections/{inspection.external_id}', headers=auth_headers['full_auth_header'])
+
+    assert get_resp.status_code == 200
+    assert get_resp.headers['ETag'] == f'"{stats["etl_run_id"]}"'
+    assert json.loads(get_resp.data.decode()) == _orm_json(inspection)
+
+    cached_resp = test_client.get(
+        f'/inspections/{inspection.external_id}',
+        headers={
+            **auth_headers['full_auth_header'], 'If-None-Match': get_resp.headers['ETag']
+        })
+
+    assert cached_resp.status_code == 304
+    assert cached_resp.data == b''
+
+
+def test_get_inspections_of_a_mine_returns_304_when_not_modified(test_client, db_session,
+                                                                auth_headers, tmp_path):
+    _load_corpus(tmp_path)
+    mine_no = Inspection.query.first().mine_no
+    url = f'/inspections?mine_no={mine_no}'
+
+    get_resp = test_client.get(url, headers=auth_headers['full_auth_header'])
+    get_data = json.loads(get_resp.data.decode())
+
+    assert get_resp.status_code == 200
+    assert len(get_data['records']) == Inspection.query.filter_by(mine_no=mine_no).count()
+    assert get_resp.headers.get('ETag')
+
+    cached_resp = test_client.get(
+        url,
+        headers={
+            **auth_headers['full_auth_header'], 'If-None-Match': get_resp.headers['ETag']
+        })
+    stale_resp = test_client.get(
+        url, headers={
+            **auth_headers['full_auth_header'], 'If-None-Match': '"stale"'
+        })
+
+    assert cached_resp.status_code == 304
+    assert stale_resp.status_code == 200
+
+
+def test_get_inspections_page_returns_304_when_not_modified(test_client, db_session,
+                                                           auth_headers, tmp_path):
+    _load_corpus(tmp_path)
+    url = '/inspections?per_page=5'
+
+    get_resp = test_client.get(url, headers=auth_headers['full_auth_header'])
+    get_data = json.loads(get_resp.data.decode())
+
+    assert get_resp.status_code == 200
+    assert len(get_data['records']) == 5
+    assert get_data['next_cursor']
+
+    cached_resp = test_client.get(
+        url,
+        headers={
+            **auth_headers['full_auth_header'], 'If-None-Match': get_resp.headers['ETag']
+        })
+    next_resp = test_client.get(
+        f'{url}&cursor={get_data["next_cursor"]}',
+        headers={
+            **auth_headers['full_auth_header'], 'If-None-Match': get_resp.headers['ETag']
+        })
+
+    assert cached_resp.status_code == 304
+    assert next_resp.status_code == 200
+    assert next_resp.headers['ETag'] != get_resp.headers['ETag']
@@ -0,0 +1,184 @@
+import json
+from datetime import datetime
+
+from app.nris.models.inspection import Inspection
+from app.nris.models.inspected_location import InspectedLocation
+from app.nris.models.legislation_act_section import LegislationActSection
+from app.nris.models.noncompliance_legislation import NonComplianceLegislation
+from app.nris.models.noncompliance_permit import NonCompliancePermit
+from app.nris.models.order_advisory_detail import OrderAdvisoryDetail
+from app.nris.models.order_request_detail import OrderRequestDetail
+from app.nris.models.order_stop_detail import OrderStopDetail
+from app.nris.models.order_warning_detail import OrderWarningDetail
+from app.nris.resources.inspection_summary import get_compliance_summary, _fiscal_year_start
+
+MINE_NO = '0100001'
+NOW = datetime(2019, 6, 15, 12, 0)
+
+
+def _inspection(db_session, external_id, inspection_date, locations, mine_no=MINE_NO):
+    inspection = Inspection(
+        external_id=external_id,
+        inspection_date=inspection_date,
+        mine_no=mine_no,
+        inspector_idir=f'IDIR\\INSPECTOR{external_id}',
+        inspected_locations=locations)
+    db_session.add(inspection)
+    db_session.flush()
+    return inspection
+
+
+def _stop(status, completion_date, sections=(), permit_sections=()):
+    return OrderStopDetail(
+        stop_status=status,
+        completion_date=completion_date,
+        noncompliance_legislations=[
+            NonComplianceLegislation(
+                regulation_legislation_act_section=LegislationActSection(section=section)
+                if section else None) for section in sections
+        ],
+        noncompliance_permits=[
+            NonCompliancePermit(section_number=section) for section in permit_sections
+        ])
+
+
+def _location(stops=(), advisories=0, warnings=0, requests=0):
+    return InspectedLocation(
+        stop_details=list(stops),
+        advisory_details=[OrderAdvisoryDetail(detail='Advisory') for _ in range(advisories)],
+        warning_details=[OrderWarningDetail(detail='Warning') for _ in range(warnings)],
+        request_details=[OrderRequestDetail(detail='Request') for _ in range(requests)])
+
+
+def _seed(db_session):
+    # This fiscal year.
+    _inspection(db_session, 300, datetime(2019, 5, 1), [
+        _location([
+            _stop('Open', datetime(2019, 6, 1), sections=['1.2.3', '4.5.6']),
+            _stop('Closed', datetime(2019, 7, 1), permit_sections=['12'])
+        ],
+                  advisories=2,
+                  warnings=1),
+        _location([_stop('Open', datetime(2019, 6, 14, 13, 0))], requests=1)
+    ])
+    # The last 12 months, but the previous fiscal year.
+    _inspection(db_session, 200, datetime(2019, 3, 15), [
+        _location([_stop('Open', None, sections=[None], permit_sections=['7'])], advisories=1)
+    ])
+    _inspection(db_session, 100, datetime(2017, 1, 1), [_location(warnings=2)])
+    _inspection(db_session, 400, datetime(2019, 6, 1), [_location(advisories=5)], mine_no='0200002')
+
+
+def test_fiscal_year_starts_on_april_first():
+    assert _fiscal_year_start(datetime(2019, 3, 31, 23, 59)) == datetime(2018, 4, 1)
+    assert _fiscal_year_start(datetime(2019, 4, 1)) == datetime(2019, 4, 1)
+    assert _fiscal_year_start(datetime(2019, 12, 31)) == datetime(2019, 4, 1)
+
+
+def test_compliance_summary_counts_by_period(db_session):
+    _seed(db_session)
+
+    summary = get_compliance_summary(MINE_NO, NOW)
+
+    assert summary['last_inspection'] == datetime(2019, 5, 1)
+    assert summary['last_inspector'] == 'INSPECTOR300'
+    assert summary['all_time'] == {
+        'num_inspections': 3,
+        'num_advisories': 3,
+        'num_warnings': 3,
+        'num_requests': 1,
+    }
+    assert summary['last_12_months'] == {
+        'num_inspections': 2,
+        'num_advisories': 3,
+        'num_warnings': 1,
+        'num_requests': 1,
+    }
+    assert summary['current_fiscal'] == {
+        'num_inspections': 1,
+        'num_advisories': 2,
+        'num_warnings': 1,
+        'num_requests': 1,
+    }
+
+
+def test_compliance_summary_counts_in_the_fiscal_year_boundary(db_session):
+    _seed(db_session)
+
+    # On March 31st the fiscal year that started the previous April is still current.
+    summary = get_compliance_summary(MINE_NO, datetime(2019, 3, 31, 12, 0))
+
+    assert summary['current_fiscal']['num_inspections'] == 2
+    assert summary['current_fiscal']['num_advisories'] == 3
+
+
+def test_compliance_summary_orders(db_session):
+    _seed(db_session)
+
+    summary = get_compliance_summary(MINE_NO, NOW)
+    orders = [{key: order[key]
+               for key in ['order_no', 'violation', 'report_no', 'inspector', 'order_status']}
+              for order in summary['orders']]
+
+    # Newest inspection first, numbered in the order of their locations and stops.
+    assert orders == [
+        {
+            'order_no': '300-1',
+            'violation': '1.2.3',
+            'report_no': 300,
+            'inspector': 'INSPECTOR300',
+            'order_status': 'Overdue'
+        },
+        {
+            'order_no': '300-2',
+            'violation': '12',
+            'report_no': 300,
+            'inspector': 'INSPECTOR300',
+            'order_status': 'Closed'
+        },
+        {
+            'order_no': '300-3',
+            'violation': None,
+            'report_no': 300,
+            'inspector': 'INSPECTOR300',
+            'order_status': 'Open'
+        },
+        # A legislation without a section is still the violation, over the permit section.
+        {
+            'order_no': '200-1',
+            'violation': None,
+            'report_no': 200,
+            'inspector': 'INSPECTOR200',
+            'order_status': 'Open'
+        },
+    ]
+    # Overdue once a day past the due date, and only while open.
+    assert [order['overdue'] for order in summary['orders']] == [True, False, False, False]
+    assert summary['num_open_orders'] == 3
+    assert summary['num_overdue_orders'] == 1
+
+
+def test_compliance_summary_of_a_mine_without_inspections(db_session):
+    summary = get_compliance_summary(MINE_NO, NOW)
+
+    assert summary['last_inspection'] is None
+    assert summary['orders'] == []
+    assert summary['all_time']['num_inspections'] == 0
+
+
+def test_get_inspection_summary(test_client, db_session, auth_headers):
+    _seed(db_session)
+
+    get_resp = test_client.get(
+        f'/inspections/summary?mine_no={MINE_NO}', headers=auth_headers['full_auth_header'])
+    get_data = json.loads(get_resp.data.decode())
+
+    assert get_resp.status_code == 200
+    assert get_data['all_time']['num_inspections'] == 3
+    assert [order['order_no'] for order in get_data['orders']] == ['300-1', '300-2', '300-3', '200-1']
+
+
+def test_get_inspection_summary_requires_a_mine_no(test_client, db_session, auth_headers):
+    get_resp = test_client.get('/inspections/summary', headers=auth_headers['full_auth_header'])
+
+    assert get_resp.status_code == 400
@@ -0,0 +1,175 @@
+import json
+from datetime import datetime
+from urllib.parse import urlencode
+
+import pytest
+from werkzeug.exceptions import BadRequest
+
+from app.nris.models.document import Document
+from app.nris.models.inspected_location import InspectedLocation
+from app.nris.models.inspection import Inspection
+from app.nris.models.location import Location
+from app.nris.models.order_advisory_detail import OrderAdvisoryDetail
+from app.nris.utils.pagination import int_arg, MAX_PER_PAGE
+
+
+def _get(test_client, auth_headers, path, **args):
+    get_resp = test_client.get(
+        f'{path}?{urlencode(args)}', headers=auth_headers['full_auth_header'])
+    return get_resp.status_code, json.loads(get_resp.data.decode())
+
+
+def _all_pages(test_client, auth_headers, path, **args):
+    pages = []
+    cursor = None
+    while True:
+        status_code, page = _get(
+            test_client, auth_headers, path, **args, **({'cursor': cursor} if cursor else {}))
+        assert status_code == 200
+        pages.append(page['records'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return pages
+
+
+def _seed_inspections(db_session):
+    # Two on the same day, to page through the tie on the id, and one without a date.
+    dates = [
+        datetime(2019, 1, 1),
+        datetime(2019, 3, 1),
+        datetime(2019, 3, 1),
+        datetime(2019, 5, 1), None
+    ]
+    for external_id, inspection_date in enumerate(dates, start=1):
+        db_session.add(
+            Inspection(
+                external_id=external_id,
+                inspection_date=inspection_date,
+                mine_no='0100001',
+                inspected_locations=[
+                    InspectedLocation(
+                        location=Location(description=f'Location {external_id}'),
+                        advisory_details=[OrderAdvisoryDetail(detail='Advisory')])
+                ]))
+    db_session.flush()
+
+
+def test_get_inspections_pages_newest_first(test_client, db_session, auth_headers):
+    _seed_inspections(db_session)
+
+    pages = _all_pages(test_client, auth_headers, '/inspections', per_page=2)
+
+    assert [[record['external_id'] for record in page] for page in pages] == [[4, 3], [2, 1], [5]]
+
+
+def test_get_inspections_by_date(test_client, db_session, auth_headers):
+    _seed_inspections(db_session)
+
+    pages = _all_pages(
+        test_client,
+        auth_headers,
+        '/inspections',
+        per_page=1,
+        inspection_date_from='2019-02-01',
+        inspection_date_to='2019-03-01')
+
+    assert [[record['external_id'] for record in page] for page in pages] == [[3], [2]]
+
+
+def test_get_inspections_with_fields(test_client, db_session, auth_headers):
+    _seed_inspections(db_session)
+
+    status_code, page = _get(
+        test_client, auth_headers, '/inspections', fields='external_id,mine_no')
+
+    assert status_code == 200
+    assert len(page['records']) == 5
+    assert all(set(record) == {'external_id', 'mine_no'} for record in page['records'])
+
+
+def test_get_inspections_with_depth(test_client, db_session, auth_headers):
+    _seed_inspections(db_session)
+
+    _, shallow = _get(test_client, auth_headers, '/inspections', depth=0)
+    _, one_level = _get(test_client, auth_headers, '/inspections', depth=1)
+    _, full = _get(test_client, auth_headers, '/inspections')
+
+    assert 'inspected_locations' not in shallow['records'][0]
+    assert 'documents' not in shallow['records'][0]
+    assert set(one_level['records'][0]['inspected_locations'][0]) == {'inspected_location_type'}
+    full_location = full['records'][0]['inspected_locations'][0]
+    assert full_location['location']['description'] == 'Location 4'
+    assert len(full_location['advisory_details']) == 1
+
+
+@pytest.mark.parametrize('args', [{
+    'per_page': 0
+}, {
+    'per_page': MAX_PER_PAGE + 1
+}, {
+    'per_page': 'many'
+}, {
+    'depth': -1
+}, {
+    'fields': 'external_id,unknown'
+}, {
+    'cursor': 'not-a-cursor'
+}, {
+    'inspection_date_from': 'yesterday-ish'
+}])
+def test_get_inspections_with_invalid_args(test_client, db_session, auth_headers, args):
+    status_code, _ = _get(test_client, auth_headers, '/inspections', **args)
+
+    assert status_code == 400
+
+
+def test_get_inspections_at_most_per_page(test_client, db_session, auth_headers):
+    _seed_inspections(db_session)
+
+    status_code, page = _get(test_client, auth_headers, '/inspections', per_page=MAX_PER_PAGE)
+
+    assert status_code == 200
+    assert len(page['records']) == 5
+    assert page['next_cursor'] is None
+
+
+def test_get_documents_pages_by_id(test_client, db_session, auth_headers):
+    for external_id in range(1, 6):
+        db_session.add(
+            Document(
+                external_id=external_id,
+                document_date=datetime(2019, external_id, 1),
+                file_name=f'{external_id}.pdf'))
+    db_session.flush()
+
+    pages = _all_pages(test_client, auth_headers, '/documents', per_page=2)
+    dated = _all_pages(
+        test_client, auth_headers, '/documents', per_page=2, document_date_from='2019-02-01',
+        document_date_to='2019-04-01')
+
+    assert [[record['external_id'] for record in page] for page in pages] == [[1, 2], [3, 4], [5]]
+    assert [[record['external_id'] for record in page] for page in dated] == [[2, 3], [4]]
+
+
+def test_get_locations_pages_by_id(test_client, db_session, auth_headers):
+    for index in range(1, 6):
+        db_session.add(Location(description=f'Location {index}'))
+    db_session.flush()
+
+    pages = _all_pages(test_client, auth_headers, '/locations', per_page=3, fields='description')
+
+    assert pages == [[{
+        'description': f'Location {index}'
+    } for index in range(1, 4)], [{
+        'description': f'Location {index}'
+    } for index in range(4, 6)]]
+
+
+def test_int_arg_bounds():
+    assert int_arg({}, 'depth', default=3) == 3
+    assert int_arg({'depth': '2'}, 'depth') == 2
+
+    with pytest.raises(BadRequest, match='depth must be at least 0.'):
+        int_arg({'depth': '-1'}, 'depth')
+    with pytest.raises(BadRequest, match='per_page must be between 1 and 10.'):
+        int_arg({'per_page': '11'}, 'per_page', minimum=1, maximum=10)
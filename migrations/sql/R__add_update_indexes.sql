@@ -9,11 +9,17 @@ CREATE INDEX IF NOT EXISTS application_mine_guid_fkey_idx ON application(mine_gu
 
 /* Mine */
 CREATE INDEX IF NOT EXISTS active_mine_mine_region_fkey_idx ON mine(mine_region, deleted_ind) WHERE (deleted_ind = false);
-CREATE INDEX IF NOT EXISTS mine_mine_name_search_idx ON mine USING gist (mine_name gist_trgm_ops);
-CREATE INDEX IF NOT EXISTS mine_mine_no_search_idx ON mine USING gist (mine_no gist_trgm_ops);
+DROP INDEX IF EXISTS mine_mine_name_search_idx;
+DROP INDEX IF EXISTS mine_mine_no_search_idx;
+CREATE INDEX IF NOT EXISTS mine_mine_name_trgm_idx ON mine USING gin (mine_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS mine_mine_no_trgm_idx ON mine USING gin (mine_no gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS active_mine_mine_name_keyset_idx ON mine(mine_name, mine_guid) WHERE (deleted_ind = false);
+CREATE INDEX IF NOT EXISTS active_mine_mine_no_keyset_idx ON mine(mine_no, mine_guid) WHERE (deleted_ind = false);
+DROP INDEX IF EXISTS active_mine_mine_region_keyset_idx;
 
 /* Mine document */
-CREATE INDEX IF NOT EXISTS mine_document_document_name_search_idx on mine_document USING gist (document_name gist_trgm_ops);
+DROP INDEX IF EXISTS mine_document_document_name_search_idx;
+CREATE INDEX IF NOT EXISTS mine_document_document_name_trgm_idx ON mine_document USING gin (document_name gin_trgm_ops);
 
 /* Mine expected document */
 CREATE INDEX IF NOT EXISTS active_mine_expected_document_mine_guid_fkey_idx ON mine_expected_document(mine_guid, active_ind) WHERE (active_ind = true);
@@ -22,6 +28,7 @@ CREATE INDEX IF NOT EXISTS active_mine_expected_document_req_document_guid_fkey_
 /* Mine Location */
 DROP INDEX IF EXISTS mine_location_lat_long_idx;
 DROP INDEX IF EXISTS mine_location_geom_idx;
+CREATE INDEX IF NOT EXISTS mine_location_point_idx ON mine_location USING gist (ST_SetSRID(ST_MakePoint(CAST(longitude AS FLOAT), CAST(latitude AS FLOAT)), 4326));
 
 /* Mine party appt */
 DROP INDEX IF EXISTS mine_party_appt_guid_idx;
@@ -41,15 +48,27 @@ CREATE INDEX IF NOT EXISTS active_mine_type_mine_tenure_type_code_fkey_idx ON mi
 DROP INDEX IF EXISTS active_party_sub_division_code_fkey_idx;
 DROP INDEX IF EXISTS active_party_address_type_code_fkey_idx;
 CREATE INDEX IF NOT EXISTS active_party_party_type_code_fkey_idx ON party(party_type_code, deleted_ind) WHERE (deleted_ind = false);
-CREATE INDEX IF NOT EXISTS party_email_search_idx ON party USING gist (email gist_trgm_ops);
-CREATE INDEX IF NOT EXISTS party_first_name_search_idx ON party USING gist (first_name gist_trgm_ops);
-CREATE INDEX IF NOT EXISTS party_party_name_search_idx ON party USING gist (party_name gist_trgm_ops);
-CREATE INDEX IF NOT EXISTS party_phone_no_search_idx ON party USING gist (phone_no gist_trgm_ops);
+DROP INDEX IF EXISTS party_email_search_idx;
+DROP INDEX IF EXISTS party_first_name_search_idx;
+DROP INDEX IF EXISTS party_party_name_search_idx;
+DROP INDEX IF EXISTS party_phone_no_search_idx;
+CREATE INDEX IF NOT EXISTS party_email_trgm_idx ON party USING gin (email gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS party_first_name_trgm_idx ON party USING gin (first_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS party_party_name_trgm_idx ON party USING gin (party_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS party_phone_no_trgm_idx ON party USING gin (phone_no gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS active_party_party_name_keyset_idx ON party(party_name, party_guid) WHERE (deleted_ind = false);
 
 /* Permit */
 CREATE INDEX IF NOT EXISTS permit_permit_status_code_fkey_idx ON permit(permit_status_code);
+CREATE INDEX IF NOT EXISTS permit_permit_no_trgm_idx ON permit USING gin (permit_no gin_trgm_ops);
 
 /* Permit amendment */
 CREATE INDEX IF NOT EXISTS active_permit_amendment_permit_fkey_idx ON permit_amendment(permit_id, deleted_ind) WHERE (deleted_ind = false);
 CREATE INDEX IF NOT EXISTS active_permit_amendment_permit_amendment_status_code_fkey_idx ON permit_amendment(permit_amendment_status_code, deleted_ind) WHERE (deleted_ind = false);
 CREATE INDEX IF NOT EXISTS active_permit_amendment_permit_amendment_type_code_fkey_idx ON permit_amendment(permit_amendment_type_code, deleted_ind) WHERE (deleted_ind = false);
+
+/* Permit amendment document */
+CREATE INDEX IF NOT EXISTS permit_amendment_document_document_name_trgm_idx ON permit_amendment_document USING gin (document_name gin_trgm_ops);
+
+/* Variance */
+CREATE INDEX IF NOT EXISTS variance_received_date_keyset_idx ON variance(received_date, variance_guid);
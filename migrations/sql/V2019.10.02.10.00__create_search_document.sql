@@ -0,0 +1,46 @@
+CREATE TABLE IF NOT EXISTS search_document
+(
+    search_document_type varchar(20) NOT NULL,
+    search_document_guid uuid NOT NULL,
+    display_value varchar NOT NULL,
+    search_text varchar NOT NULL,
+    search_vector tsvector NOT NULL,
+    mine_guid uuid,
+    deleted_ind boolean NOT NULL DEFAULT false,
+    update_timestamp timestamp with time zone NOT NULL DEFAULT current_timestamp,
+
+    PRIMARY KEY (search_document_type, search_document_guid)
+);
+
+ALTER TABLE search_document OWNER TO mds;
+
+COMMENT ON TABLE search_document IS 'Denormalized copy of every searchable record (mines, contacts, permits and documents), kept up to date by the API on insert/update/delete so that global search runs one indexed query. Rebuild with the rebuild_search_documents command.';
+
+CREATE INDEX IF NOT EXISTS search_document_search_text_trgm_idx ON search_document USING gin (search_text gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS search_document_search_vector_idx ON search_document USING gin (search_vector);
+CREATE INDEX IF NOT EXISTS search_document_mine_guid_idx ON search_document(mine_guid);
+
+INSERT INTO search_document (search_document_type, search_document_guid, display_value, search_text, search_vector, mine_guid, deleted_ind)
+SELECT 'mine', mine_guid, mine_name, concat_ws(' ', mine_name, mine_no), to_tsvector('simple', concat_ws(' ', mine_name, mine_no)), mine_guid, deleted_ind
+FROM mine
+ON CONFLICT DO NOTHING;
+
+INSERT INTO search_document (search_document_type, search_document_guid, display_value, search_text, search_vector, mine_guid, deleted_ind)
+SELECT 'party', party_guid, concat(first_name, ' ', party_name), concat_ws(' ', first_name, party_name, email, phone_no), to_tsvector('simple', concat_ws(' ', first_name, party_name, email, phone_no)), null, deleted_ind
+FROM party
+ON CONFLICT DO NOTHING;
+
+INSERT INTO search_document (search_document_type, search_document_guid, display_value, search_text, search_vector, mine_guid, deleted_ind)
+SELECT 'permit', permit_guid, permit_no, permit_no, to_tsvector('simple', permit_no), mine_guid, false
+FROM permit
+ON CONFLICT DO NOTHING;
+
+INSERT INTO search_document (search_document_type, search_document_guid, display_value, search_text, search_vector, mine_guid, deleted_ind)
+SELECT 'mine_documents', mine_document_guid, document_name, document_name, to_tsvector('simple', document_name), mine_guid, NOT active_ind
+FROM mine_document
+ON CONFLICT DO NOTHING;
+
+INSERT INTO search_document (search_document_type, search_document_guid, display_value, search_text, search_vector, mine_guid, deleted_ind)
+SELECT 'permit_documents', permit_amendment_document_guid, document_name, document_name, to_tsvector('simple', document_name), mine_guid, NOT active_ind
+FROM permit_amendment_document
+ON CONFLICT DO NOTHING;
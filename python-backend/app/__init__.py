@@ -23,9 +23,15 @@ from app.api.variances.namespace.variances import api as variances_api
 from app.commands import register_commands
 from app.config import Config
 from app.extensions import db, jwt, api, cache, sched, apm
+from app.api.utils.search_executor import search_executor
+from app.api.utils.sql_profiler import sql_profiler
+from app.api.utils.service_client import service_client
+from app.api.utils.access_decorators import requires_role_mine_admin
 
 from app.scheduled_jobs.ETL_jobs import _schedule_ETL_jobs
 from app.scheduled_jobs.IDIR_jobs import _schedule_IDIR_jobs
+from app.scheduled_jobs.NRIS_jobs import _schedule_NRIS_jobs
+from app.scheduled_jobs.mine_map_jobs import _schedule_mine_map_jobs
 
 
 def create_app(test_config=None):
@@ -61,6 +67,9 @@ def register_extensions(app):
     db.init_app(app)
     jwt.init_app(app)
     sched.init_app(app)
+    search_executor.init_app(app)
+    sql_profiler.init_app(app)
+    service_client.init_app(app)
 
     CORS(app)
     Compress(app)
@@ -74,6 +83,8 @@ def register_scheduled_jobs(app):
             sched.start()
             _schedule_IDIR_jobs(app)
             _schedule_ETL_jobs(app)
+            _schedule_NRIS_jobs(app)
+            _schedule_mine_map_jobs(app)
 
 
 def register_routes(app):
@@ -96,6 +107,18 @@ def register_routes(app):
         def get(self):
             return {'success': 'true'}
 
+    # Local metrics endpoint: SQL statements and time per endpoint, the search executor and the
+    # calls to other services
+    @api.route('/metrics')
+    class Metrics(Resource):
+        @requires_role_mine_admin
+        def get(self):
+            return {
+                'endpoints': sql_profiler.metrics(),
+                'search_executor': search_executor.metrics(),
+                'services': service_client.metrics()
+            }
+
     @api.errorhandler(AuthError)
     def jwt_oidc_auth_error_handler(error):
         current_app.logger.error(str(error))
@@ -323,11 +323,13 @@ NRIS_MAJOR_MINE_LIST = "major_mine_list"
 NRIS_JOB_PREFIX = "nris_sched_job_"
 NRIS_TOKEN = 'nris:token'
 def NRIS_COMPLIANCE_DATA(mine_no): return f'mine:{mine_no}:api-compliance-data'
+def NRIS_COMPLIANCE_REFRESH_LOCK(mine_no): return f'mine:{mine_no}:api-compliance-data-refresh'
 def FILE_UPLOAD_SIZE(document_guid): return f'document-manager:{document_guid}:file-size'
 def FILE_UPLOAD_OFFSET(document_guid): return f'document-manager:{document_guid}:offset'
 def FILE_UPLOAD_PATH(document_guid): return f'document-manager:{document_guid}:file-path'
 def DOWNLOAD_TOKEN(token_guid): return f'document-manager:download-token:{token_guid}'
 ETL = 'etl-jobs:running'
+def MINESPACE_USER_MINE_ACCESS(user_id): return f'minespace-user:{user_id}:mine-access'
 
 #Cache Timeouts
 TIMEOUT_5_MINUTES = 300
@@ -337,8 +339,18 @@ TIMEOUT_12_HOURS = 43140
 
 #Redis Map Cache
 MINE_MAP_CACHE = "MINE_MAP_CACHE"
+def MINE_MAP_ENCODED_CACHE(encoding): return f'{MINE_MAP_CACHE}:{encoding}'
+MINE_MAP_VERSION = f'{MINE_MAP_CACHE}:version'
+def MINE_MAP_CHANGES(version): return f'{MINE_MAP_CACHE}:changes:{version}'
+MINE_MAP_REBUILD_LOCK = f'{MINE_MAP_CACHE}:rebuild-lock'
+MINE_MAP_BUILD_LOCK = f'{MINE_MAP_CACHE}:build-lock'
+# Clients further behind than this reload the whole map instead of a delta.
+MINE_MAP_MAX_DELTA_VERSIONS = 500
+def MINE_MAP_TILE(z, x, y): return f'{MINE_MAP_CACHE}:tile:{z}:{x}:{y}'
 
 #Document Manager constants
 TUS_API_VERSION = '1.0.0'
 TUS_API_SUPPORTED_VERSIONS = '1.0.0'
+TUS_API_EXTENSIONS = 'creation,checksum'
+TUS_CHECKSUM_ALGORITHMS = ('sha1', 'sha256', 'md5')
 FORBIDDEN_FILETYPES = ('js', 'php', 'pl', 'py', 'rb', 'sh', 'so', 'exe', 'dll')
@@ -9,7 +9,12 @@ from flask_restplus import Resource, reqparse
 from ..models.document_manager import DocumentManager
 from app.extensions import api, cache
 from ...utils.access_decorators import requires_any_of, MINE_EDIT, VIEW_ALL, MINESPACE_PROPONENT, EDIT_PARTY, EDIT_PERMIT, EDIT_DO, EDIT_VARIANCE
-from app.api.constants import FILE_UPLOAD_SIZE, FILE_UPLOAD_OFFSET, FILE_UPLOAD_PATH, DOWNLOAD_TOKEN, TIMEOUT_24_HOURS, TUS_API_VERSION, TUS_API_SUPPORTED_VERSIONS, FORBIDDEN_FILETYPES
+from app.api.constants import FILE_UPLOAD_SIZE, FILE_UPLOAD_OFFSET, FILE_UPLOAD_PATH, DOWNLOAD_TOKEN, TIMEOUT_24_HOURS, TUS_API_VERSION, TUS_API_SUPPORTED_VERSIONS, TUS_API_EXTENSIONS, TUS_CHECKSUM_ALGORITHMS, FORBIDDEN_FILETYPES
+from app.api.utils.upload import parse_upload_checksum, write_chunk
+
+
+# The status the TUS checksum extension answers a chunk that does not match its checksum with.
+CHECKSUM_MISMATCH = 460
 
 
 class DocumentManagerResource(Resource):
@@ -115,12 +120,33 @@ class DocumentManagerResource(Resource):
             raise RequestEntityTooLarge(
                 'The uploaded chunk would put the file above its declared file size.')
 
+        checksum = request.headers.get('Upload-Checksum')
+        if checksum is not None:
+            try:
+                checksum = parse_upload_checksum(checksum)
+            except ValueError as e:
+                raise BadRequest(str(e))
+
+        # The chunk is streamed to the file rather than read into memory with request.data.
         try:
-            with open(file_path, "r+b") as f:
-                f.seek(file_offset)
-                f.write(request.data)
+            written, matches = write_chunk(request.stream, file_path, file_offset, chunk_size,
+                                           checksum,
+                                           int(current_app.config['DOCUMENT_UPLOAD_BLOCK_SIZE']))
         except IOError as e:
             raise InternalServerError('Unable to write to file')
+        if not matches:
+            # The offset is left where it was, so the client sends the chunk again.
+            response = make_response(
+                jsonify(message='The uploaded chunk does not match its Upload-Checksum.'),
+                CHECKSUM_MISMATCH)
+            response.headers['Tus-Resumable'] = TUS_API_VERSION
+            response.headers['Tus-Version'] = TUS_API_SUPPORTED_VERSIONS
+            response.headers['Upload-Offset'] = file_offset
+            response.headers[
+                'Access-Control-Expose-Headers'] = "Tus-Resumable,Tus-Version,Upload-Offset"
+            return response
+        # A chunk cut short is kept, and the client resumes from where it ended.
+        new_offset = file_offset + written
 
         if new_offset == file_size:
             # File transfer complete.
@@ -192,11 +218,12 @@ class DocumentManagerResource(Resource):
             # CORS request, return 200
             return response
 
-        response.headers['Tus-Resumable'] = self.tus_api_version
-        response.headers['Tus-Version'] = self.tus_api_supported_versions
-        response.headers['Tus-Extension'] = "creation"
-        response.headers['Tus-Max-Size'] = self.max_file_size
+        response.headers['Tus-Resumable'] = TUS_API_VERSION
+        response.headers['Tus-Version'] = TUS_API_SUPPORTED_VERSIONS
+        response.headers['Tus-Extension'] = TUS_API_EXTENSIONS
+        response.headers['Tus-Checksum-Algorithm'] = ','.join(TUS_CHECKSUM_ALGORITHMS)
+        response.headers['Tus-Max-Size'] = current_app.config["MAX_CONTENT_LENGTH"]
         response.headers[
-            'Access-Control-Expose-Headers'] = "Tus-Resumable,Tus-Version,Tus-Extension,Tus-Max-Size"
+            'Access-Control-Expose-Headers'] = "Tus-Resumable,Tus-Version,Tus-Extension,Tus-Checksum-Algorithm,Tus-Max-Size"
         response.status_code = 204
         return response
@@ -1,7 +1,6 @@
 import decimal
 import uuid
 import base64
-import requests
 import json
 
 from datetime import datetime
@@ -20,6 +19,7 @@ from ...mines.models.mine_document import MineDocument
 from app.extensions import api, db
 from ....utils.access_decorators import requires_any_of, MINE_EDIT, MINESPACE_PROPONENT
 from ....utils.resources_mixins import UserMixin, ErrorMixin
+from ....utils.service_client import service_client
 
 
 class ExpectedDocumentUploadResource(Resource, UserMixin, ErrorMixin):
@@ -54,7 +54,7 @@ class ExpectedDocumentUploadResource(Resource, UserMixin, ErrorMixin):
         }
         document_manager_URL = f'{current_app.config["DOCUMENT_MANAGER_URL"]}/document-manager'
 
-        resp = requests.post(
+        resp = service_client.post(
             url=document_manager_URL,
             headers={key: value
                      for (key, value) in request.headers if key != 'Host'},
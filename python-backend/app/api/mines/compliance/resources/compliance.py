@@ -1,18 +1,19 @@
-import requests
-from datetime import datetime
-from flask_restplus import Resource, fields
-from flask import request, current_app
+import json
+from concurrent.futures import as_completed
+from flask_restplus import Resource, fields, marshal
+from flask import request, current_app, Response, stream_with_context
 from werkzeug.exceptions import BadRequest, NotFound
 
 from app.extensions import api
 from ....utils.access_decorators import requires_role_view_all
 from ....utils.resources_mixins import UserMixin, ErrorMixin
-from ....constants import NRIS_COMPLIANCE_DATA, TIMEOUT_60_MINUTES
 from app.api.services import NRIS_API_service
-from app.extensions import cache
 
 from app.api.mines.mine.models.mine import Mine
 
+# Mines per batch summary request
+MAX_BATCH_MINES = 100
+
 
 class DateTime(fields.Raw):
     def format(self, value):
@@ -63,21 +64,76 @@ class MineComplianceSummaryResource(Resource, UserMixin, ErrorMixin):
         mine = Mine.find_by_mine_no_or_guid(mine_no)
         if not mine:
             raise NotFound("No mine record in CORE.")
+        return NRIS_API_service.get_compliance_summary(mine.mine_no,
+                                                       request.headers.get('Authorization'))
+
+
+class MineComplianceSummaryListResource(Resource, UserMixin, ErrorMixin):
+    @api.doc(
+        description=
+        'Streams the compliance summaries of many mines as newline delimited JSON, one '
+        '{"mine_no", "summary"} or {"mine_no", "error"} object per line. Cached summaries come '
+        'first, the others as NRIS returns them.',
+        params={
+            'mine_no':
+            f'Mine numbers, repeated or comma separated, at most {MAX_BATCH_MINES}.'
+        })
+    @requires_role_view_all
+    def get(self):
+        mine_nos = list(
+            dict.fromkeys(mine_no.strip() for value in request.args.getlist('mine_no')
+                          for mine_no in value.split(',') if mine_no.strip()))
+        if not mine_nos:
+            raise BadRequest('At least one mine_no is required.')
+        if len(mine_nos) > MAX_BATCH_MINES:
+            raise BadRequest(f'At most {MAX_BATCH_MINES} mines can be requested at once.')
+
+        known_mine_nos = {
+            mine_no
+            for (mine_no, ) in Mine.query.filter(Mine.mine_no.in_(mine_nos)).with_entities(
+                Mine.mine_no)
+        }
+        auth_token = request.headers.get('Authorization')
+        cached = dict(
+            zip(mine_nos, NRIS_API_service.get_cached_compliance_summaries(mine_nos, auth_token)))
+
+        app = current_app._get_current_object()
+        misses = [
+            mine_no for mine_no in mine_nos
+            if mine_no in known_mine_nos and cached[mine_no] is None
+        ]
+        # Misses are submitted before the first line is sent, so they run while the hits stream.
+        futures = {
+            NRIS_API_service.compliance_executor(app).submit(self._fetch_summary, app, mine_no,
+                                                             auth_token): mine_no
+            for mine_no in misses
+        }
+
+        def generate():
+            for mine_no in mine_nos:
+                if mine_no not in known_mine_nos:
+                    yield self._line(mine_no, error='No mine record in CORE.')
+                elif cached[mine_no] is not None:
+                    yield self._line(mine_no, summary=cached[mine_no])
+            for future in as_completed(futures):
+                mine_no = futures[future]
+                try:
+                    yield self._line(mine_no, summary=future.result())
+                except Exception as e:
+                    yield self._line(mine_no, error=f'NRIS is unavailable: {str(e)}')
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    @staticmethod
+    def _fetch_summary(app, mine_no, auth_token):
+        with app.app_context():
+            return NRIS_API_service.get_compliance_summary(mine_no, auth_token)
 
-        result = cache.get(NRIS_COMPLIANCE_DATA(mine.mine_no))
-        if result is None:
-            try:
-                raw_data = NRIS_API_service._get_NRIS_data_by_mine(
-                    request.headers.get('Authorization'), mine.mine_no)
-            except requests.exceptions.Timeout:
-                current_app.logger.error(f'NRIS_API Connection Timeout <mine_no={mine.mine_no}>')
-                raise
-            except requests.exceptions.HTTPError as e:
-                current_app.logger.error(
-                    f'NRIS_API Connection HTTPError <mine_no={mine.mine_no}>, {str(e)}')
-                raise
-
-            result = NRIS_API_service._process_NRIS_data(raw_data)
-            if len(result['orders']) > 0:
-                cache.set(NRIS_COMPLIANCE_DATA(mine.mine_no), result, timeout=TIMEOUT_60_MINUTES)
-        return result
\ No newline at end of file
+    @staticmethod
+    def _line(mine_no, summary=None, error=None):
+        line = {'mine_no': mine_no}
+        if error:
+            line['error'] = error
+        else:
+            line['summary'] = marshal(summary, MINE_COMPLIANCE_RESPONSE_MODEL)
+        return json.dumps(line) + '\n'
@@ -1,7 +1,6 @@
 import decimal
 import uuid
 import base64
-import requests
 import json
 
 from datetime import datetime
@@ -22,6 +21,7 @@ from app.api.utils.custom_reqparser import CustomReqparser
 from ....utils.access_decorators import requires_role_edit_do
 from ....utils.resources_mixins import UserMixin, ErrorMixin
 from ....utils.url import get_document_manager_svc_url
+from ....utils.service_client import service_client
 
 
 class MineIncidentDocumentListResource(Resource, UserMixin):
@@ -46,7 +46,7 @@ class MineIncidentDocumentListResource(Resource, UserMixin):
 
         document_manager_URL = f'{current_app.config["DOCUMENT_MANAGER_URL"]}/document-manager'
 
-        resp = requests.post(
+        resp = service_client.post(
             url=document_manager_URL,
             headers={key: value
                      for (key, value) in request.headers if key != 'Host'},
@@ -1,6 +1,7 @@
 from datetime import datetime
 import uuid
 
+from sqlalchemy import func, cast, Float
 from sqlalchemy.dialects.postgresql import UUID
 from ....utils.models_mixins import AuditMixin, Base
 from app.extensions import db
@@ -29,6 +30,61 @@ class MineMapViewLocation(Base):
             'mine_name': str(self.mine_name),
         }
 
+    @classmethod
+    def map_rows(cls, mine_guids=None):
+        """
+        Returns the located mines as plain (mine_guid, mine_name, mine_no, latitude, longitude)
+        tuples, without building the ORM objects.
+
+        The map is one cache shared by every user and is rebuilt outside of requests, so the
+        query is not bound to the current user.
+        """
+        query = cls.query.unbound_unsafe().with_entities(
+            cls.mine_guid, cls.mine_name, cls.mine_no, cls.latitude,
+            cls.longitude).filter(cls.latitude != None)
+        if mine_guids is not None:
+            query = query.filter(cls.mine_guid.in_(mine_guids))
+        return query.all()
+
+    @classmethod
+    def location_point(cls):
+        """
+        The mine location as a WGS 84 point. mine_location has a GiST index on this same
+        expression (the geom column is not kept up to date by the API).
+        """
+        return func.ST_SetSRID(
+            func.ST_MakePoint(cast(cls.longitude, Float), cast(cls.latitude, Float)), 4326)
+
+    @classmethod
+    def _in_bounds(cls, west, south, east, north):
+        return cls.location_point().op('&&')(func.ST_MakeEnvelope(west, south, east, north, 4326))
+
+    @classmethod
+    def map_rows_in_bounds(cls, west, south, east, north):
+        """
+        Returns the map rows (see map_rows) of the mines located within the bounds, restricted
+        to the mines of the current user.
+        """
+        return cls.query.with_entities(
+            cls.mine_guid, cls.mine_name, cls.mine_no, cls.latitude,
+            cls.longitude).filter(cls._in_bounds(west, south, east, north)).all()
+
+    @classmethod
+    def clusters_in_bounds(cls, west, south, east, north, grid):
+        """
+        Counts the mines located within the bounds on a grid x grid grid, returning one
+        (count, latitude, longitude) row per non-empty cell, at the mean location of its mines.
+        Only the mines of the current user are counted.
+        """
+        cell_x = func.floor((cls.longitude - west) / (east - west) * grid)
+        cell_y = func.floor((north - cls.latitude) / (north - south) * grid)
+        # The first entity refers to the model, so the query is bound to the user.
+        return cls.query.with_entities(
+            func.count(cls.mine_guid).label('count'),
+            func.avg(cls.latitude).label('latitude'),
+            func.avg(cls.longitude).label('longitude')).filter(
+                cls._in_bounds(west, south, east, north)).group_by(cell_x, cell_y).all()
+
     def json_for_map(self):
         return {
             'mine_guid': str(self.mine_guid),
@@ -3,8 +3,10 @@ import uuid
 from datetime import datetime
 
 from flask import request, current_app
-from flask_restplus import Resource, reqparse, inputs
-from sqlalchemy_filters import apply_sort, apply_pagination, apply_filters
+from flask_restplus import Resource, reqparse, inputs, marshal
+from sqlalchemy import and_, or_, exists
+from sqlalchemy.orm import load_only, lazyload, joinedload, selectinload
+from sqlalchemy_filters import apply_sort, apply_pagination
 from werkzeug.exceptions import BadRequest, NotFound
 
 from ...status.models.mine_status import MineStatus
@@ -16,12 +18,14 @@ from ..models.mine_type_detail import MineTypeDetail
 from ..models.mine import Mine
 from ..models.mineral_tenure_xref import MineralTenureXref
 from ...location.models.mine_location import MineLocation
+from ...tailings.models.tailings import MineTailingsStorageFacility
 from ....utils.random import generate_mine_no
-from app.extensions import api, cache, db
+from app.extensions import api, db
 from ....utils.access_decorators import requires_role_mine_edit, requires_any_of, VIEW_ALL, MINESPACE_PROPONENT
 from ....utils.resources_mixins import UserMixin, ErrorMixin
-from ....constants import MINE_MAP_CACHE
-from app.api.mines.mine_api_models import MINE_LIST_MODEL, MINE_MODEL
+from ....utils.keyset_pagination import is_keyset_request, include_total_requested, apply_keyset_pagination
+from .mine_map import record_mine_map_change
+from app.api.mines.mine_api_models import MINE_LIST_MODEL, MINE_KEYSET_LIST_MODEL, MINE_MODEL
 # FIXME: Model import from outside of its namespace
 # This breaks micro-service architecture and is done
 # for search performance until search can be refactored
@@ -105,22 +109,37 @@ class MineListResource(Resource, UserMixin):
             'sort_field':
             'enum[mine_name, mine_no, mine_operation_status_code, mine_region] Default: mine_name',
             'sort_dir':
-            'enum[asc, desc] Default: asc'
+            'enum[asc, desc] Default: asc',
+            'cursor':
+            'Opts into keyset pagination. Send it empty for the first page, then pass next_cursor or prev_cursor from the previous response. page is ignored.',
+            'include_total':
+            'enum[true, false] Default: true. Only used with cursor; false skips counting the total.'
         },
         description='Returns a list of filtered mines.')
-    @api.marshal_with(MINE_LIST_MODEL, code=200)
+    @api.response(200, 'Success', MINE_LIST_MODEL)
     @requires_any_of([VIEW_ALL, MINESPACE_PROPONENT])
     def get(self):
 
+        # The cursor response carries next/prev cursors, so it is marshalled with its own model.
+        if is_keyset_request(request.args):
+            mines, keyset_details = self.apply_filter_and_search(request.args)
+            return marshal({
+                'mines': mines,
+                'items_per_page': keyset_details.page_size,
+                'total': keyset_details.total_results,
+                'next_cursor': keyset_details.next_cursor,
+                'prev_cursor': keyset_details.prev_cursor,
+            }, MINE_KEYSET_LIST_MODEL)
+
         paginated_mine_query, pagination_details = self.apply_filter_and_search(request.args)
         mines = paginated_mine_query.all()
-        return {
+        return marshal({
             'mines': mines,
             'current_page': pagination_details.page_number,
             'total_pages': pagination_details.num_pages,
             'items_per_page': pagination_details.page_size,
             'total': pagination_details.total_results,
-        }
+        }, MINE_LIST_MODEL)
 
     @api.expect(parser)
     @api.doc(description='Creates a new mine.')
@@ -148,11 +167,13 @@ class MineListResource(Resource, UserMixin):
 
         if lat and lon:
             mine.mine_location = MineLocation(latitude=lat, longitude=lon)
-            cache.delete(MINE_MAP_CACHE)
 
         mine_status = _mine_status_processor(data.get('mine_status'), data.get('status_date'), mine)
         db.session.commit()
 
+        if mine.mine_location:
+            record_mine_map_change(mine.mine_guid, [(lat, lon)])
+
         return mine
 
     def apply_filter_and_search(self, args):
@@ -167,77 +188,17 @@ class MineListResource(Resource, UserMixin):
         sort_field = args.get('sort_field', 'mine_name', type=str)
         sort_dir = args.get('sort_dir', 'asc', type=str)
         sort_model = sort_models.get(sort_field)
-        search_term = args.get('search', None, type=str)
-        # Filters to be applied
-        commodity_filter_terms = args.get('commodity', None, type=str)
-        status_filter_term = args.get('status', None, type=str)
-        tenure_filter_term = args.get('tenure', None, type=str)
-        region_code_filter_term = args.get('region', None, type=str)
-        major_mine_filter_term = args.get('major', None, type=str)
-        tsf_filter_term = args.get('tsf', None, type=str)
-        # Base query:
-        mines_query = Mine.query
-        # Filter by search_term if provided
-        if search_term:
-            search_term = search_term.strip()
-            name_filter = Mine.mine_name.ilike('%{}%'.format(search_term))
-            number_filter = Mine.mine_no.ilike('%{}%'.format(search_term))
-            permit_filter = Permit.permit_no.ilike('%{}%'.format(search_term))
-            mines_name_query = Mine.query.filter(name_filter | number_filter)
-            permit_query = Mine.query.join(Permit).filter(permit_filter)
-            mines_query = mines_name_query.union(permit_query)
-        # Filter by Major Mine, if provided
-        if major_mine_filter_term == "true" or major_mine_filter_term == "false":
-            major_mine_filter = Mine.major_mine_ind.is_(major_mine_filter_term == "true")
-            major_mine_query = Mine.query.filter(major_mine_filter)
-            mines_query = mines_query.intersect(major_mine_query)
-        # Filter by TSF, if provided
-        if tsf_filter_term == "true" or tsf_filter_term == "false":
-            tsf_filter = Mine.mine_tailings_storage_facilities != None if tsf_filter_term == "true" else \
-                Mine.mine_tailings_storage_facilities == None
-            tsf_query = Mine.query.filter(tsf_filter)
-            mines_query = mines_query.intersect(tsf_query)
-        # Filter by region, if provided
-        if region_code_filter_term:
-            region_filter_term_array = region_code_filter_term.split(',')
-            region_filter = Mine.mine_region.in_(region_filter_term_array)
-            region_query = Mine.query.filter(region_filter)
-            mines_query = mines_query.intersect(region_query)
-        # Filter by commodity if provided
-        if commodity_filter_terms:
-            commodity_filter_term_array = commodity_filter_terms.split(',')
-            commodity_filter = MineTypeDetail.mine_commodity_code.in_(commodity_filter_term_array)
-            mine_type_active_filter = MineType.active_ind.is_(True)
-            commodity_query = Mine.query \
-                .join(MineType) \
-                .join(MineTypeDetail) \
-                .filter(commodity_filter, mine_type_active_filter)
-            mines_query = mines_query.intersect(commodity_query)
-        # Create a filter on tenure if one is provided
-        if tenure_filter_term:
-            tenure_filter_term_array = tenure_filter_term.split(',')
-            tenure_filter = MineType.mine_tenure_type_code.in_(tenure_filter_term_array)
-            mine_type_active_filter = MineType.active_ind.is_(True)
-            tenure_query = Mine.query \
-                .join(MineType) \
-                .filter(tenure_filter, mine_type_active_filter)
-            mines_query = mines_query.intersect(tenure_query)
-        # Create a filter on mine status if one is provided
-        if status_filter_term:
-            status_filter_term_array = status_filter_term.split(',')
-            status_filter = MineStatusXref.mine_operation_status_code.in_(status_filter_term_array)
-            status_reason_filter = MineStatusXref.mine_operation_status_reason_code.in_(
-                status_filter_term_array)
-            status_subreason_filter = MineStatusXref.mine_operation_status_sub_reason_code.in_(
-                status_filter_term_array)
-            all_status_filter = status_filter | status_reason_filter | status_subreason_filter
-            status_query = Mine.query \
-                .join(MineStatus) \
-                .join(MineStatusXref) \
-                .filter(all_status_filter, MineStatus.active_ind == True)
-            mines_query = mines_query.intersect(status_query)
-        deleted_filter = [{'field': 'deleted_ind', 'op': '==', 'value': 'False'}]
-        mines_query = apply_filters(mines_query, deleted_filter)
+
+        # All filters are compiled into a single WHERE clause so that the page and the total
+        # count are each one pass over mine, instead of one pass per filter.
+        mines_query = Mine.query.options(*_mine_list_loading_options()).filter(
+            *_build_mine_list_conditions(args))
+
+        if is_keyset_request(args):
+            sort_column = getattr(Mine, sort_field) if sort_model else Mine.mine_name
+            return apply_keyset_pagination(mines_query, sort_column, Mine.mine_guid,
+                                           args.get('cursor'), items_per_page, sort_dir,
+                                           include_total_requested(args))
 
         # Apply sorting
         if sort_model and sort_field and sort_dir:
@@ -347,9 +308,11 @@ class MineResource(Resource, UserMixin, ErrorMixin):
             raise BadRequest('latitude and longitude must both be empty, or both provided')
 
         # Mine Detail
+        map_changed = False
         if 'mine_name' in data and mine.mine_name != data['mine_name']:
             _throw_error_if_mine_exists(data['mine_name'])
             mine.mine_name = data['mine_name']
+            map_changed = True
         if 'mine_note' in data:
             mine.mine_note = data['mine_note']
         if 'major_mine_ind' in data:
@@ -375,21 +338,29 @@ class MineResource(Resource, UserMixin, ErrorMixin):
 
             tenure.save()
 
+        map_locations = []
         if mine.mine_location:
+            map_locations.append((mine.mine_location.latitude, mine.mine_location.longitude))
             #update existing record
             if "latitude" in data:
                 mine.mine_location.latitude = data['latitude']
             if "longitude" in data:
                 mine.mine_location.longitude = data['longitude']
+            map_changed = map_changed or "latitude" in data or "longitude" in data
             mine.mine_location.save()
 
         elif data.get('latitude') and data.get('longitude') and not mine.mine_location:
             mine.mine_location = MineLocation(
                 latitude=data['latitude'], longitude=data['longitude'])
             mine.save()
-            cache.delete(MINE_MAP_CACHE)
+            map_changed = True
         # Status validation
         _mine_status_processor(data.get('mine_status'), data.get('status_date'), mine)
+
+        if map_changed:
+            if mine.mine_location:
+                map_locations.append((mine.mine_location.latitude, mine.mine_location.longitude))
+            record_mine_map_change(mine.mine_guid, map_locations)
         return mine
 
 
@@ -421,6 +392,86 @@ class MineListSearch(Resource):
         return {'mines': result}
 
 
+def _mine_list_loading_options():
+    """
+    The loading profile of a mine list page: only the columns of MINES_MODEL, and one
+    SELECT ... IN per marshalled collection instead of the model's joined eager loads and of the
+    per-row lazy loads, so the number of statements does not grow with the page size.
+    """
+    return [
+        load_only('mine_guid', 'mine_name', 'mine_no', 'mine_note', 'major_mine_ind',
+                  'mine_region', 'ohsc_ind', 'union_ind'),
+        lazyload(Mine.mine_location),
+        selectinload(Mine.mine_status).joinedload(MineStatus.mine_status_xref),
+        selectinload(Mine.mine_tailings_storage_facilities),
+        selectinload(Mine.mine_permit).joinedload(Permit.permit_status_code_relationship),
+        selectinload(Mine.mine_type).selectinload(MineType.mine_type_detail),
+        joinedload('verified_status'),
+    ]
+
+
+def _build_mine_list_conditions(args):
+    """
+    Translates the mine list request arguments into a list of filter conditions on Mine.
+    Conditions on related tables are expressed as correlated EXISTS semi-joins so that
+    they never multiply the mine rows and can be combined freely with AND.
+    """
+    search_term = args.get('search', None, type=str)
+    commodity_filter_terms = args.get('commodity', None, type=str)
+    status_filter_term = args.get('status', None, type=str)
+    tenure_filter_term = args.get('tenure', None, type=str)
+    region_code_filter_term = args.get('region', None, type=str)
+    major_mine_filter_term = args.get('major', None, type=str)
+    tsf_filter_term = args.get('tsf', None, type=str)
+
+    conditions = [Mine.deleted_ind == False]
+    # Filter by search_term if provided
+    if search_term:
+        search_term = search_term.strip()
+        permit_exists = exists().where(
+            and_(Permit.mine_guid == Mine.mine_guid,
+                 Permit.permit_no.ilike('%{}%'.format(search_term))))
+        conditions.append(
+            or_(
+                Mine.mine_name.ilike('%{}%'.format(search_term)),
+                Mine.mine_no.ilike('%{}%'.format(search_term)), permit_exists))
+    # Filter by Major Mine, if provided
+    if major_mine_filter_term == "true" or major_mine_filter_term == "false":
+        conditions.append(Mine.major_mine_ind.is_(major_mine_filter_term == "true"))
+    # Filter by TSF, if provided
+    if tsf_filter_term == "true" or tsf_filter_term == "false":
+        tsf_exists = exists().where(MineTailingsStorageFacility.mine_guid == Mine.mine_guid)
+        conditions.append(tsf_exists if tsf_filter_term == "true" else ~tsf_exists)
+    # Filter by region, if provided
+    if region_code_filter_term:
+        conditions.append(Mine.mine_region.in_(region_code_filter_term.split(',')))
+    # Filter by commodity if provided
+    if commodity_filter_terms:
+        conditions.append(exists().where(
+            and_(MineType.mine_guid == Mine.mine_guid,
+                 MineType.active_ind.is_(True),
+                 MineTypeDetail.mine_type_guid == MineType.mine_type_guid,
+                 MineTypeDetail.mine_commodity_code.in_(commodity_filter_terms.split(',')))))
+    # Filter by tenure if provided
+    if tenure_filter_term:
+        conditions.append(exists().where(
+            and_(MineType.mine_guid == Mine.mine_guid,
+                 MineType.active_ind.is_(True),
+                 MineType.mine_tenure_type_code.in_(tenure_filter_term.split(',')))))
+    # Filter by mine status if provided
+    if status_filter_term:
+        status_filter_term_array = status_filter_term.split(',')
+        conditions.append(exists().where(
+            and_(MineStatus.mine_guid == Mine.mine_guid,
+                 MineStatus.active_ind == True,
+                 MineStatusXref.mine_status_xref_guid == MineStatus.mine_status_xref_guid,
+                 or_(MineStatusXref.mine_operation_status_code.in_(status_filter_term_array),
+                     MineStatusXref.mine_operation_status_reason_code.in_(status_filter_term_array),
+                     MineStatusXref.mine_operation_status_sub_reason_code.in_(
+                         status_filter_term_array)))))
+    return conditions
+
+
 # Functions shared by the MineListResource and the MineResource
 def _mine_operation_code_processor(mine_status, index):
     try:
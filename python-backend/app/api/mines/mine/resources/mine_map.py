@@ -1,57 +1,240 @@
+import threading
+import time
 import uuid
-from datetime import datetime
-import json
+from datetime import datetime, timedelta
 
 from flask import request, make_response, current_app
-from flask_restplus import Resource, reqparse, inputs, fields
+from flask_restplus import Resource, reqparse, inputs, fields, marshal
 
 from app.api.mines.location.models.mine_map_view_location import MineMapViewLocation
 from app.extensions import api, cache, db
-from app.api.mines.mine_api_models import BASIC_MINE_LIST
+from app.api.mines.mine_api_models import BASIC_MINE_LIST, MINE_MAP_DELTA_MODEL
 from ....utils.access_decorators import requires_any_of, VIEW_ALL, MINESPACE_PROPONENT
 from ....utils.resources_mixins import UserMixin
-from ....constants import MINE_MAP_CACHE, TIMEOUT_12_HOURS
+from ....utils.map_encoding import MAP_ENCODERS, MAP_MIMETYPES, MAP_JSON_MIMETYPE, MAP_TEXT_MIMETYPE, MAP_BINARY_MIMETYPE, COORDINATE_SCALE, map_json_mines
+from ....utils.map_tiles import tiles_containing
+from ....constants import MINE_MAP_CACHE, MINE_MAP_ENCODED_CACHE, MINE_MAP_TILE, MINE_MAP_VERSION, MINE_MAP_CHANGES, MINE_MAP_REBUILD_LOCK, MINE_MAP_BUILD_LOCK, MINE_MAP_MAX_DELTA_VERSIONS, TIMEOUT_5_MINUTES, TIMEOUT_12_HOURS, TIMEOUT_24_HOURS
 
 # FIXME: Model import from outside of its namespace
 # This breaks micro-service architecture and is done
 # for search performance until search can be refactored
 
+# Snapshots are refreshed in the background once they are this old, and expire well after that,
+# so that a map that is requested regularly is never rebuilt by a request.
+MINE_MAP_REFRESH_AGE = timedelta(seconds=TIMEOUT_12_HOURS)
+# How long a request waits on a cold cache for another request, or the background rebuild, to
+# build the map before it is told to retry.
+MINE_MAP_BUILD_WAIT_SECONDS = 30
+
+
+def record_mine_map_change(mine_guid, locations=()):
+    """
+    Records that a mine was added, moved, renamed or deleted: the map version is bumped, the mine
+    is journaled under the new version for the `since` deltas, the cached tiles containing any of
+    its (latitude, longitude) locations (old and new) are dropped, and the cached snapshots are
+    rebuilt in the background. Call it once the change is committed.
+    """
+    tile_keys = [
+        MINE_MAP_TILE(*tile) for latitude, longitude in locations if latitude and longitude
+        for tile in tiles_containing(latitude, longitude)
+    ]
+    if tile_keys:
+        cache.delete_many(*tile_keys)
+
+    version = cache.inc(MINE_MAP_VERSION)
+    if version is not None:
+        cache.set(MINE_MAP_CHANGES(version), [str(mine_guid)], timeout=TIMEOUT_24_HOURS)
+    start_mine_map_rebuild(current_app._get_current_object())
+
+
+def start_mine_map_rebuild(app):
+    """Starts a background rebuild of the map snapshots, unless one is already running."""
+    if app.config['MINE_MAP_BACKGROUND_REBUILD'] != '1':
+        return
+    if not cache.add(MINE_MAP_REBUILD_LOCK, True, timeout=TIMEOUT_5_MINUTES):
+        return
+    threading.Thread(target=_rebuild_with_lock, args=(app, ), daemon=True).start()
+
+
+def rebuild_mine_map_cache():
+    """
+    Builds and caches every encoding of the map from one query.
+
+    :return: the version built, its last modified date and the encoded maps by mimetype
+    """
+    # The version is read before the rows, so a change committed during the build is at worst
+    # replayed again by the next delta.
+    version = _current_version()
+    rows = MineMapViewLocation.map_rows()
+    last_modified = datetime.utcnow()
+    encoded_maps = {}
+    for mimetype, encoder in MAP_ENCODERS.items():
+        key = _cache_key(mimetype)
+        encoded_maps[mimetype] = encoder(rows)
+        cache.set_many({
+            key: encoded_maps[mimetype],
+            key + '_LAST_MODIFIED': last_modified,
+            key + '_VERSION': version
+        },
+                       timeout=TIMEOUT_24_HOURS)
+    return version, last_modified, encoded_maps
+
+
+def warm_mine_map_cache(app):
+    """
+    Rebuilds the map snapshots in this thread when any of them is missing, out of date or due
+    for a refresh, so that requests are not left to build the map on a cold cache.
+    """
+    with app.app_context():
+        keys = [_cache_key(mimetype) for mimetype in MAP_ENCODERS]
+        stamps = cache.get_many(*[key + '_LAST_MODIFIED' for key in keys])
+        versions = cache.get_many(*[key + '_VERSION' for key in keys])
+        if all(stamps) and None not in versions and min(versions) >= _current_version() \
+                and datetime.utcnow() - min(stamps) <= MINE_MAP_REFRESH_AGE:
+            return
+        if cache.add(MINE_MAP_REBUILD_LOCK, True, timeout=TIMEOUT_5_MINUTES):
+            _rebuild_with_lock(app)
+
+
+def _rebuild_with_lock(app):
+    with app.app_context():
+        try:
+            # Changes recorded while building are picked up by building again.
+            for _ in range(3):
+                version, _, _ = rebuild_mine_map_cache()
+                if version == _current_version():
+                    break
+        except Exception as e:
+            app.logger.error(f'Failed to rebuild the mine map cache: {e}')
+        finally:
+            cache.delete(MINE_MAP_REBUILD_LOCK)
+
+
+def _build_mine_map_once(mimetype):
+    """
+    Builds the map on a cold cache. One request builds it and the others wait for it to be cached,
+    by that request or by a background rebuild, rather than all running the same query.
+
+    :return: the encoded map, its last modified date and version, or None if it was not built
+             in time
+    """
+    cache_key = _cache_key(mimetype)
+    deadline = time.monotonic() + MINE_MAP_BUILD_WAIT_SECONDS
+    while True:
+        if cache.add(MINE_MAP_BUILD_LOCK, True, timeout=TIMEOUT_5_MINUTES):
+            try:
+                version, last_modified, encoded_maps = rebuild_mine_map_cache()
+                return encoded_maps[mimetype], last_modified, version
+            finally:
+                cache.delete(MINE_MAP_BUILD_LOCK)
+
+        while time.monotonic() < deadline:
+            time.sleep(0.2)
+            map_result, last_modified, version = cache.get_many(
+                cache_key, cache_key + '_LAST_MODIFIED', cache_key + '_VERSION')
+            if map_result and version is not None:
+                return map_result, last_modified, version
+            if cache.get(MINE_MAP_BUILD_LOCK) is None:
+                # The build failed; try building it here.
+                break
+        else:
+            return None
+
+
+def _current_version():
+    return cache.get(MINE_MAP_VERSION) or 0
+
+
+def _cache_key(mimetype):
+    # The JSON document keeps its original key.
+    return MINE_MAP_CACHE if mimetype == MAP_JSON_MIMETYPE else MINE_MAP_ENCODED_CACHE(mimetype)
+
+
+def _mine_map_delta(since):
+    """
+    Returns the mines changed after version `since`, or None when the journal no longer covers
+    it and the client has to reload the whole map.
+    """
+    version = _current_version()
+    if since > version or version - since > MINE_MAP_MAX_DELTA_VERSIONS:
+        return None
+
+    changes = cache.get_many(*[MINE_MAP_CHANGES(v) for v in range(since + 1, version + 1)])
+    if any(change is None for change in changes):
+        return None
+    mine_guids = {mine_guid for change in changes for mine_guid in change}
+
+    rows = MineMapViewLocation.map_rows(mine_guids) if mine_guids else []
+    located = {str(row[0]) for row in rows}
+    return {
+        'version': version,
+        'mines': map_json_mines(rows),
+        'deleted': sorted(mine_guids - located)
+    }
+
 
 class MineMapResource(Resource, UserMixin):
-    @api.doc(description='Returns a list of mines with reduced information.')
-    @api.response(200, 'Returns a list of mines with reduced information.', model=BASIC_MINE_LIST)
+    @api.doc(
+        description=
+        'Returns a list of mines with reduced information. JSON by default; send '
+        f'"Accept: {MAP_TEXT_MIMETYPE}" for columnar tab-delimited text or '
+        f'"Accept: {MAP_BINARY_MIMETYPE}" for a typed binary buffer, both with coordinates as '
+        f'fixed-point integers scaled by {COORDINATE_SCALE}. The map version is returned in the '
+        'X-Map-Version header.',
+        params={
+            'since':
+            'A map version previously returned. Only the mines added, moved or deleted since '
+            'that version are returned, or the whole map when the version is too old.'
+        })
+    @api.response(
+        200,
+        'Returns a list of mines with reduced information, or a MineMapDelta with since.',
+        model=BASIC_MINE_LIST)
+    @api.response(503, 'The map is being built, retry shortly.')
     @requires_any_of([VIEW_ALL, MINESPACE_PROPONENT])
     def get(self):
-        # Below caches the mine map response object in redis with a timeout.
-        # Generating and jsonifying the map data takes 4-7 seconds with 50,000 points,
-        # so caching seems justified.
+        since = request.args.get('since', None, type=int)
+        if since is not None:
+            delta = _mine_map_delta(since)
+            if delta is not None:
+                return marshal(delta, MINE_MAP_DELTA_MODEL), 200, {
+                    'X-Map-Version': str(delta['version'])
+                }
+
+        # The encoded map is cached in redis, stamped with the version it was built at, and is
+        # rebuilt in the background when mines change. Requests keep being served the previous
+        # snapshot meanwhile; clients catch up with `since`.
         #
-        # TODO: Use some custom representation of this data vs JSON. The
-        # json string is massive (with 50,000 points: 16mb uncompressed, 2.5mb compressed).
-        # A quick test using delimented data brings this down to ~1mb compressed.
-        map_result = cache.get(MINE_MAP_CACHE)
-        last_modified = cache.get(MINE_MAP_CACHE + '_LAST_MODIFIED')
-        if not map_result:
-            records = MineMapViewLocation.query.filter(MineMapViewLocation.latitude != None).all()
-            last_modified = datetime.utcnow()
-
-            # jsonify then store in cache
-            map_result = json.dumps({
-                'mines': list((map(lambda x: x.json_for_map(), records)))
-            }, separators=(',', ':'))
-
-            cache.set(MINE_MAP_CACHE, map_result, timeout=TIMEOUT_12_HOURS)
-            cache.set(MINE_MAP_CACHE + '_LAST_MODIFIED', last_modified, timeout=TIMEOUT_12_HOURS)
-
-        # It's more efficient to store the json to avoid re-initializing all of the objects
-        # and jsonifying on every request, so a flask response is returned to prevent
-        # flask_restplus from jsonifying the data again, which would mangle the json.
+        # The JSON string is massive (with 50,000 points: 16mb uncompressed, 2.5mb compressed),
+        # so clients may negotiate a columnar text or binary encoding of the same rows instead.
+        mimetype = request.accept_mimetypes.best_match(MAP_MIMETYPES, default=MAP_JSON_MIMETYPE)
+        cache_key = _cache_key(mimetype)
+        map_result, last_modified, version = cache.get_many(
+            cache_key, cache_key + '_LAST_MODIFIED', cache_key + '_VERSION')
+
+        if not map_result or version is None:
+            built = _build_mine_map_once(mimetype)
+            if built is None:
+                response = make_response('', 503)
+                response.headers['Retry-After'] = '5'
+                return response
+            map_result, last_modified, version = built
+        elif version < _current_version() or datetime.utcnow() - last_modified > MINE_MAP_REFRESH_AGE:
+            start_mine_map_rebuild(current_app._get_current_object())
+
+        # It's more efficient to store the encoded map to avoid re-initializing all of the
+        # objects and encoding on every request, so a flask response is returned to prevent
+        # flask_restplus from jsonifying the data again, which would mangle it.
         response = make_response(map_result)
-        response.headers['content-type'] = 'application/json'
+        response.headers['content-type'] = mimetype
+        response.headers['X-Map-Version'] = str(version)
+        response.vary.add('Accept')
+        if mimetype != MAP_JSON_MIMETYPE:
+            response.headers['X-Coordinate-Scale'] = str(COORDINATE_SCALE)
 
         # While we're at it, let's set a last modified date and have flask return not modified
         # if it hasn't so the client doesn't download it again unless needed.
         response.last_modified = last_modified
         response.make_conditional(request)
 
-        return response
\ No newline at end of file
+        return response
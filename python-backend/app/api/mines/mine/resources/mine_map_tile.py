@@ -0,0 +1,54 @@
+from flask_restplus import Resource
+from werkzeug.exceptions import BadRequest
+
+from app.api.mines.location.models.mine_map_view_location import MineMapViewLocation
+from app.auth import get_current_user_security
+from app.extensions import api, cache
+from app.api.mines.mine_api_models import MINE_MAP_TILE_MODEL
+from ....utils.access_decorators import requires_any_of, VIEW_ALL, MINESPACE_PROPONENT
+from ....utils.resources_mixins import UserMixin
+from ....utils.map_encoding import map_json_mines
+from ....utils.map_tiles import is_valid_tile, tile_bounds, MAX_TILE_ZOOM, MAX_CLUSTER_ZOOM, CLUSTER_GRID
+from ....constants import MINE_MAP_TILE, TIMEOUT_12_HOURS
+
+
+class MineMapTileResource(Resource, UserMixin):
+    @api.doc(
+        description=
+        'Returns the mines located within a z/x/y web map tile. Up to zoom level '
+        f'{MAX_CLUSTER_ZOOM} the mines are returned as clusters of a {CLUSTER_GRID}x{CLUSTER_GRID} '
+        'grid over the tile, with their count and mean location.')
+    @api.response(200, 'Returns the mines or clusters of the tile.', model=MINE_MAP_TILE_MODEL)
+    @requires_any_of([VIEW_ALL, MINESPACE_PROPONENT])
+    def get(self, z, x, y):
+        if not is_valid_tile(z, x, y):
+            raise BadRequest(f'Invalid tile, zoom levels go from 0 to {MAX_TILE_ZOOM}.')
+
+        # Each tile is cached on its own, and a mine change only drops the tiles containing it.
+        # The cached tiles hold every mine, so the tiles of a restricted user are never cached.
+        shared = not get_current_user_security().is_restricted()
+        tile = cache.get(MINE_MAP_TILE(z, x, y)) if shared else None
+        if tile is None:
+            bounds = tile_bounds(z, x, y)
+            if z <= MAX_CLUSTER_ZOOM:
+                tile = {
+                    'clustered':
+                    True,
+                    'clusters': [{
+                        'count': count,
+                        'latitude': float(latitude),
+                        'longitude': float(longitude)
+                    } for count, latitude, longitude in MineMapViewLocation.clusters_in_bounds(
+                        *bounds, CLUSTER_GRID)],
+                    'mines': []
+                }
+            else:
+                tile = {
+                    'clustered': False,
+                    'clusters': [],
+                    'mines': map_json_mines(MineMapViewLocation.map_rows_in_bounds(*bounds))
+                }
+            if shared:
+                cache.set(MINE_MAP_TILE(z, x, y), tile, timeout=TIMEOUT_12_HOURS)
+
+        return tile
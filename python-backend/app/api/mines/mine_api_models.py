@@ -30,6 +30,39 @@ BASIC_MINE_LIST = api.model(
         'mine_location': fields.Nested(BASIC_MINE_LOCATION_MODEL),
     })
 
+MINE_MAP_LOCATION_MODEL = api.model('MineMapLocation', {
+    'latitude': fields.String,
+    'longitude': fields.String,
+})
+
+MINE_MAP_MINE_MODEL = api.model(
+    'MineMapMine', {
+        'mine_guid': fields.String,
+        'mine_name': fields.String,
+        'mine_no': fields.String,
+        'mine_location': fields.Nested(MINE_MAP_LOCATION_MODEL),
+    })
+
+MINE_MAP_DELTA_MODEL = api.model(
+    'MineMapDelta', {
+        'version': fields.Integer,
+        'mines': fields.List(fields.Nested(MINE_MAP_MINE_MODEL)),
+        'deleted': fields.List(fields.String),
+    })
+
+MINE_MAP_CLUSTER_MODEL = api.model('MineMapCluster', {
+    'count': fields.Integer,
+    'latitude': fields.Float,
+    'longitude': fields.Float,
+})
+
+MINE_MAP_TILE_MODEL = api.model(
+    'MineMapTile', {
+        'clustered': fields.Boolean,
+        'clusters': fields.List(fields.Nested(MINE_MAP_CLUSTER_MODEL)),
+        'mines': fields.List(fields.Nested(BASIC_MINE_LIST)),
+    })
+
 MINE_TENURE_TYPE_CODE_MODEL = api.model('MineTenureTypeCode', {
     'mine_tenure_type_code': fields.String,
     'description': fields.String,
@@ -160,6 +193,11 @@ MINE_LIST_MODEL = api.model(
         'total': fields.Integer,
     })
 
+MINE_KEYSET_LIST_MODEL = api.inherit('MineKeysetList', MINE_LIST_MODEL, {
+    'next_cursor': fields.String,
+    'prev_cursor': fields.String,
+})
+
 MINE_INCIDENT_DOCUMENT_MODEL = api.model(
     'Mine Incident Document', {
         'mine_document_guid': fields.String,
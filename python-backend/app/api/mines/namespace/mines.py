@@ -1,6 +1,7 @@
 from flask_restplus import Namespace
 
 from app.api.mines.mine.resources.mine_map import MineMapResource
+from app.api.mines.mine.resources.mine_map_tile import MineMapTileResource
 from ..mine.resources.mine import MineResource, MineListSearch, MineListResource
 from ..mine.resources.mine_type import MineTypeResource, MineTypeListResource
 from ..mine.resources.mine_type_detail import MineTypeDetailResource
@@ -10,7 +11,7 @@ from ..mine.resources.mine_commodity_code import MineCommodityCodeResource
 from ..status.resources.status import MineStatusResource, MineStatusListResource
 from ..region.resources.region import MineRegionResource
 from ..tailings.resources.tailings import MineTailingsStorageFacilityListResource
-from ..compliance.resources.compliance import MineComplianceSummaryResource
+from ..compliance.resources.compliance import MineComplianceSummaryResource, MineComplianceSummaryListResource
 from ..compliance.resources.compliance_article import ComplianceArticleResource
 from ..mine.resources.mine_basicinfo import MineBasicInfoResource
 from app.api.mines.mine.resources.mine_verified_status import MineVerifiedStatusResource, MineVerifiedStatusListResource
@@ -37,6 +38,7 @@ api = Namespace('mines', description='Mine related operations')
 api.add_resource(MineResource, '/<string:mine_no_or_guid>')
 api.add_resource(MineListResource, '')
 api.add_resource(MineMapResource, '/map-list')
+api.add_resource(MineMapTileResource, '/map-tiles/<int:z>/<int:x>/<int:y>')
 
 api.add_resource(MineListSearch, '/search')
 api.add_resource(MineTenureTypeCodeResource, '/mine-tenure-type-codes')
@@ -50,6 +52,7 @@ api.add_resource(MineTailingsStorageFacilityListResource, '/<string:mine_guid>/t
 
 api.add_resource(MineComplianceSummaryResource, '/<string:mine_no>/compliance/summary')
 api.add_resource(ComplianceArticleResource, '/compliance/codes')
+api.add_resource(MineComplianceSummaryListResource, '/compliance/summaries')
 
 api.add_resource(MineTypeResource, '/mine-types/<string:mine_type_guid>')
 api.add_resource(MineTypeListResource, '/mine-types')
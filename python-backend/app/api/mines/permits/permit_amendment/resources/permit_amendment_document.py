@@ -1,7 +1,6 @@
 import decimal
 import uuid
 import base64
-import requests
 import json
 
 from datetime import datetime
@@ -18,6 +17,7 @@ from app.extensions import api, db
 from app.api.utils.access_decorators import requires_role_edit_permit
 from app.api.utils.resources_mixins import UserMixin
 from app.api.utils.url import get_document_manager_svc_url
+from app.api.utils.service_client import service_client
 
 from app.api.mines.permits.response_models import PERMIT_AMENDMENT_DOCUMENT_MODEL
 
@@ -53,7 +53,7 @@ class PermitAmendmentDocumentListResource(Resource, UserMixin):
 
         document_manager_URL = f'{current_app.config["DOCUMENT_MANAGER_URL"]}/document-manager'
 
-        resp = requests.post(
+        resp = service_client.post(
             url=document_manager_URL,
             headers={key: value
                      for (key, value) in request.headers if key != 'Host'},
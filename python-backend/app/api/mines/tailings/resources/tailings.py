@@ -1,18 +1,18 @@
 import uuid
-import requests
 import json
 
-from flask import request, current_app, url_for
+from flask import current_app, url_for
 from flask_restplus import Resource, reqparse
 from app.extensions import api, db
 from werkzeug.exceptions import BadRequest, InternalServerError, NotFound
 
 from app.api.utils.access_decorators import requires_role_view_all, requires_role_mine_edit
 from app.api.utils.resources_mixins import UserMixin, ErrorMixin
-from app.api.utils.url import get_documents_svc_url
 
 from ..models.tailings import MineTailingsStorageFacility
 from app.api.mines.mine.models.mine import Mine
+from app.api.documents.required.models.required_documents import RequiredDocument
+from app.api.documents.expected.models.mine_expected_document import MineExpectedDocument
 
 from app.api.mines.mine_api_models import MINE_TSF_MODEL
 
@@ -55,40 +55,20 @@ class MineTailingsStorageFacilityListResource(Resource, UserMixin):
 
         if is_mine_first_tsf:
             try:
-                req_documents_url = get_documents_svc_url('/required?category=TSF&sub_category=INI')
-                get_tsf_docs_resp = requests.get(
-                    req_documents_url,
-                    headers={'Authorization': request.headers.get('Authorization')})
-
-                if get_tsf_docs_resp.status_code != 200:
-                    raise Exception(f'get_tsf_req_docs returned >> {get_tsf_docs_resp.status_code}')
-
-                tsf_required_documents = get_tsf_docs_resp.json()['required_documents']
-                new_expected_documents = []
-
+                # The required TSF documents are read and assigned in-process rather than
+                # through an HTTP round trip to this API's own documents endpoints.
+                tsf_required_documents = RequiredDocument.find_by_req_doc_category('TSF', 'INI')
                 for tsf_req_doc in tsf_required_documents:
-                    new_expected_documents.append({
-                        'req_document_guid':
-                        tsf_req_doc['req_document_guid'],
-                        'document_name':
-                        tsf_req_doc['req_document_name'],
-                        'document_description':
-                        tsf_req_doc['description'],
-                        'document_due_date_type':
-                        tsf_req_doc['req_document_due_date_type'],
-                        'document_due_date_period_months':
-                        tsf_req_doc['req_document_due_date_period_months'],
-                        'hsrc_code':
-                        tsf_req_doc['hsrc_code']
-                    })
-
-                doc_assignment_response = requests.post(
-                    get_documents_svc_url('/expected/mines/' + str(mine_guid)),
-                    headers={'Authorization': request.headers.get('Authorization')},
-                    json={'documents': new_expected_documents})
-                if doc_assignment_response.status_code != 200:
-                    raise Exception(
-                        f"Error creating tsf expected documents >> {doc_assignment_response}")
+                    mine_exp_doc = MineExpectedDocument(
+                        req_document_guid=tsf_req_doc.req_document_guid,
+                        required_document=tsf_req_doc,
+                        exp_document_name=tsf_req_doc.req_document_name,
+                        exp_document_description=tsf_req_doc.description,
+                        mine_guid=mine.mine_guid,
+                        hsrc_code=tsf_req_doc.hsrc_code,
+                        exp_document_status_code='MIA')
+                    mine_exp_doc.set_due_date()
+                    db.session.add(mine_exp_doc)
             except Exception as e:
                 db.session.rollback()
                 current_app.logger.error(str(e))
@@ -1,5 +1,4 @@
 import base64
-import requests
 from werkzeug.exceptions import BadRequest, NotFound
 
 from flask import request, current_app, Response
@@ -12,6 +11,7 @@ from ....documents.variances.models.variance import VarianceDocumentXref
 from ....utils.access_decorators import (requires_any_of, EDIT_VARIANCE,
                                          MINESPACE_PROPONENT)
 from ....utils.resources_mixins import UserMixin, ErrorMixin
+from ....utils.service_client import service_client
 from app.api.utils.custom_reqparser import CustomReqparser
 from app.api.mines.mine_api_models import VARIANCE_MODEL
 from app.api.variances.models.variance import Variance
@@ -35,7 +35,7 @@ class MineVarianceDocumentUploadResource(Resource, UserMixin, ErrorMixin):
         }
         document_manager_URL = f'{current_app.config["DOCUMENT_MANAGER_URL"]}/document-manager'
 
-        resp = requests.post(
+        resp = service_client.post(
             url=document_manager_URL,
             headers={key: value
                      for (key, value) in request.headers if key != 'Host'},
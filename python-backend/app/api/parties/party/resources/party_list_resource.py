@@ -1,6 +1,6 @@
 import uuid
 from flask import request, current_app
-from flask_restplus import Resource
+from flask_restplus import Resource, marshal
 from sqlalchemy_filters import apply_sort, apply_pagination, apply_filters
 from werkzeug.exceptions import BadRequest, InternalServerError
 from sqlalchemy import and_, or_
@@ -10,7 +10,7 @@ from ..models.address import Address
 from ..models.party_type_code import PartyTypeCode
 from ...party_appt.models.mine_party_appt import MinePartyAppointment
 from app.api.parties.party_appt.models.party_business_role_appt import PartyBusinessRoleAppointment
-from ...response_models import PARTY, PAGINATED_PARTY_LIST
+from ...response_models import PARTY, PAGINATED_PARTY_LIST, KEYSET_PAGINATED_PARTY_LIST
 
 from ....constants import PARTY_STATUS_CODE
 from app.extensions import api
@@ -18,6 +18,7 @@ from ....utils.access_decorators import requires_role_view_all, requires_role_ed
 
 from ....utils.resources_mixins import UserMixin, ErrorMixin
 from app.api.utils.custom_reqparser import CustomReqparser
+from app.api.utils.keyset_pagination import is_keyset_request, include_total_requested, apply_keyset_pagination
 
 
 class PartyListResource(Resource, UserMixin, ErrorMixin):
@@ -87,23 +88,36 @@ class PartyListResource(Resource, UserMixin, ErrorMixin):
             'role': 'A comma separated list of roles to be filtered by',
             'sort_field': 'enum[party_name] Default: party_name',
             'sort_dir': 'enum[asc, desc] Default: asc',
-            'business_role': 'A business role or roles to filter on'
+            'business_role': 'A business role or roles to filter on',
+            'cursor': 'Opts into keyset pagination. Send it empty for the first page, then pass next_cursor or prev_cursor from the previous response. page is ignored.',
+            'include_total': 'enum[true, false] Default: true. Only used with cursor; false skips counting the total.'
         })
     @requires_any_of([VIEW_ALL, MINESPACE_PROPONENT])
-    @api.marshal_with(PAGINATED_PARTY_LIST, code=200)
+    @api.response(200, 'Success', PAGINATED_PARTY_LIST)
     def get(self):
+        # The cursor response carries next/prev cursors, so it is marshalled with its own model.
+        if is_keyset_request(request.args):
+            parties, keyset_details = self.apply_filter_and_search(request.args)
+            return marshal({
+                'records': parties,
+                'items_per_page': keyset_details.page_size,
+                'total': keyset_details.total_results,
+                'next_cursor': keyset_details.next_cursor,
+                'prev_cursor': keyset_details.prev_cursor,
+            }, KEYSET_PAGINATED_PARTY_LIST)
+
         paginated_parties, pagination_details = self.apply_filter_and_search(
             request.args)
         if not paginated_parties:
             raise BadRequest('Unable to fetch parties')
 
-        return {
+        return marshal({
             'records': paginated_parties.all(),
             'current_page': pagination_details.page_number,
             'total_pages': pagination_details.num_pages,
             'items_per_page': pagination_details.page_size,
             'total': pagination_details.total_results,
-        }
+        }, PAGINATED_PARTY_LIST)
 
     @api.expect(parser)
     @api.doc(description='Create a party.')
@@ -209,6 +223,13 @@ class PartyListResource(Resource, UserMixin, ErrorMixin):
             contact_query = contact_query.intersect(
                 business_role_query) if contact_query else business_role_query
 
+        if is_keyset_request(args):
+            sort_column = getattr(Party, sort_field) if sort_model else Party.party_name
+            return apply_keyset_pagination(contact_query, sort_column, Party.party_guid,
+                                           args.get('cursor'),
+                                           items_per_page or self.PARTY_LIST_RESULT_LIMIT,
+                                           sort_dir, include_total_requested(args))
+
         # Apply sorting
         if sort_model and sort_field and sort_dir:
             sort_criteria = [{'model': sort_model,
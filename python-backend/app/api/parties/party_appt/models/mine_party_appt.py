@@ -1,9 +1,7 @@
 from datetime import datetime
 import re
 import uuid
-import requests
 
-from flask import request, current_app
 from sqlalchemy import func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.hybrid import hybrid_property
@@ -12,6 +10,7 @@ from sqlalchemy.schema import FetchedValue
 from app.extensions import db
 
 from ...party.models.party import Party
+from app.api.mines.mine.models.mine import Mine
 from ....utils.models_mixins import AuditMixin, Base
 
 
@@ -117,28 +116,11 @@ class MinePartyAppointment(AuditMixin, Base):
 
     @classmethod
     def find_manager_history_by_mine_no(cls, mine_no):
-        # send internal API call to fetch matching mine record
-        mines_url = current_app.config['MINES_URL'] + '/mines/' + str(mine_no)
-        auth_headers = request.headers.get('Authorization')
-        if not auth_headers:
-            return None, 401, 'Unauthorized'
-
-        headers = {'Authorization': auth_headers}
-        response = requests.get(url=mines_url, headers=headers)
-        if not response:
-            return None, 500, 'Server error'
-        if response.status_code != 200:
-            return None, response.status_code, response.reason
-
-        # fetch mine history by mine_guid
-        try:
-            json_response = response.json()
-        except:
-            return None, 500, 'Server error'
-
-        related_mine_guid = json_response.get('guid')
-        if not related_mine_guid:
+        # The mine is looked up in-process, not through an HTTP call to this API's own MINES_URL.
+        mine = Mine.find_by_mine_no_or_guid(mine_no)
+        if not mine:
             return None, 404, 'Mine not found'
+        related_mine_guid = mine.mine_guid
 
         records = cls.query.filter_by(mine_guid=related_mine_guid).all()
         if len(records) == 0:
@@ -52,3 +52,8 @@ PAGINATED_LIST = api.model(
 PAGINATED_PARTY_LIST = api.inherit('PartyList', PAGINATED_LIST, {
     'records': fields.List(fields.Nested(PARTY)),
 })
+
+KEYSET_PAGINATED_PARTY_LIST = api.inherit('PartyKeysetList', PAGINATED_PARTY_LIST, {
+    'next_cursor': fields.String,
+    'prev_cursor': fields.String,
+})
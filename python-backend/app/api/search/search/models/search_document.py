@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from sqlalchemy import and_
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR, insert
+from sqlalchemy.schema import FetchedValue
+
+from app.extensions import db
+from app.api.utils.models_mixins import Base
+
+SEARCH_DOCUMENT_COLUMNS = [
+    'search_document_type', 'search_document_guid', 'display_value', 'search_text',
+    'search_vector', 'mine_guid', 'deleted_ind'
+]
+
+
+class SearchDocument(Base):
+    __tablename__ = 'search_document'
+    search_document_type = db.Column(db.String(20), primary_key=True)
+    search_document_guid = db.Column(UUID(as_uuid=True), primary_key=True)
+    display_value = db.Column(db.String, nullable=False)
+    search_text = db.Column(db.String, nullable=False)
+    search_vector = db.Column(TSVECTOR, nullable=False)
+    mine_guid = db.Column(UUID(as_uuid=True))
+    deleted_ind = db.Column(db.Boolean, nullable=False, server_default=FetchedValue())
+    update_timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return '<SearchDocument %r %r>' % (self.search_document_type, self.search_document_guid)
+
+    @classmethod
+    def upsert_from_select(cls, source_select):
+        """Inserts or refreshes the search documents produced by the source select."""
+        statement = insert(cls.__table__).from_select(SEARCH_DOCUMENT_COLUMNS, source_select)
+        return statement.on_conflict_do_update(
+            index_elements=['search_document_type', 'search_document_guid'],
+            set_={
+                **{
+                    column: statement.excluded[column]
+                    for column in SEARCH_DOCUMENT_COLUMNS[2:]
+                }, 'update_timestamp': datetime.utcnow()
+            })
+
+    @classmethod
+    def delete_document(cls, search_document_type, search_document_guid):
+        return cls.__table__.delete().where(
+            and_(cls.search_document_type == search_document_type,
+                 cls.search_document_guid == search_document_guid))
@@ -1,12 +1,13 @@
 import regex
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
 from flask_restplus import Resource
 from flask import request, current_app
 
 from app.extensions import db, api
 from app.api.utils.access_decorators import requires_role_view_all, requires_role_mine_edit
 from app.api.utils.resources_mixins import UserMixin, ErrorMixin
-from app.api.utils.search import search_targets, append_result, execute_search, SearchResult
+from app.api.utils.search import search_targets, search_documents, SearchResult
+from app.api.utils.search_executor import search_executor
 from app.api.search.search_api_models import SEARCH_RESULT_RETURN_MODEL
 
 
@@ -36,19 +37,11 @@ class SearchResource(Resource, UserMixin):
         search_terms = reg_exp.findall(search_term)
         search_terms = [term.replace('"', '') for term in search_terms]
 
-        with ThreadPoolExecutor(max_workers=50) as executor:
-            task_list = []
-            for type, type_config in search_targets.items():
-                if type in search_types:
-                    task_list.append(
-                        executor.submit(execute_search, app, search_results, search_term,
-                                        search_terms, type, type_config))
-            for task in as_completed(task_list):
-                try:
-                    data = task.result()
-                except Exception as exc:
-                    current_app.logger.error(
-                        f'generated an exception: {exc} with search term - {search_term}')
+        search_results = search_executor.run(app, [
+            partial(search_documents, search_term, search_terms,
+                    {type: type_config
+                     for type, type_config in search_targets.items() if type in search_types}, 100)
+        ])
 
         grouped_results = {}
         for result in search_results:
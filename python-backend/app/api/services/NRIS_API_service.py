@@ -1,153 +1,142 @@
-import requests
-import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-from dateutil.relativedelta import relativedelta
 from datetime import datetime, timedelta
-from flask import request, current_app
-from werkzeug import exceptions
-from ..constants import NRIS_TOKEN, NRIS_COMPLIANCE_DATA
+from flask import current_app
+from ..constants import NRIS_TOKEN, NRIS_COMPLIANCE_DATA, NRIS_COMPLIANCE_REFRESH_LOCK, TIMEOUT_5_MINUTES, TIMEOUT_24_HOURS
 from app.api.utils.apm import register_apm
+from app.api.utils.service_client import service_client
+from app.extensions import cache
 
+# How long a request waits for the summary another request is fetching before fetching it too.
+COMPLIANCE_FETCH_WAIT_SECONDS = 5
 
-def _get_datetime_from_NRIS_data(date):
-    return datetime.strptime(date, '%Y-%m-%dT%H:%M:%S')
-
-
-def _get_inspector_from_idir(idir):
-    prefix, inspector = idir.split('\\')
-    return inspector
-
-
-def _get_fiscal_year():
-    current_date = datetime.utcnow()
-    current_year = datetime.utcnow().year
-    march = 3
-    day = 31
-    hour = 00
-    minute = 00
-    second = 00
-
-    fiscal_year_end = datetime(current_year, march, day, hour, minute, second)
-    #current_app.logger.debug(f'{fiscal_year_end} vs {current_date}')
-    return current_year if current_date > fiscal_year_end else current_year - 1
+_executor_lock = threading.Lock()
+_executor = None
 
 
 @register_apm
-def _get_NRIS_data_by_mine(auth_token, mine_no):
-    current_date = datetime.utcnow()
+def _get_NRIS_compliance_summary_by_mine(auth_token, mine_no):
+    """
+    Returns the compliance summary of a mine, aggregated by the NRIS API rather than rebuilt here
+    from every inspection of the mine.
+    """
+    url = current_app.config['NRIS_API_URL'] + '/inspections/summary'
+    response = service_client.get(
+        url, params={'mine_no': mine_no}, headers={'Authorization': auth_token})
+    response.raise_for_status()
+    return response.json()
 
-    url = current_app.config['NRIS_API_URL'] + '/inspections'
 
-    if url is None:
-        raise TypeError('Could not load the NRIS URL.')
-    else:
-        headers = {'Authorization': auth_token}
+@register_apm
+def _get_NRIS_token():
+    """A service token for the NRIS API, for the calls made outside of a user request."""
+    result = cache.get(NRIS_TOKEN)
+    if result is None:
+        response = service_client.post(
+            current_app.config['NRIS_TOKEN_URL'],
+            data={'grant_type': 'client_credentials'},
+            auth=(current_app.config['NRIS_USER_NAME'], current_app.config['NRIS_PASS']))
+        response.raise_for_status()
+        token = response.json()
+        result = f'Bearer {token["access_token"]}'
+        # Expire the cached token a minute before the token itself.
+        cache.set(NRIS_TOKEN, result, timeout=max(int(token.get('expires_in', 300)) - 60, 60))
+    return result
+
+
+def compliance_executor(app):
+    """The worker pool of the background NRIS calls, so NRIS sees a bounded number of calls."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(app.config['NRIS_COMPLIANCE_WORKERS']),
+                thread_name_prefix='nris-compliance')
+        return _executor
+
+
+def get_compliance_summary(mine_no, auth_token):
+    """
+    Returns the compliance summary of a mine.
+
+    Summaries are cached for 24 hours, empty ones included, and are served stale once older than
+    their soft TTL while a background refresh fetches them again. Only one request per mine
+    fetches from NRIS at a time: on a cold cache the others wait for its result.
+    """
+    entry = cache.get(NRIS_COMPLIANCE_DATA(mine_no))
+    if entry is None:
+        entry = _fetch_compliance_summary_once(mine_no, auth_token)
+    elif _is_stale(entry):
+        refresh_compliance_summary(current_app._get_current_object(), mine_no, auth_token)
+    return entry['summary']
+
+
+def get_cached_compliance_summaries(mine_nos, auth_token):
+    """
+    Returns the cached summaries of the mines (None when not cached) with one cache call, and
+    refreshes the stale ones in the background.
+    """
+    entries = cache.get_many(*[NRIS_COMPLIANCE_DATA(mine_no) for mine_no in mine_nos])
+    app = current_app._get_current_object()
+    for mine_no, entry in zip(mine_nos, entries):
+        if entry is not None and _is_stale(entry):
+            refresh_compliance_summary(app, mine_no, auth_token)
+    return [entry and entry['summary'] for entry in entries]
+
+
+def refresh_compliance_summary(app, mine_no, auth_token):
+    """
+    Fetches the summary of a mine again on the worker pool, unless it is already being fetched.
+
+    :return: the future of the refresh, or None when another one is running
+    """
+    if not cache.add(NRIS_COMPLIANCE_REFRESH_LOCK(mine_no), True, timeout=TIMEOUT_5_MINUTES):
+        return None
+    return compliance_executor(app).submit(_refresh_with_lock, app, mine_no, auth_token)
+
+
+def _refresh_with_lock(app, mine_no, auth_token):
+    with app.app_context():
         try:
-            empr_nris_resp = requests.get(url=f'{url}?mine_no={mine_no}', headers=headers)
-            empr_nris_resp.raise_for_status()
-        except requests.exceptions.Timeout:
-            raise
-        except requests.exceptions.HTTPError:
-            # TODO add logging for this error.
+            return _fetch_and_cache_compliance_summary(mine_no, auth_token)
+        except Exception as e:
+            app.logger.error(f'NRIS_API refresh failed <mine_no={mine_no}>, {str(e)}')
             raise
+        finally:
+            cache.delete(NRIS_COMPLIANCE_REFRESH_LOCK(mine_no))
+
 
-        return empr_nris_resp.json()
-
-
-def _process_NRIS_data(raw_data):
-    result = {
-        'last_inspection': None,
-        'last_inspector': None,
-        'num_open_orders': 0,
-        'num_overdue_orders': 0,
-        #'section_35_orders': 0, no aggregate, FE filters will show where violation = 35
-        'all_time': {
-            'num_inspections': 0,
-            'num_advisories': 0,
-            'num_warnings': 0,
-            'num_requests': 0,
-        },
-        'last_12_months': {
-            'num_inspections': 0,
-            'num_advisories': 0,
-            'num_warnings': 0,
-            'num_requests': 0,
-        },
-        'current_fiscal': {
-            'num_inspections': 0,
-            'num_advisories': 0,
-            'num_warnings': 0,
-            'num_requests': 0,
-        },
-        'orders': [],
+def _fetch_compliance_summary_once(mine_no, auth_token):
+    if cache.add(NRIS_COMPLIANCE_REFRESH_LOCK(mine_no), True, timeout=TIMEOUT_5_MINUTES):
+        try:
+            return _fetch_and_cache_compliance_summary(mine_no, auth_token)
+        finally:
+            cache.delete(NRIS_COMPLIANCE_REFRESH_LOCK(mine_no))
+
+    deadline = time.monotonic() + COMPLIANCE_FETCH_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(0.1)
+        entry = cache.get(NRIS_COMPLIANCE_DATA(mine_no))
+        if entry is not None:
+            return entry
+        if cache.get(NRIS_COMPLIANCE_REFRESH_LOCK(mine_no)) is None:
+            break
+    return _fetch_and_cache_compliance_summary(mine_no, auth_token)
+
+
+def _fetch_and_cache_compliance_summary(mine_no, auth_token):
+    entry = {
+        'summary': _get_NRIS_compliance_summary_by_mine(auth_token, mine_no),
+        'fetched_at': datetime.utcnow()
     }
-    sorted_records = sorted(raw_data.get('records') or [],
-                            key=lambda k: _get_datetime_from_NRIS_data(k['inspection_date']),
-                            reverse=True)
-
-    for inspection in sorted_records:
-        inspection_date = _get_datetime_from_NRIS_data(inspection['inspection_date'])
-        current_fiscal_bool = inspection_date > datetime(_get_fiscal_year(), 4, 1)
-        last_12_months_bool = inspection_date > datetime.utcnow() - relativedelta(years=1)
-
-        result['all_time']['num_inspections'] += 1
-        if last_12_months_bool:
-            result['last_12_months']['num_inspections'] += 1
-            if current_fiscal_bool:  #last Apr 1
-                result['current_fiscal']['num_inspections'] += 1
-
-        inspector = _get_inspector_from_idir(inspection['inspector_idir'])
-
-        if not result['last_inspection']:
-            #only runs first loop
-            result['last_inspection'] = inspection_date
-            result['last_inspector'] = inspector
-
-        order_count = 1
-        for location in inspection['inspected_locations']:
-            for stop in location['stop_details']:
-                legislation = stop['noncompliance_legislations']
-                violation = None
-                if legislation:
-                    violation = legislation[0].get('section')
-                elif stop['noncompliance_permits']:
-                    violation = stop['noncompliance_permits'][0].get('permitSectionNumber')
-
-                order = {
-                    'order_no': str(inspection['external_id']) + '-' + str(order_count),
-                    'violation': violation,
-                    'report_no': inspection['external_id'],
-                    'inspector': inspector,
-                    'order_status': stop['stop_status'],
-                    'due_date': stop['completion_date'],
-                    'overdue': False,
-                }
-
-                #Open
-                if order['order_status'] in ['Open']:
-                    result['num_open_orders'] += 1
-
-                #Overdue
-                if stop['completion_date'] is not None and \
-                _get_datetime_from_NRIS_data(stop['completion_date']) < (datetime.utcnow() - relativedelta(days=1)) and \
-                order['order_status'] == 'Open':
-                    result['num_overdue_orders'] += 1
-                    order['overdue'] = True
-                    order['order_status'] = "Overdue"
-
-                result['orders'].append(order)
-                order_count += 1
-
-            result['all_time']['num_advisories'] += len(location['advisory_details'])
-            result['all_time']['num_warnings'] += len(location['warning_details'])
-            result['all_time']['num_requests'] += len(location['request_details'])
-            if last_12_months_bool:
-                result['last_12_months']['num_advisories'] += len(location['advisory_details'])
-                result['last_12_months']['num_warnings'] += len(location['warning_details'])
-                result['last_12_months']['num_requests'] += len(location['request_details'])
-                if current_fiscal_bool:
-                    result['current_fiscal']['num_advisories'] += len(location['advisory_details'])
-                    result['current_fiscal']['num_warnings'] += len(location['warning_details'])
-                    result['current_fiscal']['num_requests'] += len(location['request_details'])
-
-    return result
\ No newline at end of file
+    cache.set(NRIS_COMPLIANCE_DATA(mine_no), entry, timeout=TIMEOUT_24_HOURS)
+    return entry
+
+
+def _is_stale(entry):
+    # Summaries without orders are cached too, for less time so a mine's first orders show sooner.
+    soft_ttl = current_app.config['NRIS_COMPLIANCE_SOFT_TTL' if entry['summary'].get('orders')
+                                  else 'NRIS_COMPLIANCE_EMPTY_SOFT_TTL']
+    return datetime.utcnow() - entry['fetched_at'] > timedelta(seconds=int(soft_ttl))
@@ -8,6 +8,7 @@ from ....utils.resources_mixins import UserMixin, ErrorMixin
 from ..models.minespace_user import MinespaceUser
 from ..models.minespace_user_mine import MinespaceUserMine
 from app.extensions import db
+from app.auth import clear_mine_access
 
 
 class MinespaceUserResource(Resource, UserMixin, ErrorMixin):
@@ -43,6 +44,7 @@ class MinespaceUserResource(Resource, UserMixin, ErrorMixin):
                 guid = uuid.UUID(guid)  #ensure good formatting
                 new_mum = MinespaceUserMine.create_minespace_user_mine(new_user.user_id, guid)
                 db.session.commit()
+            clear_mine_access(new_user.user_id)
         except Exception as e:
             db.session.rollback()
             return self.create_error_payload(500, "An error occurred: " + str(e)), 500
@@ -61,4 +63,5 @@ class MinespaceUserResource(Resource, UserMixin, ErrorMixin):
         db.session.commit()
         db.session.delete(user)
         db.session.commit()
+        clear_mine_access(user_id)
         return ('', 204)
@@ -7,6 +7,7 @@ from ....utils.resources_mixins import UserMixin, ErrorMixin
 from ..models.minespace_user import MinespaceUser
 from ..models.minespace_user_mine import MinespaceUserMine
 from app.extensions import db
+from app.auth import clear_mine_access
 
 
 class MinespaceUserMineResource(Resource, UserMixin, ErrorMixin):
@@ -28,6 +29,7 @@ class MinespaceUserMineResource(Resource, UserMixin, ErrorMixin):
                 guid,
             )
             mum.save()
+            clear_mine_access(user_id)
         except:
             db.session.rollback()
             self.create_error_payload(500, "ERROR: user-mine access was not created"), 500
@@ -50,4 +52,5 @@ class MinespaceUserMineResource(Resource, UserMixin, ErrorMixin):
         if not found:
             return self.create_error_payload(404, 'user is not related to the provided mine'), 404
         user.save()
+        clear_mine_access(user.user_id)
         return ('', 204)
@@ -1,4 +1,8 @@
+from cached_property import cached_property
+from flask import g, has_app_context
+
 from app.extensions import jwt
+from app.api.utils.access_decorators import MINESPACE_PROPONENT
 from jose import jwt as jwt_jose
 
 VALID_REALM = ['idir']
@@ -16,25 +20,70 @@ DUMMY_AUTH_CLAIMS = {
 }
 
 
+class AuthContext(object):
+    """
+    The identity of the current request, decoded from its token once and kept on g. Every value
+    is computed on first use; app.auth stores the minespace user and its security on it too.
+    """
+
+    def __init__(self, token, claims):
+        self.token = token
+        self.claims = claims
+        self.minespace_user = None
+        self.user_security = None
+
+    @cached_property
+    def roles(self):
+        try:
+            return self.claims["realm_access"]["roles"]
+        except (KeyError, TypeError):
+            raise Exception("A JWT token exists, but no roles are defined.")
+
+    @cached_property
+    def is_proponent(self):
+        return MINESPACE_PROPONENT in self.roles
+
+    @cached_property
+    def username(self):
+        realms = list(set(VALID_REALM) & set(self.claims['realm_access']['roles']))
+        return realms[0] + '\\' + self.claims['preferred_username'] if realms else self.claims[
+            'preferred_username']
+
+    @cached_property
+    def email(self):
+        return self.claims.get('email')
+
+    @cached_property
+    def given_name(self):
+        return self.claims.get('given_name')
+
+
+def get_auth_context():
+    """
+    Returns the AuthContext of the current token. It is rebuilt only when the token changes, so
+    query security checks and audit column defaults do not decode the token again.
+    """
+    token = None if User._test_mode else jwt.get_token_auth_header()
+    context = g.get('auth_context') if has_app_context() else None
+    if context is None or context.token != token:
+        claims = DUMMY_AUTH_CLAIMS if token is None else jwt_jose.get_unverified_claims(token)
+        context = AuthContext(token, claims)
+        if has_app_context():
+            g.auth_context = context
+    return context
+
+
 class User:
     _test_mode = False
 
     def get_user_raw_info(self):
-        if self._test_mode:
-            return DUMMY_AUTH_CLAIMS
-        token = jwt.get_token_auth_header()
-        return jwt_jose.get_unverified_claims(token)
+        return get_auth_context().claims
 
     def get_user_email(self):
-        raw_info = self.get_user_raw_info()
-        return raw_info.get('email')
+        return get_auth_context().email
 
     def get_user_given_name(self):
-        raw_info = self.get_user_raw_info()
-        return raw_info.get('given_name')
+        return get_auth_context().given_name
 
     def get_user_username(self):
-        raw_info = self.get_user_raw_info()
-        realms = list(set(VALID_REALM) & set(raw_info['realm_access']['roles']))
-        return realms[0] + '\\' + raw_info['preferred_username'] if realms else raw_info[
-            'preferred_username']
+        return get_auth_context().username
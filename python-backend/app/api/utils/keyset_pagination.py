@@ -0,0 +1,105 @@
+import base64
+import json
+from collections import namedtuple
+
+from sqlalchemy import and_, asc, desc, literal, or_, tuple_
+from werkzeug.exceptions import BadRequest
+
+INVALID_CURSOR = 'Invalid cursor.'
+
+KeysetPagination = namedtuple('KeysetPagination',
+                              ['page_size', 'next_cursor', 'prev_cursor', 'total_results'])
+
+
+def is_keyset_request(args):
+    """Keyset pagination is opt-in: it is used whenever a cursor argument is sent, even empty."""
+    return 'cursor' in args
+
+
+def include_total_requested(args):
+    return args.get('include_total', 'true', type=str).lower() != 'false'
+
+
+def encode_cursor(values, direction):
+    payload = json.dumps({'k': values, 'd': direction}, default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        values, direction = payload['k'], payload['d']
+    except (ValueError, TypeError, KeyError):
+        raise BadRequest(INVALID_CURSOR)
+    if direction not in ('next', 'prev') or not isinstance(values, list) or len(values) != 2:
+        raise BadRequest(INVALID_CURSOR)
+    return values, direction
+
+
+def apply_keyset_pagination(query,
+                            sort_column,
+                            id_column,
+                            cursor=None,
+                            page_size=25,
+                            sort_dir='asc',
+                            include_total=True):
+    """
+    Pages the query by the (sort_column, id_column) keyset instead of OFFSET, so that every
+    page costs the same as the first one. Rows without a sort value come last, in either sort
+    direction.
+
+    :param cursor: an opaque cursor returned by a previous call, or empty for the first page
+    :param include_total: when False the COUNT(*) over the whole query is skipped
+    :return: the records of the page and a KeysetPagination with the next/prev cursors
+    """
+    position, direction = decode_cursor(cursor) if cursor else (None, 'next')
+    # Paging backwards walks the index in the opposite order, then flips the page.
+    ascending = (sort_dir != 'desc') == (direction == 'next')
+
+    # The NULLs that come last paging forwards come first paging backwards.
+    nulls_last = direction == 'next'
+    nullable = sort_column.expression.nullable
+
+    page_query = query.order_by(None)
+    if position:
+        page_query = page_query.filter(
+            _after(sort_column, id_column, position, ascending, nulls_last, nullable))
+    order = asc if ascending else desc
+    sort_order = order(sort_column)
+    if nullable:
+        sort_order = sort_order.nullslast() if nulls_last else sort_order.nullsfirst()
+    page_query = page_query.order_by(sort_order, order(id_column)).limit(page_size + 1)
+
+    records = page_query.all()
+    has_more = len(records) > page_size
+    records = records[:page_size]
+    if direction == 'prev':
+        records.reverse()
+
+    has_next = has_more if direction == 'next' else True
+    has_prev = bool(position) if direction == 'next' else has_more
+
+    def _keyset_of(record):
+        return [getattr(record, sort_column.key), getattr(record, id_column.key)]
+
+    next_cursor = encode_cursor(_keyset_of(records[-1]), 'next') if records and has_next else None
+    prev_cursor = encode_cursor(_keyset_of(records[0]), 'prev') if records and has_prev else None
+    total_results = query.order_by(None).count() if include_total else None
+
+    return records, KeysetPagination(page_size, next_cursor, prev_cursor, total_results)
+
+
+def _after(sort_column, id_column, position, ascending, nulls_last, nullable):
+    """The rows after the position of a cursor, in the order the page is read in."""
+    value, id_value = position
+    id_bound = literal(id_value, type_=id_column.type)
+    id_after = id_column > id_bound if ascending else id_column < id_bound
+    if value is None:
+        after_null = and_(sort_column.is_(None), id_after)
+        return after_null if nulls_last else or_(sort_column.isnot(None), after_null)
+
+    keyset = tuple_(sort_column, id_column)
+    bound = tuple_(literal(value, type_=sort_column.type), id_bound)
+    after = keyset > bound if ascending else keyset < bound
+    # A row comparison with a NULL is never true, so the NULLs still to come are added back.
+    return or_(after, sort_column.is_(None)) if nullable and nulls_last else after
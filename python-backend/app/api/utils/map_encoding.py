@@ -0,0 +1,106 @@
+import json
+import struct
+import sys
+from array import array
+
+MAP_JSON_MIMETYPE = 'application/json'
+MAP_TEXT_MIMETYPE = 'text/vnd.mds.mine-map'
+MAP_BINARY_MIMETYPE = 'application/vnd.mds.mine-map'
+MAP_MIMETYPES = [MAP_JSON_MIMETYPE, MAP_TEXT_MIMETYPE, MAP_BINARY_MIMETYPE]
+
+# Latitudes and longitudes are stored with 7 decimals, so they fit exactly in an int32 once
+# multiplied by 10^7 (|longitude| <= 180 * 10^7 < 2^31).
+COORDINATE_SCALE = 10**7
+
+MAP_TEXT_COLUMNS = ['mine_guid', 'mine_name', 'mine_no', 'latitude', 'longitude']
+MAP_BINARY_MAGIC = b'MDSM'
+MAP_BINARY_VERSION = 1
+# magic, version, reserved, record count: 12 bytes, so the int32 arrays stay 4-byte aligned.
+MAP_BINARY_HEADER = struct.Struct('<4sHHI')
+STRING_LENGTH = struct.Struct('<I')
+
+
+def map_json_mines(rows):
+    """One MineMapViewLocation.json_for_map() dict per map row."""
+    return [{
+        'mine_guid': str(mine_guid),
+        'mine_name': str(mine_name),
+        'mine_no': str(mine_no),
+        'mine_location': {
+            'latitude': str(latitude),
+            'longitude': str(longitude)
+        }
+    } for mine_guid, mine_name, mine_no, latitude, longitude in rows]
+
+
+def encode_map_json(rows):
+    """The original one-object-per-mine JSON document, built from map rows."""
+    return json.dumps({'mines': map_json_mines(rows)}, separators=(',', ':'))
+
+
+def encode_map_text(rows):
+    """
+    Columnar, tab-delimited text: one line per column, starting with the column name. The
+    coordinates are fixed-point integers (value * COORDINATE_SCALE).
+    """
+    columns = [[name] for name in MAP_TEXT_COLUMNS]
+    for mine_guid, mine_name, mine_no, latitude, longitude in rows:
+        columns[0].append(str(mine_guid))
+        columns[1].append(_text_value(mine_name))
+        columns[2].append(_text_value(mine_no))
+        columns[3].append(str(_fixed_point(latitude)))
+        columns[4].append(str(_fixed_point(longitude)))
+    return '\n'.join('\t'.join(column) for column in columns)
+
+
+def encode_map_binary(rows):
+    """
+    Typed, little-endian binary buffer:
+
+    header (MAP_BINARY_HEADER), count * 16 bytes of mine_guid, count int32 latitudes,
+    count int32 longitudes, then the mine names and the mine numbers as NUL separated UTF-8,
+    each prefixed by its uint32 byte length.
+    """
+    guids = bytearray()
+    latitudes = array('i')
+    longitudes = array('i')
+    names = []
+    mine_nos = []
+    for mine_guid, mine_name, mine_no, latitude, longitude in rows:
+        guids += mine_guid.bytes
+        latitudes.append(_fixed_point(latitude))
+        longitudes.append(_fixed_point(longitude))
+        names.append(mine_name or '')
+        mine_nos.append(mine_no or '')
+
+    if sys.byteorder == 'big':
+        latitudes.byteswap()
+        longitudes.byteswap()
+
+    buffer = bytearray(
+        MAP_BINARY_HEADER.pack(MAP_BINARY_MAGIC, MAP_BINARY_VERSION, 0, len(latitudes)))
+    buffer += guids
+    buffer += latitudes.tobytes()
+    buffer += longitudes.tobytes()
+    for strings in (names, mine_nos):
+        encoded = '\0'.join(strings).encode('utf-8')
+        buffer += STRING_LENGTH.pack(len(encoded))
+        buffer += encoded
+    return bytes(buffer)
+
+
+MAP_ENCODERS = {
+    MAP_JSON_MIMETYPE: encode_map_json,
+    MAP_TEXT_MIMETYPE: encode_map_text,
+    MAP_BINARY_MIMETYPE: encode_map_binary,
+}
+
+
+def _fixed_point(coordinate):
+    return int(coordinate * COORDINATE_SCALE)
+
+
+def _text_value(value):
+    if value is None:
+        return ''
+    return value.replace('\t', ' ').replace('\n', ' ')
@@ -0,0 +1,40 @@
+import math
+
+# Tiles use the usual web map (slippy map) z/x/y numbering over Web Mercator.
+MAX_TILE_ZOOM = 18
+# Up to this zoom level a tile returns clusters of mines instead of the mines themselves.
+MAX_CLUSTER_ZOOM = 11
+# Clusters are counted on a CLUSTER_GRID x CLUSTER_GRID grid over each tile.
+CLUSTER_GRID = 8
+
+
+def is_valid_tile(z, x, y):
+    return 0 <= z <= MAX_TILE_ZOOM and 0 <= x < 2**z and 0 <= y < 2**z
+
+
+def tile_bounds(z, x, y):
+    """Returns the (west, south, east, north) longitude/latitude bounds of a tile."""
+    return (_tile_longitude(x, z), _tile_latitude(y + 1, z), _tile_longitude(x + 1, z),
+            _tile_latitude(y, z))
+
+
+def tile_containing(latitude, longitude, z):
+    """Returns the (x, y) of the tile containing a point at zoom level z."""
+    tiles = 2**z
+    latitude = max(min(float(latitude), 85.0511287), -85.0511287)
+    x = int((float(longitude) + 180.0) / 360.0 * tiles)
+    y = int((1.0 - math.asinh(math.tan(math.radians(latitude))) / math.pi) / 2.0 * tiles)
+    return min(max(x, 0), tiles - 1), min(max(y, 0), tiles - 1)
+
+
+def tiles_containing(latitude, longitude):
+    """Returns the (z, x, y) of every tile, at every zoom level, that contains a point."""
+    return [(z, *tile_containing(latitude, longitude, z)) for z in range(MAX_TILE_ZOOM + 1)]
+
+
+def _tile_longitude(x, z):
+    return x / 2**z * 360.0 - 180.0
+
+
+def _tile_latitude(y, z):
+    return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / 2**z))))
@@ -35,7 +35,7 @@ def ensure_constrained(query):
             # if model includes mine_guid, apply filter on mine_guid.
             if hasattr(cls, 'mine_guid') and query._user_bound:
                 query = query.enable_assertions(False).filter(
-                    cls.mine_guid.in_(user_security.mine_ids))
+                    user_security.mine_access_condition(cls.mine_guid))
 
     return query
 
@@ -1,4 +1,5 @@
-from sqlalchemy import desc, or_, func
+from sqlalchemy import desc, or_, func, case, literal, select, null, false, not_, inspect
+from sqlalchemy.sql.util import find_columns
 from app.extensions import db
 
 from app.api.mines.mine.models.mine import Mine
@@ -6,6 +7,7 @@ from app.api.parties.party.models.party import Party
 from app.api.mines.permits.permit.models.permit import Permit
 from app.api.documents.mines.models.mine_document import MineDocument
 from app.api.mines.permits.permit_amendment.models.permit_amendment_document import PermitAmendmentDocument
+from app.api.search.search.models.search_document import SearchDocument
 
 common_search_targets = {
     'mine': {
@@ -91,52 +93,221 @@ full_additional_search_targets = {
     }
 }
 
+# Fuzzy-only matches (no substring hit) rank below substring matches of the same similarity.
+FUZZY_MATCH_WEIGHT = 0.5
+
 simple_search_targets = dict(**common_search_targets, **simple_additional_search_targets)
 search_targets = dict(**common_search_targets, **full_additional_search_targets)
 
+# How each search target is copied into the search_document table. Every type is keyed by its
+# search target name and owns one document per source row.
+search_document_sources = {
+    'mine': {
+        'model': Mine,
+        'guid': Mine.mine_guid,
+        'display_value': Mine.mine_name,
+        'search_text': [Mine.mine_name, Mine.mine_no],
+        'mine_guid': Mine.mine_guid,
+        'deleted_ind': Mine.deleted_ind,
+    },
+    'party': {
+        'model': Party,
+        'guid': Party.party_guid,
+        'display_value': func.concat(Party.first_name, ' ', Party.party_name),
+        'search_text': [Party.first_name, Party.party_name, Party.email, Party.phone_no],
+        'mine_guid': null(),
+        'deleted_ind': Party.deleted_ind,
+    },
+    'permit': {
+        'model': Permit,
+        'guid': Permit.permit_guid,
+        'display_value': Permit.permit_no,
+        'search_text': [Permit.permit_no],
+        'mine_guid': Permit.mine_guid,
+        'deleted_ind': false(),
+    },
+    'mine_documents': {
+        'model': MineDocument,
+        'guid': MineDocument.mine_document_guid,
+        'display_value': MineDocument.document_name,
+        'search_text': [MineDocument.document_name],
+        'mine_guid': MineDocument.mine_guid,
+        'deleted_ind': not_(MineDocument.active_ind),
+    },
+    'permit_documents': {
+        'model': PermitAmendmentDocument,
+        'guid': PermitAmendmentDocument.permit_amendment_document_guid,
+        'display_value': PermitAmendmentDocument.document_name,
+        'search_text': [PermitAmendmentDocument.document_name],
+        'mine_guid': PermitAmendmentDocument.mine_guid,
+        'deleted_ind': not_(PermitAmendmentDocument.active_ind),
+    },
+}
+
+
 def append_result(search_results, search_term, type, item, id_field, value_field, score_multiplier):
+    value = getattr(item, value_field)
+    search_results.append(
+        SearchResult(
+            getattr(item, 'score') * _score_multiplier(value, search_term, score_multiplier),
+            type, {
+                'id': getattr(item, id_field),
+                'value': value
+            }))
 
+
+def _score_multiplier(value, search_term, score_multiplier):
     # Find matches that start with the search term and apply a multiplier
-    if getattr(item, value_field).lower().startswith(search_term.lower()):
+    if value.lower().startswith(search_term.lower()):
         score_multiplier = score_multiplier * 3
 
     # Find matches that exactly match the search term and apply a multiplier
-    if getattr(item, value_field).lower() == search_term.lower():
+    if value.lower() == search_term.lower():
         score_multiplier = score_multiplier * 10
 
-    search_results.append(
-        SearchResult(
-            getattr(item, 'score') * score_multiplier, type, {
-                'id': getattr(item, id_field),
-                'value': getattr(item, value_field)
-            }))
+    return score_multiplier
+
+
+def _match_and_score(term, column):
+    """
+    Returns the trigram-indexable match conditions of a term against a column and its score.
+    A substring match (ILIKE) scores its similarity; a fuzzy-only word match (<%) scores its word
+    similarity, weighted down.
+    """
+    substring_match = column.ilike(f'%{term}%')
+    # '<%' (word similarity) is doubled because psycopg2 treats % as a parameter marker.
+    fuzzy_match = literal(term).op('<%%')(column)
+    score = case([(substring_match, func.similarity(column, term)),
+                  (fuzzy_match, func.word_similarity(term, column) * FUZZY_MATCH_WEIGHT)],
+                 else_=0)
+    return [substring_match, fuzzy_match], score
+
+
+def search_documents(search_term, search_terms, type_configs, limit_per_type=50):
+    """
+    Runs the search against the search_document table: one indexed query ranks every requested
+    type at once and keeps the best limit_per_type documents of each.
+    """
+    search_terms = [term for term in search_terms if len(term) > 2]
+    if not search_terms:
+        return []
+
+    match_conditions = []
+    term_scores = []
+    for term in search_terms:
+        conditions, score = _match_and_score(term, SearchDocument.search_text)
+        match_conditions.extend(conditions)
+        term_scores.append(score)
+    score = sum(term_scores[1:], term_scores[0]) + func.ts_rank(
+        SearchDocument.search_vector, func.plainto_tsquery('simple', ' '.join(search_terms)))
+
+    # Targets without a deleted indicator have always been searched in full.
+    not_deleted = SearchDocument.deleted_ind == False
+    types_without_deleted_ind = [
+        type for type, type_config in type_configs.items() if not type_config['has_deleted_ind']
+    ]
+    if types_without_deleted_ind:
+        not_deleted = or_(not_deleted,
+                          SearchDocument.search_document_type.in_(types_without_deleted_ind))
+
+    ranked = db.session.query(
+        SearchDocument.search_document_type, SearchDocument.search_document_guid,
+        SearchDocument.display_value, SearchDocument.mine_guid,
+        score.label('score'),
+        func.row_number().over(
+            partition_by=SearchDocument.search_document_type,
+            order_by=desc(score)).label('rank')).filter(
+                SearchDocument.search_document_type.in_(type_configs.keys()), not_deleted,
+                or_(*match_conditions)).subquery()
+    documents = db.session.query(ranked).filter(ranked.c.rank <= limit_per_type).all()
+
+    search_results = []
+    for document in documents:
+        type = document.search_document_type
+        type_config = type_configs[type]
+        # Targets identified by mine_guid (e.g. permits in the simple search) point to their mine.
+        id = document.mine_guid if type_config['id_field'] == 'mine_guid' else document.search_document_guid
+        search_results.append(
+            SearchResult(
+                document.score * _score_multiplier(document.display_value, search_term,
+                                                   type_config['score_multiplier']), type, {
+                                                       'id': id,
+                                                       'value': document.display_value
+                                                   }))
+    return search_results
+
+
+def search_document_select(type):
+    """Selects the search documents of a type from its source table, in SearchDocument column order."""
+    source = search_document_sources[type]
+    search_text = func.concat_ws(' ', *source['search_text'])
+    return select([
+        literal(type), source['guid'], source['display_value'], search_text,
+        func.to_tsvector('simple', search_text), source['mine_guid'], source['deleted_ind']
+    ])
+
+
+def rebuild_search_documents():
+    """Replaces the content of search_document with a fresh copy of every search target."""
+    db.session.execute(SearchDocument.__table__.delete())
+    counts = {}
+    for type in search_document_sources:
+        result = db.session.execute(SearchDocument.upsert_from_select(search_document_select(type)))
+        counts[type] = result.rowcount
+    db.session.commit()
+    return counts
+
+
+def _searched_attributes(type):
+    """The keys of the source model attributes that the search document of a type is built from."""
+    source = search_document_sources[type]
+    mapper = inspect(source['model'])
+    columns = set()
+    for expression in [
+            source['guid'], source['display_value'], *source['search_text'], source['mine_guid'],
+            source['deleted_ind']
+    ]:
+        if hasattr(expression, '__clause_element__'):
+            expression = expression.__clause_element__()
+        columns.update(find_columns(expression))
+    return [mapper.get_property_by_column(column).key for column in columns]
+
+
+def _refresh_search_document(type, searched_attributes=None):
+    def listener(mapper, connection, target):
+        # Updates are flushed for every dirty object; only a change of a searched field is copied.
+        if searched_attributes is not None:
+            attrs = inspect(target).attrs
+            if not any(attrs[key].history.has_changes() for key in searched_attributes):
+                return
+
+        # The document is rebuilt from the flushed source row so server-side defaults are included.
+        primary_key_filter = [
+            column == value
+            for column, value in zip(mapper.primary_key, mapper.primary_key_from_instance(target))
+        ]
+        connection.execute(
+            SearchDocument.upsert_from_select(
+                search_document_select(type).where(db.and_(*primary_key_filter))))
 
+    return listener
 
-def execute_search(app, search_results, search_term, search_terms, type, type_config, limit_results=None):
-    with app.app_context():
-        for term in search_terms:
-            if len(term) > 2:
-                for column in type_config['columns_to_search']:
 
-                    # Query should return with the calculated column "score", as well as the columns defined in the configuration 
-                    similarity = db.session.query(type_config['model']).with_entities(
-                        func.similarity(column, term).label('score'),
-                        *type_config['entities_to_return']).filter(column.ilike(f'%{term}%'))
+def _delete_search_document(type):
+    def listener(mapper, connection, target):
+        guid = inspect(target).dict.get(search_document_sources[type]['guid'].key)
+        if guid:
+            connection.execute(SearchDocument.delete_document(type, guid))
 
-                    if type_config['has_deleted_ind']:
-                        similarity = similarity.filter_by(deleted_ind=False)
+    return listener
 
-                    similarity = similarity.order_by(desc(func.similarity(column, term)))
-                    
-                    if limit_results:
-                        similarity = similarity.limit(limit_results)
 
-                    similarity = similarity.all()
+for type, source in search_document_sources.items():
+    db.event.listen(source['model'], 'after_insert', _refresh_search_document(type))
+    db.event.listen(source['model'], 'after_update',
+                    _refresh_search_document(type, _searched_attributes(type)))
+    db.event.listen(source['model'], 'after_delete', _delete_search_document(type))
 
-                    for item in similarity:
-                        append_result(search_results, search_term, type, item,
-                                      type_config['id_field'], type_config['value_field'],
-                                      type_config['score_multiplier'])
 
 class SearchResult:
     def __init__(self, score, type, result):
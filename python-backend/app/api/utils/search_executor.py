@@ -0,0 +1,155 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from app.extensions import db
+
+
+class SearchExecutor:
+    """
+    A process-wide thread pool for the search queries.
+
+    Every search request shares the same workers and the same budget of database connections, so
+    concurrent searches queue for a connection instead of draining the SQLAlchemy pool used by the
+    other endpoints. A request runs at most SEARCH_REQUEST_CONCURRENCY queries at once, each
+    query is bounded by a statement timeout and the request itself by SEARCH_REQUEST_TIMEOUT_MS,
+    after which the tasks still queued are cancelled, the ones still running are counted as timed
+    out, and the results already in are returned.
+    """
+
+    def __init__(self, app=None):
+        self._executor = None
+        self._connection_slots = None
+        self._metrics_lock = threading.Lock()
+        self._metrics = {}
+        self.reset_metrics()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_workers = int(app.config['SEARCH_EXECUTOR_WORKERS'])
+        self.connection_budget = int(app.config['SEARCH_DB_CONNECTION_BUDGET'])
+        self.request_concurrency = int(app.config['SEARCH_REQUEST_CONCURRENCY'])
+        self.query_timeout_ms = int(app.config['SEARCH_QUERY_TIMEOUT_MS'])
+        self.request_timeout_ms = int(app.config['SEARCH_REQUEST_TIMEOUT_MS'])
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix='search')
+        self._connection_slots = threading.BoundedSemaphore(self.connection_budget)
+
+    def run(self, app, tasks):
+        """
+        Runs the tasks (callables returning a list of results) with an app context and a
+        database connection each, and returns their concatenated results.
+        """
+        deadline = time.monotonic() + self.request_timeout_ms / 1000
+        cancelled = threading.Event()
+        pending_tasks = list(tasks)
+        running = set()
+        results = []
+
+        self._increment('requests')
+        try:
+            while pending_tasks or running:
+                while pending_tasks and len(running) < self.request_concurrency:
+                    task = pending_tasks.pop(0)
+                    running.add(
+                        self._executor.submit(self._run_task, app, cancelled, deadline, task))
+                    self._increment('tasks_submitted')
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, running = wait(running, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        task_results = future.result()
+                    except Exception as exc:
+                        self._increment('tasks_failed')
+                        app.logger.error(f'search task failed: {exc}')
+                    else:
+                        if task_results is not None:
+                            results.extend(task_results)
+                            self._increment('tasks_completed')
+        finally:
+            # Queued tasks never start and running ones stop before their query. A task already
+            # running its query cannot be cancelled: it is left to finish, past the deadline.
+            cancelled.set()
+            cancelled_count = len(pending_tasks)
+            timed_out_count = 0
+            for future in running:
+                if future.cancel():
+                    cancelled_count += 1
+                else:
+                    timed_out_count += 1
+            if cancelled_count:
+                self._increment('tasks_cancelled', cancelled_count)
+            if timed_out_count:
+                self._increment('tasks_timed_out', timed_out_count)
+            if cancelled_count or timed_out_count:
+                app.logger.warning(
+                    f'search deadline reached, {cancelled_count} search queries were cancelled '
+                    f'and {timed_out_count} timed out')
+
+        return results
+
+    def _run_task(self, app, cancelled, deadline, task):
+        if cancelled.is_set():
+            return None
+
+        wait_start = time.monotonic()
+        acquired = self._connection_slots.acquire(timeout=max(deadline - wait_start, 0))
+        self._record_wait('budget_wait', time.monotonic() - wait_start)
+        if not acquired:
+            self._increment('budget_exhausted')
+            return None
+
+        try:
+            if cancelled.is_set():
+                return None
+            with app.app_context():
+                checkout_start = time.monotonic()
+                db.session.connection()
+                self._record_wait('pool_wait', time.monotonic() - checkout_start)
+                # SET does not take bind parameters; the timeout is an int from the config.
+                # The setting ends with the transaction, which the app context teardown closes.
+                db.session.execute(f'SET LOCAL statement_timeout = {self.query_timeout_ms}')
+                return task()
+        finally:
+            self._connection_slots.release()
+
+    def metrics(self):
+        """A snapshot of the executor counters and of the connection wait times, in seconds."""
+        with self._metrics_lock:
+            return dict(self._metrics)
+
+    def reset_metrics(self):
+        with self._metrics_lock:
+            self._metrics = {
+                'requests': 0,
+                'tasks_submitted': 0,
+                'tasks_completed': 0,
+                'tasks_failed': 0,
+                'tasks_cancelled': 0,
+                'tasks_timed_out': 0,
+                'budget_exhausted': 0,
+                'budget_wait_seconds_total': 0.0,
+                'budget_wait_seconds_max': 0.0,
+                'pool_wait_seconds_total': 0.0,
+                'pool_wait_seconds_max': 0.0,
+            }
+
+    def _increment(self, name, value=1):
+        with self._metrics_lock:
+            self._metrics[name] += value
+
+    def _record_wait(self, name, seconds):
+        with self._metrics_lock:
+            self._metrics[f'{name}_seconds_total'] += seconds
+            self._metrics[f'{name}_seconds_max'] = max(self._metrics[f'{name}_seconds_max'],
+                                                       seconds)
+
+
+search_executor = SearchExecutor()
@@ -0,0 +1,216 @@
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of calling a host whose circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures, so calls fail fast for `reset_seconds`.
+    After that one trial call is let through: it closes the breaker if it succeeds and opens it
+    again if it fails.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold, reset_seconds):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def allow(self):
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    def end_trial(self):
+        with self._lock:
+            self._trial_running = False
+
+    def _state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return self.HALF_OPEN
+        return self.OPEN
+
+
+class ServiceClient:
+    """
+    The HTTP client for the services this API calls (NRIS, the document manager).
+
+    A single requests Session keeps a pool of keep-alive connections per host, every call gets
+    the default connect and read timeouts unless it passes its own, idempotent calls are retried
+    with a backoff on connection errors and 502/503/504 responses, and each host has a circuit
+    breaker so that a service that is down fails fast instead of holding request threads for the
+    whole timeout. The session never stores cookies: cookies forwarded from a client request are
+    passed per call and must not leak into the next one.
+    """
+
+    RETRY_STATUSES = (502, 503, 504)
+
+    def __init__(self, app=None):
+        self._session = None
+        self._breakers = {}
+        self._lock = threading.Lock()
+        self._metrics = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.timeout = (float(app.config['SERVICE_CLIENT_CONNECT_TIMEOUT']),
+                        float(app.config['SERVICE_CLIENT_READ_TIMEOUT']))
+        self.retries = int(app.config['SERVICE_CLIENT_RETRIES'])
+        self.backoff_factor = float(app.config['SERVICE_CLIENT_BACKOFF_FACTOR'])
+        self.pool_size = int(app.config['SERVICE_CLIENT_POOL_SIZE'])
+        self.breaker_failures = int(app.config['SERVICE_CLIENT_BREAKER_FAILURES'])
+        self.breaker_reset_seconds = float(app.config['SERVICE_CLIENT_BREAKER_RESET_SECONDS'])
+
+        if self._session is not None:
+            self._session.close()
+        self._session = self._create_session()
+        with self._lock:
+            self._breakers = {}
+            self._metrics = {}
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def request(self, method, url, **kwargs):
+        """
+        Sends a request through the pooled session. Connection errors, timeouts and 5xx responses
+        count as failures of the host; 4xx responses are returned like any other response.
+
+        :raises CircuitOpenError: when the host's circuit breaker is open
+        """
+        host = urlsplit(url).netloc
+        breaker = self._breaker(host)
+        if not breaker.allow():
+            self._increment(host, 'rejected')
+            raise CircuitOpenError(f'The circuit breaker for {host} is open.')
+
+        kwargs.setdefault('timeout', self.timeout)
+        start = time.perf_counter()
+        try:
+            response = self._session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            breaker.record_failure()
+            self._increment(host, 'failures', time.perf_counter() - start)
+            raise
+        else:
+            if response.status_code >= 500:
+                breaker.record_failure()
+                self._increment(host, 'failures', time.perf_counter() - start)
+            else:
+                breaker.record_success()
+                self._increment(host, 'requests', time.perf_counter() - start)
+            return response
+        finally:
+            # Whatever else the call raised, a trial call is over and the next one may go through.
+            breaker.end_trial()
+
+    def breaker_state(self, url):
+        return self._breaker(urlsplit(url).netloc).state
+
+    def metrics(self):
+        """Per host: requests, failures, rejected calls, time spent, connections opened."""
+        pools = self._pools()
+        with self._lock:
+            return {
+                host: {
+                    **totals, 'state': self._breakers[host].state,
+                    'connections_opened': self._connections_opened(pools, host)
+                }
+                for host, totals in self._metrics.items()
+            }
+
+    def _create_session(self):
+        session = requests.Session()
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        retry = Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=self.retries,
+            status=self.retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=self.RETRY_STATUSES,
+            raise_on_status=False)
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=retry)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _pools(self):
+        pools = []
+        for adapter in set(self._session.adapters.values()):
+            pool_manager = adapter.poolmanager
+            pools.extend(pool_manager.pools[key] for key in pool_manager.pools.keys())
+        return pools
+
+    def _connections_opened(self, pools, host):
+        # The metrics are keyed by the netloc of the urls, which only has a port when one is set.
+        address = urlsplit(f'//{host}')
+        return sum(pool.num_connections for pool in pools
+                   if pool.host == address.hostname and address.port in (None, pool.port))
+
+    def _breaker(self, host):
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker(self.breaker_failures, self.breaker_reset_seconds)
+                self._breakers[host] = breaker
+            return breaker
+
+    def _increment(self, host, counter, seconds=0.0):
+        with self._lock:
+            totals = self._metrics.setdefault(host, {
+                'requests': 0,
+                'failures': 0,
+                'rejected': 0,
+                'seconds': 0.0
+            })
+            totals[counter] += 1
+            totals['seconds'] += seconds
+
+
+service_client = ServiceClient()
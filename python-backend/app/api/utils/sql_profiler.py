@@ -0,0 +1,158 @@
+import heapq
+import threading
+import time
+
+from flask import g, request, has_request_context, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class RequestProfile:
+    """The SQL statements of one request: their count, total time and the slowest ones."""
+
+    def __init__(self, slowest_size):
+        self.start = time.perf_counter()
+        self.statement_count = 0
+        self.db_time = 0.0
+        self.slowest = []
+        self._slowest_size = slowest_size
+
+    def record(self, statement, duration):
+        self.statement_count += 1
+        self.db_time += duration
+        entry = (duration, statement)
+        if len(self.slowest) < self._slowest_size:
+            heapq.heappush(self.slowest, entry)
+        elif duration > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+    def slowest_statements(self):
+        return sorted(self.slowest, reverse=True)
+
+
+class SqlProfiler:
+    """
+    Counts the SQL statements and the database time of every request through the SQLAlchemy
+    cursor events. Statements slower than SQL_PROFILER_SLOW_QUERY_MS are logged, the totals are
+    returned in a Server-Timing header when SQL_PROFILER_SERVER_TIMING is on, and aggregates per
+    endpoint are kept in memory for the /metrics endpoint.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config['SQL_PROFILER_ENABLED'] == '1'
+        self.server_timing = app.config['SQL_PROFILER_SERVER_TIMING'] == '1'
+        self.slow_query_seconds = int(app.config['SQL_PROFILER_SLOW_QUERY_MS']) / 1000
+        self.slowest_size = int(app.config['SQL_PROFILER_SLOWEST'])
+        if not self.enabled:
+            return
+
+        if not self._listening:
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+            event.listen(Engine, 'handle_error', self._handle_error)
+            self._listening = True
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def metrics(self):
+        """Per endpoint: requests, statements, database and request time, slowest statements."""
+        with self._lock:
+            return {
+                endpoint: {
+                    **{key: value
+                       for key, value in totals.items() if key != 'slowest'},
+                    'slowest': [{
+                        'duration_ms': round(duration * 1000, 3),
+                        'statement': statement
+                    } for duration, statement in sorted(totals['slowest'], reverse=True)]
+                }
+                for endpoint, totals in self._endpoints.items()
+            }
+
+    def reset_metrics(self):
+        with self._lock:
+            self._endpoints = {}
+
+    def _before_request(self):
+        g.sql_profile = RequestProfile(self.slowest_size)
+
+    def _after_request(self, response):
+        profile = g.pop('sql_profile', None)
+        if profile is None:
+            return response
+
+        request_time = time.perf_counter() - profile.start
+        self._aggregate(request.endpoint or 'unknown', profile, request_time)
+
+        if self.server_timing:
+            timings = [
+                f'db;dur={profile.db_time * 1000:.1f};desc="{profile.statement_count} statements"',
+                f'app;dur={(request_time - profile.db_time) * 1000:.1f}'
+            ]
+            timings.extend(f'sql-{index};dur={duration * 1000:.1f}'
+                           for index, (duration, _) in enumerate(profile.slowest_statements(), 1))
+            response.headers.add('Server-Timing', ', '.join(timings))
+        return response
+
+    def _aggregate(self, endpoint, profile, request_time):
+        with self._lock:
+            totals = self._endpoints.setdefault(
+                endpoint, {
+                    'requests': 0,
+                    'statements': 0,
+                    'max_statements': 0,
+                    'db_seconds': 0.0,
+                    'request_seconds': 0.0,
+                    'max_request_seconds': 0.0,
+                    'slowest': []
+                })
+            totals['requests'] += 1
+            totals['statements'] += profile.statement_count
+            totals['max_statements'] = max(totals['max_statements'], profile.statement_count)
+            totals['db_seconds'] += profile.db_time
+            totals['request_seconds'] += request_time
+            totals['max_request_seconds'] = max(totals['max_request_seconds'], request_time)
+            totals['slowest'] = heapq.nlargest(self.slowest_size,
+                                               totals['slowest'] + profile.slowest)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('sql_profiler_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('sql_profiler_start')
+        if not starts:
+            return
+        duration = time.perf_counter() - starts.pop()
+
+        # Statements run outside of a request (scheduled jobs, search executor threads, the
+        # CLI) are not attributed to any endpoint.
+        if not has_request_context():
+            return
+        profile = g.get('sql_profile')
+        if profile is None:
+            return
+        profile.record(statement, duration)
+        if duration > self.slow_query_seconds:
+            current_app.logger.warning(
+                f'Slow SQL statement ({duration * 1000:.0f} ms) on {request.endpoint}: {statement}'
+            )
+
+    def _handle_error(self, exception_context):
+        # A statement that raised never reaches after_cursor_execute: drop its start time, or the
+        # connection would carry it to the next statement run on it.
+        conn = exception_context.connection
+        if conn is None or exception_context.cursor is None:
+            return
+        starts = conn.info.get('sql_profiler_start')
+        if starts:
+            starts.pop()
+
+
+sql_profiler = SqlProfiler()
@@ -0,0 +1,50 @@
+import base64
+import binascii
+import hashlib
+
+from app.api.constants import TUS_CHECKSUM_ALGORITHMS
+
+# Bytes read from the request and written to the file at a time.
+DEFAULT_BLOCK_SIZE = 256 * 1024
+
+
+def parse_upload_checksum(header):
+    """
+    The algorithm and digest of a TUS Upload-Checksum header, "<algorithm> <base64 digest>".
+
+    :raises ValueError: if the header is malformed or names an algorithm that is not supported
+    """
+    algorithm, _, encoded = header.strip().partition(' ')
+    if algorithm not in TUS_CHECKSUM_ALGORITHMS:
+        raise ValueError(f'Unsupported checksum algorithm: {algorithm}')
+    try:
+        return algorithm, base64.b64decode(encoded.strip(), validate=True)
+    except binascii.Error:
+        raise ValueError('The checksum is not valid base64')
+
+
+def write_chunk(stream, file_path, offset, length, checksum=None, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Copies up to `length` bytes of `stream` into the file at `offset`, one block at a time, so an
+    upload holds a single block in memory whatever the size of its chunks. When a checksum is
+    given, the chunk is hashed as it is written.
+
+    :param checksum: the (algorithm, digest) of the chunk, from parse_upload_checksum
+    :return: the bytes written, and whether they match the checksum, True when there is none
+    """
+    digest = hashlib.new(checksum[0]) if checksum else None
+    written = 0
+    with open(file_path, 'r+b') as f:
+        f.seek(offset)
+        while written < length:
+            block = stream.read(min(block_size, length - written))
+            if not block:
+                # The client went away before sending the whole chunk.
+                break
+            f.write(block)
+            if digest:
+                digest.update(block)
+            written += len(block)
+
+    matches = digest is None or (written == length and digest.digest() == checksum[1])
+    return written, matches
@@ -1,15 +1,17 @@
-from flask_restplus import Resource
+from flask_restplus import Resource, marshal
 from flask import request
 from sqlalchemy_filters import apply_pagination, apply_filters
 from sqlalchemy import desc
+from werkzeug.exceptions import BadRequest
 
 from app.extensions import api
 
 from ..models.variance import Variance
 from ..models.variance_application_status_code import VarianceApplicationStatusCode
-from ..response_models import PAGINATED_VARIANCE_LIST
+from ..response_models import PAGINATED_VARIANCE_LIST, KEYSET_PAGINATED_VARIANCE_LIST
 from ...utils.access_decorators import requires_any_of, VIEW_ALL
 from ...utils.resources_mixins import UserMixin, ErrorMixin
+from ...utils.keyset_pagination import is_keyset_request, include_total_requested, apply_keyset_pagination
 
 PAGE_DEFAULT = 1
 PER_PAGE_DEFAULT = 25
@@ -23,10 +25,33 @@ class VarianceResource(Resource, UserMixin, ErrorMixin):
             'per_page': f'The number of records to return per page. Default: {PER_PAGE_DEFAULT}',
             'variance_application_status_code':
             'Comma-separated list of code statuses to include in results. Default: All status codes.',
+            'cursor':
+            'Opts into keyset pagination. Send it empty for the first page, then pass next_cursor or prev_cursor from the previous response. page is ignored.',
+            'include_total':
+            'enum[true, false] Default: true. Only used with cursor; false skips counting the total.',
         })
     @requires_any_of([VIEW_ALL])
-    @api.marshal_with(PAGINATED_VARIANCE_LIST, code=200)
+    @api.response(200, 'Success', PAGINATED_VARIANCE_LIST)
     def get(self):
+        # The cursor response carries next/prev cursors, so it is marshalled with its own model.
+        if is_keyset_request(request.args):
+            records, keyset_details = apply_keyset_pagination(
+                self._apply_filters(
+                    request.args.get('variance_application_status_code', type=str)),
+                Variance.received_date,
+                Variance.variance_guid,
+                cursor=request.args.get('cursor'),
+                page_size=request.args.get('per_page', PER_PAGE_DEFAULT, type=int),
+                sort_dir='desc',
+                include_total=include_total_requested(request.args))
+            return marshal({
+                'records': records,
+                'items_per_page': keyset_details.page_size,
+                'total': keyset_details.total_results,
+                'next_cursor': keyset_details.next_cursor,
+                'prev_cursor': keyset_details.prev_cursor,
+            }, KEYSET_PAGINATED_VARIANCE_LIST)
+
         records, pagination_details = self._apply_filters_and_pagination(
             page_number=request.args.get('page', PAGE_DEFAULT, type=int),
             page_size=request.args.get('per_page', PER_PAGE_DEFAULT, type=int),
@@ -35,19 +60,25 @@ class VarianceResource(Resource, UserMixin, ErrorMixin):
         if not records:
             raise BadRequest('Unable to fetch variances.')
 
-        return {
+        return marshal({
             'records': records.all(),
             'current_page': pagination_details.page_number,
             'total_pages': pagination_details.num_pages,
             'items_per_page': pagination_details.page_size,
             'total': pagination_details.total_results,
-        }
+        }, PAGINATED_VARIANCE_LIST)
 
 
     def _apply_filters_and_pagination(self,
                                       page_number=PAGE_DEFAULT,
                                       page_size=PER_PAGE_DEFAULT,
                                       application_status=None):
+        filtered_query = self._apply_filters(application_status).order_by(
+            desc(Variance.received_date))
+
+        return apply_pagination(filtered_query, page_number, page_size)
+
+    def _apply_filters(self, application_status=None):
         status_filter_values = list(map(
             lambda x: x.variance_application_status_code,
             VarianceApplicationStatusCode.active()))
@@ -55,12 +86,10 @@ class VarianceResource(Resource, UserMixin, ErrorMixin):
         if application_status is not None:
             status_filter_values = application_status.split(',')
 
-        filtered_query = apply_filters(
-            Variance.query.order_by(desc(Variance.received_date)),
+        return apply_filters(
+            Variance.query,
             [{
                 'field': 'variance_application_status_code',
                 'op': 'in',
                 'value': status_filter_values
             }])
-
-        return apply_pagination(filtered_query, page_number, page_size)
@@ -46,6 +46,11 @@ PAGINATED_VARIANCE_LIST = api.inherit('VarianceList', PAGINATED_LIST, {
     'records': fields.List(fields.Nested(VARIANCE)),
 })
 
+KEYSET_PAGINATED_VARIANCE_LIST = api.inherit('VarianceKeysetList', PAGINATED_VARIANCE_LIST, {
+    'next_cursor': fields.String,
+    'prev_cursor': fields.String,
+})
+
 VARIANCE_APPLICATION_STATUS_CODE = api.model('VarianceApplicationStatusCode', {
     'variance_application_status_code': fields.String,
     'description': fields.String
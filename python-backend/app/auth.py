@@ -1,10 +1,13 @@
 from cached_property import cached_property
-from flask import g
+from flask import g, current_app
+from sqlalchemy import select, false
 from uuid import UUID
 from typing import Optional, Set
-from .api.utils.include.user_info import User
+from .api.utils.include.user_info import get_auth_context
 from .api.users.minespace.models.minespace_user import MinespaceUser
-from app.api.utils.access_decorators import MINESPACE_PROPONENT
+from .api.users.minespace.models.minespace_user_mine import MinespaceUserMine
+from .api.constants import MINESPACE_USER_MINE_ACCESS, TIMEOUT_60_MINUTES
+from app.extensions import cache
 
 # This is for use when the database models are being used outside of the context of a flask application.
 # Eg. Unit tests, create data.
@@ -27,51 +30,68 @@ class UserSecurity(object):
     def mine_ids(self) -> Set[UUID]:
         if not self.user_id:
             return []
-        return get_mine_access()
+        return get_mine_access(self.user_id)
 
     def get_permission(self, mine_id: UUID):
         return self.access.get(mine_id)
 
+    def mine_access_condition(self, mine_guid_column):
+        """
+        Restricts a mine_guid column to the mines of this user. By default this is a semi-join
+        against the user-mine mapping, so the statement is the same whatever the number of mines;
+        PROPONENT_SECURITY_MODE=in_list sends the (cached) mine ids instead.
+        """
+        if not self.user_id:
+            return false()
+        if current_app.config['PROPONENT_SECURITY_MODE'] == 'in_list':
+            return mine_guid_column.in_(self.mine_ids)
+        # The mapping table is never correlated, even when it is the queried table itself.
+        return mine_guid_column.in_(
+            select([MinespaceUserMine.mine_guid]).where(
+                MinespaceUserMine.user_id == self.user_id).correlate(None))
+
+
+def get_mine_access(user_id):
+    mine_ids = cache.get(MINESPACE_USER_MINE_ACCESS(user_id))
+    if mine_ids is None:
+        mine_ids = [
+            mine_guid for (mine_guid, ) in MinespaceUserMine.query.unbound_unsafe().with_entities(
+                MinespaceUserMine.mine_guid).filter_by(user_id=user_id)
+        ]
+        cache.set(MINESPACE_USER_MINE_ACCESS(user_id), mine_ids, timeout=TIMEOUT_60_MINUTES)
+    return mine_ids
+
 
-def get_mine_access():
-    user = get_current_user()
-    return list(x.mine_guid for x in user.mines)
+def clear_mine_access(user_id):
+    """Drops the cached mine access of a user; call it whenever the user's mines change."""
+    cache.delete(MINESPACE_USER_MINE_ACCESS(user_id))
 
 
 def get_current_user():
-    rv = getattr(g, 'current_user', None)
-    if rv == None:
-        email = get_user_email()
-        rv = MinespaceUser.query.unbound_unsafe().filter_by(email=email).filter_by(
-            deleted_ind=False).first()
-        g.current_user = rv
-    return rv
+    context = get_auth_context()
+    if context.minespace_user is None:
+        context.minespace_user = MinespaceUser.query.unbound_unsafe().filter_by(
+            email=context.email).filter_by(deleted_ind=False).first()
+    return context.minespace_user
 
 
 def get_user_is_proponent():
     # The flask-jwt-oidc library throws an exception if a token does not exist.
-    token_data = User().get_user_raw_info()
-    try:
-        is_proponent = MINESPACE_PROPONENT in token_data["realm_access"]["roles"]
-    except:
-        raise Exception("A JWT token exists, but no roles are defined.")
-    return is_proponent
+    return get_auth_context().is_proponent
 
 
 def get_user_email():
-    return User().get_user_email()
+    return get_auth_context().email
 
 
 def get_current_user_security():
-    rv = getattr(g, 'current_user_security', None)
-    if rv is None:
+    context = get_auth_context()
+    if context.user_security is None:
         user = get_current_user()
-        rv = UserSecurity(user_id=user.user_id if user else None)
-        g.current_user_security = rv
-    return rv
+        context.user_security = UserSecurity(user_id=user.user_id if user else None)
+    return context.user_security
 
 
 # For unit tests only
 def clear_cache():
-    g.current_user_security = None
-    g.current_user = None
+    g.auth_context = None
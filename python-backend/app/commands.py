@@ -21,11 +21,6 @@ def register_commands(app):
         from app.scheduled_jobs.IDIR_jobs import _import_empr_idir_users
         _import_empr_idir_users()
 
-    @app.cli.command()
-    def test_nris_api():
-        from app.api.services.NRIS_API_service import _get_NRIS_data_by_mine
-        print(_get_NRIS_data_by_mine("", "0100287"))
-
     @app.cli.command()
     @click.argument('num')
     @click.argument('threading', default=True)
@@ -75,6 +70,70 @@ def register_commands(app):
                 db.session.rollback()
                 raise
 
+    @app.cli.command()
+    @click.option('--repeat', default=5, help='Runs per scenario, the best time is reported.')
+    @click.option('--per-page', default=25)
+    @click.option('--page', default=1)
+    def benchmark_mine_filters(repeat, per_page, page):
+        """
+        Times the mine list filters against the previous INTERSECT/UNION queries and checks
+        that both return the same mines. Run `create_data` first to seed the database.
+        """
+        from app.scripts.benchmark_mine_filters import run_benchmark
+        User._test_mode = True
+        auth.apply_security = False
+        if not run_benchmark(repeat, per_page, page):
+            raise click.ClickException('Filtered results differ from the previous implementation.')
+
+    @app.cli.command()
+    @click.option('--max-terms', default=5, help='Benchmarks 1 to max-terms search terms.')
+    @click.option('--repeat', default=5, help='Runs per term count, the best time is reported.')
+    def benchmark_search(max_terms, repeat):
+        """Prints global search latency against the number of search terms."""
+        from app.scripts.benchmark_search import run_benchmark
+        run_benchmark(max_terms, repeat)
+
+    @app.cli.command()
+    @click.option('--repeat', default=3, help='Runs per encoding, the best time is reported.')
+    def benchmark_mine_map(repeat):
+        """Prints the size and serialization time of each /mines/map-list encoding."""
+        from app.scripts.benchmark_mine_map import run_benchmark
+        User._test_mode = True
+        auth.apply_security = False
+        run_benchmark(repeat, app.config['COMPRESS_LEVEL'])
+
+    @app.cli.command()
+    @click.option('--iterations', default=10000)
+    def benchmark_auth_context(iterations):
+        """Prints the per-query cost of the auth checks with and without the auth context."""
+        from app.scripts.benchmark_auth_context import run_benchmark
+        run_benchmark(app, iterations)
+
+    @app.cli.command()
+    @click.option('--requests', 'requests_count', default=200)
+    @click.option('--latency-ms', default=0, help='Latency added by the stub server.')
+    def benchmark_service_client(requests_count, latency_ms):
+        """Prints connections opened and latency of bare requests against the service client."""
+        from app.scripts.benchmark_service_client import run_benchmark
+        run_benchmark(app, requests_count, latency_ms)
+
+    @app.cli.command()
+    @click.option('--uploads', default=8, help='Concurrent uploads.')
+    @click.option('--chunks', default=4, help='Chunks per upload.')
+    @click.option('--chunk-mib', default=32)
+    def benchmark_document_upload(uploads, chunks, chunk_mib):
+        """Prints the peak memory and throughput of buffered against streamed chunk writes."""
+        from app.scripts.benchmark_document_upload import run_benchmark
+        run_benchmark(uploads, chunks, chunk_mib,
+                      int(app.config['DOCUMENT_UPLOAD_BLOCK_SIZE']))
+
+    @app.cli.command()
+    def rebuild_search_documents():
+        """Rebuilds the search_document table from the mines, contacts, permits and documents."""
+        from app.api.utils.search import rebuild_search_documents
+        for type, count in rebuild_search_documents().items():
+            print(f'Indexed {count} {type} search documents.')
+
     # if app.config.get('ENVIRONMENT_NAME') in ['test', 'prod']:
 
     @sched.app.cli.command()
@@ -68,6 +68,45 @@ class Config(object):
     UPLOADED_DOCUMENT_DEST = os.environ.get('UPLOADED_DOCUMENT_DEST', '/app/document_uploads')
     # 100MB file limit, temporarily increased to 400MB
     MAX_CONTENT_LENGTH = 400 * 1024 * 1024
+    # Bytes of an upload chunk read from the request and written to disk at a time
+    DOCUMENT_UPLOAD_BLOCK_SIZE = os.environ.get('DOCUMENT_UPLOAD_BLOCK_SIZE', str(256 * 1024))
+
+    # Shared executor of the per-target search queries; the connection budget keeps searches
+    # from taking more than a few of the pooled connections.
+    SEARCH_EXECUTOR_WORKERS = os.environ.get('SEARCH_EXECUTOR_WORKERS', '8')
+    SEARCH_DB_CONNECTION_BUDGET = os.environ.get('SEARCH_DB_CONNECTION_BUDGET', '4')
+    SEARCH_REQUEST_CONCURRENCY = os.environ.get('SEARCH_REQUEST_CONCURRENCY', '3')
+    SEARCH_QUERY_TIMEOUT_MS = os.environ.get('SEARCH_QUERY_TIMEOUT_MS', '5000')
+    SEARCH_REQUEST_TIMEOUT_MS = os.environ.get('SEARCH_REQUEST_TIMEOUT_MS', '10000')
+
+    # Rebuild the cached mine map in a background thread when mines change
+    MINE_MAP_BACKGROUND_REBUILD = os.environ.get('MINE_MAP_BACKGROUND_REBUILD', '1')
+
+    # SQL profiling: statements and database time per request, aggregated per endpoint at /metrics
+    SQL_PROFILER_ENABLED = os.environ.get('SQL_PROFILER_ENABLED', '1')
+    SQL_PROFILER_SERVER_TIMING = os.environ.get('SQL_PROFILER_SERVER_TIMING', '0')
+    SQL_PROFILER_SLOW_QUERY_MS = os.environ.get('SQL_PROFILER_SLOW_QUERY_MS', '500')
+    SQL_PROFILER_SLOWEST = os.environ.get('SQL_PROFILER_SLOWEST', '5')
+
+    # How proponent queries are restricted to their mines: 'semi_join' or 'in_list'
+    PROPONENT_SECURITY_MODE = os.environ.get('PROPONENT_SECURITY_MODE', 'semi_join')
+
+    # Pooled HTTP client for NRIS and the document manager: timeouts in seconds, retries of
+    # idempotent calls with a backoff, and a circuit breaker per host.
+    SERVICE_CLIENT_CONNECT_TIMEOUT = os.environ.get('SERVICE_CLIENT_CONNECT_TIMEOUT', '3.05')
+    SERVICE_CLIENT_READ_TIMEOUT = os.environ.get('SERVICE_CLIENT_READ_TIMEOUT', '30')
+    SERVICE_CLIENT_RETRIES = os.environ.get('SERVICE_CLIENT_RETRIES', '2')
+    SERVICE_CLIENT_BACKOFF_FACTOR = os.environ.get('SERVICE_CLIENT_BACKOFF_FACTOR', '0.3')
+    SERVICE_CLIENT_POOL_SIZE = os.environ.get('SERVICE_CLIENT_POOL_SIZE', '10')
+    SERVICE_CLIENT_BREAKER_FAILURES = os.environ.get('SERVICE_CLIENT_BREAKER_FAILURES', '5')
+    SERVICE_CLIENT_BREAKER_RESET_SECONDS = os.environ.get('SERVICE_CLIENT_BREAKER_RESET_SECONDS',
+                                                          '30')
+
+    # Concurrent background NRIS calls (batch summaries, refreshes, pre-warming), and the seconds
+    # after which cached compliance summaries are served stale and refreshed in the background
+    NRIS_COMPLIANCE_WORKERS = os.environ.get('NRIS_COMPLIANCE_WORKERS', '4')
+    NRIS_COMPLIANCE_SOFT_TTL = os.environ.get('NRIS_COMPLIANCE_SOFT_TTL', '3600')
+    NRIS_COMPLIANCE_EMPTY_SOFT_TTL = os.environ.get('NRIS_COMPLIANCE_EMPTY_SOFT_TTL', '1800')
 
     # Elastic config
     ELASTIC_ENABLED = os.environ.get('ELASTIC_ENABLED', '0')
@@ -90,6 +129,7 @@ class TestConfig(Config):
     # The following configs are for testing purposes and all variables and keys are generated using dummy data.
     TESTING = os.environ.get('TESTING', True)
     CACHE_TYPE = "null"
+    MINE_MAP_BACKGROUND_REBUILD = '0'
     DB_NAME_TEST = os.environ.get('DB_NAME_TEST', 'db_name_test')
     DB_URL = "postgresql://{0}:{1}@{2}:{3}/{4}".format(Config.DB_USER, Config.DB_PASS,
                                                        Config.DB_HOST, Config.DB_PORT, DB_NAME_TEST)
@@ -0,0 +1,48 @@
+from concurrent.futures import wait
+
+from app.extensions import sched, db
+from app.api.utils.apm import register_apm
+from app.api.utils.include.user_info import User
+from app.api.services import NRIS_API_service
+
+from app.api.mines.mine.models.mine import Mine
+from app.api.mines.subscription.models.subscription import Subscription
+
+
+#the schedule of these jobs is set using server time (UTC)
+def _schedule_NRIS_jobs(app):
+    # The NRIS API loads the day's inspections at 11:00.
+    app.apscheduler.add_job(
+        func=_prewarm_compliance_summaries,
+        trigger='cron',
+        id='prewarm_nris_compliance_summaries',
+        hour=12,
+        minute=30)
+
+
+@register_apm
+def _prewarm_compliance_summaries():
+    """Fetches the compliance summaries of the major and the subscribed mines into the cache."""
+    with sched.app.app_context():
+        if not sched.app.config['NRIS_TOKEN_URL']:
+            sched.app.logger.info('NRIS_TOKEN_URL is not set, compliance summaries not pre-warmed.')
+            return
+
+        User._test_mode = True
+        major_mine_nos = [mine.mine_no for mine in Mine.find_all_major_mines()]
+        subscribed_mine_nos = [
+            mine_no for (mine_no, ) in db.session.query(Mine.mine_no).join(
+                Subscription, Subscription.mine_guid == Mine.mine_guid).filter(
+                    Mine.deleted_ind == False).distinct()
+        ]
+        mine_nos = list(dict.fromkeys(major_mine_nos + subscribed_mine_nos))
+
+        auth_token = NRIS_API_service._get_NRIS_token()
+        futures = [
+            NRIS_API_service.refresh_compliance_summary(sched.app, mine_no, auth_token)
+            for mine_no in mine_nos
+        ]
+        done, _ = wait([future for future in futures if future is not None])
+        failed = sum(1 for future in done if future.exception() is not None)
+        sched.app.logger.info(
+            f'Pre-warmed the compliance summaries of {len(done) - failed} mines, {failed} failed.')
@@ -0,0 +1,21 @@
+from datetime import datetime
+
+from app.extensions import sched
+from app.api.utils.apm import register_apm
+from app.api.mines.mine.resources.mine_map import warm_mine_map_cache
+
+
+#the schedule of these jobs is set using server time (UTC)
+def _schedule_mine_map_jobs(app):
+    # Once on boot, so the first requests find the map built, then hourly to keep it warm.
+    app.apscheduler.add_job(
+        func=_warm_mine_map_cache,
+        trigger='interval',
+        id='warm_mine_map_cache',
+        hours=1,
+        next_run_time=datetime.now())
+
+
+@register_apm
+def _warm_mine_map_cache():
+    warm_mine_map_cache(sched.app)
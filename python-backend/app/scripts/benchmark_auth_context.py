@@ -0,0 +1,66 @@
+import time
+
+from jose import jwt as jwt_jose
+
+from app import auth
+from app.api.mines.mine.models.mine import Mine
+from app.api.utils.access_decorators import MINESPACE_PROPONENT
+from app.api.utils.include.user_info import User, VALID_REALM
+
+BENCHMARK_CLAIMS = {
+    "iss": "benchmark",
+    "typ": "Bearer",
+    "preferred_username": "benchmark-user",
+    "email": "benchmark-user@example.com",
+    "given_name": "Benchmark",
+    "realm_access": {
+        "roles": ["core_view_all", "idir"]
+    }
+}
+
+
+def _legacy_security_check(token):
+    """What every query compile and audit default used to do: decode the token again."""
+    claims = jwt_jose.get_unverified_claims(token)
+    is_proponent = MINESPACE_PROPONENT in claims["realm_access"]["roles"]
+    claims = jwt_jose.get_unverified_claims(token)
+    realms = list(set(VALID_REALM) & set(claims['realm_access']['roles']))
+    username = realms[0] + '\\' + claims['preferred_username'] if realms else claims[
+        'preferred_username']
+    return is_proponent, username
+
+
+def _context_security_check(token):
+    return auth.get_current_user_security().is_restricted(), User().get_user_username()
+
+
+def _time_per_call(check, token, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        check(token)
+    return (time.perf_counter() - start) / iterations
+
+
+def run_benchmark(app, iterations=10000):
+    """
+    Prints the cost of the per-query security check (proponent flag and audit username) when
+    the token is decoded on every call against the request-scoped auth context, next to the
+    cost of compiling a mine query, which runs that check.
+    """
+    token = jwt_jose.encode(BENCHMARK_CLAIMS, 'benchmark-secret', algorithm='HS256')
+    test_mode = User._test_mode
+    User._test_mode = False
+    try:
+        with app.test_request_context(headers={'Authorization': f'Bearer {token}'}):
+            legacy = _time_per_call(_legacy_security_check, token, iterations)
+            context = _time_per_call(_context_security_check, token, iterations)
+            compile_time = _time_per_call(
+                lambda _: str(Mine.query.filter_by(mine_no='benchmark')), token,
+                max(iterations // 10, 1))
+    finally:
+        User._test_mode = test_mode
+
+    print(f'{"security check per query":<32} {"us":>10}')
+    print(f'{"decode token every call":<32} {legacy * 1e6:>10.2f}')
+    print(f'{"request-scoped auth context":<32} {context * 1e6:>10.2f}')
+    print(f'{"mine query compile (context)":<32} {compile_time * 1e6:>10.2f}')
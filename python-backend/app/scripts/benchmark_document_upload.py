@@ -0,0 +1,72 @@
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from app.api.utils.upload import DEFAULT_BLOCK_SIZE, write_chunk
+
+
+class _ChunkStream(object):
+    """A request body of `length` bytes, made up as it is read like a client sending it."""
+
+    def __init__(self, length):
+        self.remaining = length
+
+    def read(self, size=-1):
+        size = self.remaining if size < 0 else min(size, self.remaining)
+        self.remaining -= size
+        return b'x' * size
+
+
+def _buffered_write(stream, file_path, offset, length, block_size):
+    """The previous path: request.data reads the whole chunk before it is written."""
+    data = stream.read()
+    with open(file_path, 'r+b') as f:
+        f.seek(offset)
+        f.write(data)
+
+
+def _streamed_write(stream, file_path, offset, length, block_size):
+    write_chunk(stream, file_path, offset, length, block_size=block_size)
+
+
+def _upload(write, folder, chunks, chunk_size, block_size):
+    file_path = os.path.join(folder, f'{threading.get_ident()}')
+    with open(file_path, 'wb') as f:
+        f.truncate(chunks * chunk_size)
+    for chunk in range(chunks):
+        write(_ChunkStream(chunk_size), file_path, chunk * chunk_size, chunk_size, block_size)
+
+
+def _time_uploads(write, uploads, chunks, chunk_size, block_size):
+    with tempfile.TemporaryDirectory() as folder:
+        threads = [
+            threading.Thread(target=_upload, args=(write, folder, chunks, chunk_size, block_size))
+            for _ in range(uploads)
+        ]
+        tracemalloc.start()
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return seconds, peak
+
+
+def run_benchmark(uploads=8, chunks=4, chunk_mib=32, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Prints the peak memory allocated and the throughput of concurrent uploads written from the
+    buffered request body, against the body streamed to the file in blocks.
+    """
+    chunk_size = chunk_mib * 2**20
+    total_mib = uploads * chunks * chunk_mib
+    print(f'{uploads} concurrent uploads of {chunks} x {chunk_mib} MiB chunks, '
+          f'{block_size // 1024} KiB blocks')
+    print(f'{"write":<12} {"peak MiB":>10} {"seconds":>10} {"MiB/s":>10}')
+    for name, write in [('buffered', _buffered_write), ('streamed', _streamed_write)]:
+        seconds, peak = _time_uploads(write, uploads, chunks, chunk_size, block_size)
+        print(f'{name:<12} {peak / 2**20:>10.1f} {seconds:>10.2f} {total_mib / seconds:>10.0f}')
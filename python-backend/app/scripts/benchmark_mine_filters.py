@@ -0,0 +1,131 @@
+import time
+
+from sqlalchemy_filters import apply_sort, apply_pagination, apply_filters
+from werkzeug.datastructures import MultiDict
+
+from app.api.mines.mine.models.mine import Mine
+from app.api.mines.mine.models.mine_type import MineType
+from app.api.mines.mine.models.mine_type_detail import MineTypeDetail
+from app.api.mines.mine.resources.mine import MineListResource
+from app.api.mines.permits.permit.models.permit import Permit
+from app.api.mines.status.models.mine_status import MineStatus
+from app.api.mines.status.models.mine_status_xref import MineStatusXref
+
+# Filter combinations exercised by the benchmark, from a single filter up to every filter stacked.
+SCENARIOS = [
+    {},
+    {'region': 'SW,NE'},
+    {'major': 'true'},
+    {'region': 'SW,NE', 'tsf': 'true'},
+    {'region': 'SW,NE', 'tsf': 'true', 'tenure': 'MIN,PLR'},
+    {'region': 'SW,NE', 'tsf': 'false', 'tenure': 'MIN,PLR', 'status': 'OP,CLD'},
+    {'search': 'mine', 'region': 'SW,SC,NE', 'commodity': 'AU,CU', 'status': 'OP'},
+    {'search': 'a', 'major': 'false', 'tsf': 'true', 'region': 'SW,SC,NE,NW,SE',
+     'commodity': 'AU,CU,AG', 'tenure': 'MIN,PLR,COL,BCL', 'status': 'OP,CLD,ABN'},
+]
+
+
+def _legacy_filter_and_search(args):
+    """The previous INTERSECT/UNION implementation of MineListResource.apply_filter_and_search."""
+    items_per_page = args.get('per_page', 25, type=int)
+    page = args.get('page', 1, type=int)
+    search_term = args.get('search', None, type=str)
+    commodity_filter_terms = args.get('commodity', None, type=str)
+    status_filter_term = args.get('status', None, type=str)
+    tenure_filter_term = args.get('tenure', None, type=str)
+    region_code_filter_term = args.get('region', None, type=str)
+    major_mine_filter_term = args.get('major', None, type=str)
+    tsf_filter_term = args.get('tsf', None, type=str)
+
+    mines_query = Mine.query
+    if search_term:
+        search_term = search_term.strip()
+        name_filter = Mine.mine_name.ilike('%{}%'.format(search_term))
+        number_filter = Mine.mine_no.ilike('%{}%'.format(search_term))
+        permit_filter = Permit.permit_no.ilike('%{}%'.format(search_term))
+        mines_name_query = Mine.query.filter(name_filter | number_filter)
+        permit_query = Mine.query.join(Permit).filter(permit_filter)
+        mines_query = mines_name_query.union(permit_query)
+    if major_mine_filter_term == "true" or major_mine_filter_term == "false":
+        major_mine_query = Mine.query.filter(
+            Mine.major_mine_ind.is_(major_mine_filter_term == "true"))
+        mines_query = mines_query.intersect(major_mine_query)
+    if tsf_filter_term == "true" or tsf_filter_term == "false":
+        tsf_filter = Mine.mine_tailings_storage_facilities != None if tsf_filter_term == "true" else \
+            Mine.mine_tailings_storage_facilities == None
+        mines_query = mines_query.intersect(Mine.query.filter(tsf_filter))
+    if region_code_filter_term:
+        region_query = Mine.query.filter(Mine.mine_region.in_(region_code_filter_term.split(',')))
+        mines_query = mines_query.intersect(region_query)
+    if commodity_filter_terms:
+        commodity_query = Mine.query \
+            .join(MineType) \
+            .join(MineTypeDetail) \
+            .filter(MineTypeDetail.mine_commodity_code.in_(commodity_filter_terms.split(',')),
+                    MineType.active_ind.is_(True))
+        mines_query = mines_query.intersect(commodity_query)
+    if tenure_filter_term:
+        tenure_query = Mine.query \
+            .join(MineType) \
+            .filter(MineType.mine_tenure_type_code.in_(tenure_filter_term.split(',')),
+                    MineType.active_ind.is_(True))
+        mines_query = mines_query.intersect(tenure_query)
+    if status_filter_term:
+        status_filter_term_array = status_filter_term.split(',')
+        all_status_filter = MineStatusXref.mine_operation_status_code.in_(status_filter_term_array) | \
+            MineStatusXref.mine_operation_status_reason_code.in_(status_filter_term_array) | \
+            MineStatusXref.mine_operation_status_sub_reason_code.in_(status_filter_term_array)
+        status_query = Mine.query \
+            .join(MineStatus) \
+            .join(MineStatusXref) \
+            .filter(all_status_filter, MineStatus.active_ind == True)
+        mines_query = mines_query.intersect(status_query)
+    mines_query = apply_filters(mines_query,
+                                [{'field': 'deleted_ind', 'op': '==', 'value': 'False'}])
+    mines_query = apply_sort(mines_query, [{
+        'model': 'Mine',
+        'field': 'mine_name',
+        'direction': 'asc'
+    }])
+    return apply_pagination(mines_query, page, items_per_page)
+
+
+def _time_page(filter_and_search, args, repeat):
+    """Runs the page + count for the given implementation and returns the best wall time."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        query, pagination_details = filter_and_search(args)
+        query.all()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, pagination_details.total_results
+
+
+def _matching_guids(filter_and_search, args):
+    all_args = MultiDict(args)
+    all_args['per_page'] = 1000000
+    query, _ = filter_and_search(all_args)
+    return set(mine.mine_guid for mine in query.all())
+
+
+def run_benchmark(repeat=5, per_page=25, page=1):
+    """
+    Compares the single-pass mine list filter against the previous INTERSECT/UNION queries.
+    Seed the database first, e.g. `flask create_data 50000`. Returns False if any scenario
+    produces a different set of mines between the two implementations.
+    """
+    resource = MineListResource()
+    all_match = True
+    print(f'{"filters":<90} {"total":>7} {"legacy ms":>10} {"new ms":>10} {"speedup":>8} match')
+    for scenario in SCENARIOS:
+        args = MultiDict(dict(scenario, per_page=per_page, page=page))
+        legacy_time, legacy_total = _time_page(_legacy_filter_and_search, args, repeat)
+        new_time, new_total = _time_page(resource.apply_filter_and_search, args, repeat)
+        match = legacy_total == new_total and _matching_guids(
+            _legacy_filter_and_search, args) == _matching_guids(resource.apply_filter_and_search,
+                                                                args)
+        all_match = all_match and match
+        print(f'{str(scenario):<90} {new_total:>7} {legacy_time * 1000:>10.1f} '
+              f'{new_time * 1000:>10.1f} {legacy_time / new_time:>7.1f}x {match}')
+    return all_match
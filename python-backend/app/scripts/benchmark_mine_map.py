@@ -0,0 +1,42 @@
+import gzip
+import json
+import time
+
+from app.api.mines.location.models.mine_map_view_location import MineMapViewLocation
+from app.api.utils.map_encoding import MAP_ENCODERS
+
+
+def _legacy_map_json():
+    """The previous path: ORM objects, one json_for_map() dict per mine."""
+    records = MineMapViewLocation.query.filter(MineMapViewLocation.latitude != None).all()
+    return json.dumps({'mines': list((map(lambda x: x.json_for_map(), records)))},
+                      separators=(',', ':'))
+
+
+def _best_time(build, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payload = build()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, payload
+
+
+def run_benchmark(repeat=3, compress_level=9):
+    """
+    Prints the payload size (raw and gzipped at the level flask-compress uses) and the query plus
+    serialization time of each map encoding, against the previous ORM-to-JSON path.
+    """
+    builds = [('legacy json (ORM)', _legacy_map_json)]
+    builds.extend((mimetype, lambda encoder=encoder: encoder(MineMapViewLocation.map_rows()))
+                  for mimetype, encoder in MAP_ENCODERS.items())
+
+    print(f'{MineMapViewLocation.query.count()} mines on the map')
+    print(f'{"encoding":<32} {"bytes":>12} {"gzip bytes":>12} {"ms":>10}')
+    for name, build in builds:
+        elapsed, payload = _best_time(build, repeat)
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+        compressed = gzip.compress(payload, compresslevel=compress_level)
+        print(f'{name:<32} {len(payload):>12} {len(compressed):>12} {elapsed * 1000:>10.1f}')
@@ -0,0 +1,67 @@
+import random
+import time
+
+from sqlalchemy import desc, func
+
+from app.extensions import db
+from app.api.mines.mine.models.mine import Mine
+from app.api.utils.search import search_targets, search_documents
+
+
+def _legacy_search(type_config, search_terms):
+    """The previous search: one similarity/ILIKE query per term and per searched column."""
+    rows = []
+    for term in search_terms:
+        for column in type_config['columns_to_search']:
+            similarity = db.session.query(type_config['model']).with_entities(
+                func.similarity(column, term).label('score'),
+                *type_config['entities_to_return']).filter(column.ilike(f'%{term}%'))
+            if type_config['has_deleted_ind']:
+                similarity = similarity.filter_by(deleted_ind=False)
+            rows.extend(similarity.order_by(desc(func.similarity(column, term))).all())
+    return rows
+
+
+def _sample_terms(count):
+    """Draws search words from existing mine names so that the terms produce real matches."""
+    words = set()
+    for (mine_name, ) in db.session.query(Mine.mine_name).limit(500):
+        words.update(word for word in mine_name.split() if len(word) > 2)
+    words = sorted(words) or ['mine']
+    return [random.choice(words) for _ in range(count)]
+
+
+def _best_time(search, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        search()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_benchmark(max_terms=5, repeat=5):
+    """
+    Prints the latency of the global search against the number of search terms, for the
+    previous per-term/per-column queries and for the single ranked search_document query.
+    """
+    random.seed(0)
+    print(f'{"terms":>5} {"legacy queries":>15} {"legacy ms":>10} {"ranked queries":>15} {"ranked ms":>10}')
+    for term_count in range(1, max_terms + 1):
+        search_terms = _sample_terms(term_count)
+
+        def legacy():
+            for type_config in search_targets.values():
+                _legacy_search(type_config, search_terms)
+
+        def ranked():
+            search_documents(' '.join(search_terms), search_terms, search_targets, 100)
+
+        legacy_queries = sum(
+            len(type_config['columns_to_search']) * term_count
+            for type_config in search_targets.values())
+        # search_document answers every target type with one query.
+        ranked_queries = 1
+        print(f'{term_count:>5} {legacy_queries:>15} {_best_time(legacy, repeat) * 1000:>10.1f} '
+              f'{ranked_queries:>15} {_best_time(ranked, repeat) * 1000:>10.1f}')
@@ -0,0 +1,84 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+import requests
+
+from app.api.utils.service_client import ServiceClient
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Answers every GET with a small NRIS-like JSON document over keep-alive connections."""
+
+    protocol_version = 'HTTP/1.1'
+    body = json.dumps({'records': []}).encode('utf-8')
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StubServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def _start_stub_server(latency):
+    server = _StubServer(('127.0.0.1', 0), _StubHandler)
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.latency = latency
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _time_calls(server, get, requests_count):
+    url = f'http://127.0.0.1:{server.server_port}/inspections'
+    connections = server.connections
+    durations = []
+    for _ in range(requests_count):
+        start = time.perf_counter()
+        get(url).raise_for_status()
+        durations.append(time.perf_counter() - start)
+    durations.sort()
+    return {
+        'connections': server.connections - connections,
+        'mean_ms': sum(durations) / len(durations) * 1000,
+        'p95_ms': durations[int(len(durations) * 0.95) - 1] * 1000
+    }
+
+
+def run_benchmark(app, requests_count=200, latency_ms=0):
+    """
+    Prints the connections opened and the latency of bare requests.get calls against the pooled
+    service client, both calling a local stub server.
+    """
+    server = _start_stub_server(latency_ms / 1000)
+    client = ServiceClient(app)
+    try:
+        results = {
+            'requests.get': _time_calls(server, requests.get, requests_count),
+            'service client': _time_calls(server, client.get, requests_count),
+        }
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print(f'{"client":<16} {"connections":>12} {"mean ms":>10} {"p95 ms":>10}')
+    for name, result in results.items():
+        print(f'{name:<16} {result["connections"]:>12} {result["mean_ms"]:>10.2f} '
+              f'{result["p95_ms"]:>10.2f}')
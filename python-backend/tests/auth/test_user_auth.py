@@ -5,10 +5,10 @@ from app.extensions import api as app_api
 from app.api.utils.access_decorators import *
 from app import auth
 from app.api.utils.include.user_info import User
-
+from app.api.mines.mine.models.mine import Mine
 from app.api.users.minespace.models.minespace_user import MinespaceUser
 from app.api.users.minespace.models.minespace_user_mine import MinespaceUserMine
-from tests.factories import MinespaceUserFactory
+from tests.factories import MinespaceUserFactory, MineFactory
 
 class DummyAuthResource(Resource):
     @requires_any_of([VIEW_ALL, MINESPACE_PROPONENT])
@@ -32,8 +32,18 @@ class DummyAuthResource(Resource):
         return user_security.is_restricted()
 
 
+class DummyMineAccessResource(Resource):
+    @requires_any_of([VIEW_ALL, MINESPACE_PROPONENT])
+    def get(self):
+        return {
+            'mines': [str(mine.mine_guid) for mine in Mine.query.all()],
+            'user_mines': [str(user_mine.mine_guid) for user_mine in MinespaceUserMine.query.all()]
+        }
+
+
 api = Namespace('authtest')
 api.add_resource(DummyAuthResource, '')
+api.add_resource(DummyMineAccessResource, '/mines')
 app_api.add_namespace(api)
 
 
@@ -118,3 +128,32 @@ def test_delete_view_auth_applies(test_client, db_session, auth_headers, setup_i
 def test_delete_proponent_auth_applies(test_client, db_session, auth_headers, setup_info):
     resp = test_client.delete('/authtest', headers=auth_headers['proponent_only_auth_header'])
     assert json.loads(resp.data.decode()) == True
+
+
+@pytest.mark.parametrize('security_mode', ['semi_join', 'in_list'])
+def test_proponent_queries_exclude_other_proponents_mines(test_client, db_session, auth_headers,
+                                                         setup_info, monkeypatch, security_mode):
+    proponent = MinespaceUser.query.unbound_unsafe().filter_by(
+        email='test-proponent-email@minespace.ca').one()
+    other_proponent = MinespaceUserFactory()
+    own_mine = MineFactory(minimal=True)
+    other_mine = MineFactory(minimal=True)
+    MinespaceUserMine.create_minespace_user_mine(proponent.user_id, own_mine.mine_guid)
+    MinespaceUserMine.create_minespace_user_mine(other_proponent.user_id, other_mine.mine_guid)
+    auth.clear_mine_access(proponent.user_id)
+    monkeypatch.setattr(auth, 'apply_security', True)
+    monkeypatch.setitem(test_client.application.config, 'PROPONENT_SECURITY_MODE', security_mode)
+
+    proponent_resp = test_client.get(
+        '/authtest/mines', headers=auth_headers['proponent_only_auth_header'])
+    view_resp = test_client.get('/authtest/mines', headers=auth_headers['view_only_auth_header'])
+    proponent_data = json.loads(proponent_resp.data.decode())
+    view_data = json.loads(view_resp.data.decode())
+
+    assert proponent_resp.status_code == 200
+    assert proponent_data == {
+        'mines': [str(own_mine.mine_guid)],
+        'user_mines': [str(own_mine.mine_guid)]
+    }
+    # Unrestricted users still see every mine.
+    assert {str(own_mine.mine_guid), str(other_mine.mine_guid)} <= set(view_data['mines'])
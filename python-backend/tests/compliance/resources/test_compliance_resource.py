@@ -4,18 +4,23 @@ import filecmp
 import os
 import pytest
 import requests
+import threading
+import time
 
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
 from unittest import mock
+from werkzeug.contrib.cache import SimpleCache
 
-from app.extensions import cache
-from app.api.constants import NRIS_TOKEN
-from tests.factories import MineFactory
+from app.extensions import cache, sched
+from app.api.constants import NRIS_TOKEN, NRIS_COMPLIANCE_DATA, NRIS_COMPLIANCE_REFRESH_LOCK
+from app.api.services import NRIS_API_service
+from app.scheduled_jobs.NRIS_jobs import _prewarm_compliance_summaries
+from tests.factories import MineFactory, SubscriptionFactory
 
 def get_date_one_month_ahead():
     date = datetime.now() + relativedelta(months=1)
-    return date.strftime('%Y-%m-%d %H:%M')
+    return date.strftime('%Y-%m-%dT%H:%M:%S')
 class MockResponse:
     def __init__(self, json_data, status_code):
         self.json_data = json_data
@@ -30,20 +35,20 @@ class MockResponse:
 def setup_info(test_client):
     date = get_date_one_month_ahead()
 
-    expected_data = {
+    # The summary as the NRIS API's /inspections/summary marshals it.
+    NRIS_Mock_data = {
         'last_inspection': "2018-09-17T14:00:00",
         'last_inspector': "APOOLEY",
-        'num_open_orders': 0,
-        'num_overdue_orders': 0,
-        #'section_35_orders': 0, no aggregate, FE filters will show where violation = 35
+        'num_open_orders': 2,
+        'num_overdue_orders': 1,
         'all_time': {
-            'num_inspections': 0,
-            'num_advisories': 0,
+            'num_inspections': 2,
+            'num_advisories': 3,
             'num_warnings': 0,
             'num_requests': 0,
         },
         'last_12_months': {
-            'num_inspections': 0,
+            'num_inspections': 1,
             'num_advisories': 3,
             'num_warnings': 0,
             'num_requests': 0,
@@ -56,202 +61,38 @@ def setup_info(test_client):
         },
         'orders': [{
             'order_no': '162409-1',
-            'code_violation': '1.1.2',
+            'violation': '1.1.2',
             'report_no': 162409,
             'inspector': 'TEST',
+            'order_status': 'Open',
             'due_date': date,
             'overdue': False,
-
-        },{
+        }, {
             'order_no': '162409-2',
-            'code_violation': '2.4.2',
+            'violation': '2.4.2',
             'report_no': 162409,
             'inspector': 'TEST',
+            'order_status': 'Closed',
             'due_date': date,
             'overdue': False,
-
-        },{
+        }, {
             'order_no': '100018-1',
-            'code_violation': 'C.8 (a) (i)',
+            'violation': 'C.8 (a) (i)',
             'report_no': 100018,
             'inspector': 'TEST',
-            'due_date': '2018-12-10 13:52',
+            'order_status': 'Overdue',
+            'due_date': '2018-12-10T13:52:00',
             'overdue': True,
-
-        },]
+        }]
     }
-
-    NRIS_Mock_data = {
-    "records": [
-        {
-            "external_id": 102271,
-            "inspection_date": "2018-09-17T14:00:00",
-            "completed_date": "2018-10-19T10:29:00",
-            "inspection_status_code": "Complete",
-            "inspection_type_code": "Health and Safety",
-            "inspection_report_sent_date": "2018-09-21T12:17:00",
-            "business_area": "EMPR",
-            "mine_no": "0900002",
-            "inspector_idir": "IDIR\\APOOLEY",
-            "inspection_introduction": "<p>Bullmoose Mine has been permanently closed since 2002. The purpose of the inspection was to accompany geotechnical inspectors Victor Marques and Jennifer Brash. Environmental sampling and upkeep activities are carried out by Teck Resources. No orders related to health and safety resulted from this inspection,</p>",
-            "inspection_preamble": None,
-            "inspection_closing": None,
-            "officer_notes": None,
-            "documents": [
-                {
-                    "external_id": 143278,
-                    "document_date": "2018-09-24T09:20:00",
-                    "document_type": "Report",
-                    "file_name": "EMPR_InspectionReport_102271.pdf",
-                    "comment": "INSPECTION Report"
-                },
-                {
-                    "external_id": 143302,
-                    "document_date": "2018-09-24T09:59:00",
-                    "document_type": "Report",
-                    "file_name": "EMPR_InspectionReport_102271.docx",
-                    "comment": "INSPECTION Report"
-                },
-                {
-                    "external_id": 147238,
-                    "document_date": "2018-10-19T10:28:00",
-                    "document_type": "Mine Manager Response",
-                    "file_name": "EMPR_InspectionReport_102271 - Response.pdf",
-                    "comment": "Manager response"
-                }
-            ],
-            "inspected_locations": [
-                {
-                    "inspected_location_type": "stop",
-                    "location": {
-                        "description": "Former tailings pond, settling ponds",
-                        "notes": None,
-                        "latitude": None,
-                        "longitude": None,
-                        "utm_easting": None,
-                        "utm_northing": None,
-                        "zone_number": None,
-                        "zone_letter": None
-                    },
-                    "documents": [],
-                    "advisory_details": [],
-                    "request_details": [],
-                    "stop_details": [],
-                    "warning_details": []
-                }
-            ]
-        },
-        {
-            "external_id": 102585,
-            "inspection_date": "2018-09-17T13:56:00",
-            "completed_date": "2018-10-22T15:14:00",
-            "inspection_status_code": "Complete",
-            "inspection_type_code": "Geotechnical",
-            "inspection_report_sent_date": "2018-09-25T00:00:00",
-            "business_area": "EMPR",
-            "mine_no": "0900002",
-            "inspector_idir": "IDIR\\JBRASH",
-            "inspection_introduction": None,
-            "inspection_preamble": None,
-            "inspection_closing": None,
-            "officer_notes": None,
-            "documents": [
-                {
-                    "external_id": 145110,
-                    "document_date": "2018-10-04T15:38:00",
-                    "document_type": "Final Report",
-                    "file_name": "2018 09 25_Bullmoose_EMPR Geotechnical Inspection.pdf",
-                    "comment": "Inspection Report"
-                },
-                {
-                    "external_id": 147662,
-                    "document_date": "2018-10-22T15:05:00",
-                    "document_type": "Mine Manager Response",
-                    "file_name": "2018 10 10 Response to the 2018 09 25 Geotechnical Inspection.pdf",
-                    "comment": "MM response"
-                }
-            ],
-            "inspected_locations": [
-                {
-                    "inspected_location_type": "stop",
-                    "location": {
-                        "description": "Sediment Pond 2",
-                        "notes": None,
-                        "latitude": None,
-                        "longitude": None,
-                        "utm_easting": None,
-                        "utm_northing": None,
-                        "zone_number": None,
-                        "zone_letter": None
-                    },
-                    "documents": [],
-                    "advisory_details": [
-                        {
-                            "detail": "Advisory 1: \nPlease submit the 2018 Sediment Ponds OMS manual, incorporating the updates recommended in the 2017 DSI, to the Chief Inspector upon completion in Q3 2018."
-                        },
-                        {
-                            "detail": "Advisory 2: \nPlease submit the Sediment Pond 2 spillway design to EMPR upon completion."
-                        }
-                    ],
-                    "request_details": [],
-                    "stop_details": [],
-                    "warning_details": []
-                },
-                {
-                    "inspected_location_type": "stop",
-                    "location": {
-                        "description": "Sediment Pond 3",
-                        "notes": None,
-                        "latitude": None,
-                        "longitude": None,
-                        "utm_easting": None,
-                        "utm_northing": None,
-                        "zone_number": None,
-                        "zone_letter": None
-                    },
-                    "documents": [],
-                    "advisory_details": [
-                        {
-                            "detail": "Advisory 3: \nThe crest of Sediment Pond 3 should be graded such that ponding of water is eliminated."
-                        }
-                    ],
-                    "request_details": [
-                        {
-                            "detail": "nformation Request 1: \nPlease inform EMPR of the results of the SP3 spillway flooding assessment (DSI recommendation SP-2017-03), upon completion in Q3 2018.",
-                            "response": "As part of looking at long term erosion protection issues related to Sediment Pond 3 spillway,\nKCB presented Teck with an options review. As part of this review, it was concluded that if a\n200 yr return period flood of West Bullmoose Creek were to occur, there is risk that the water\nlevel in the creek would be high enough to flow through the spillway and into Sediment Pond 3.\nHowever, neither the resulting increase in pond level, nor the decrease in storage capacity of\nthe facility would represent a risk to the dam structure. KCB believe the actual pond sediments\nare some distance from the inlet of the spillway and would be in a relatively ?still? area of the\npond (as it is dead ended) so the potential for erosion of the disturbed sediments back into the\ncreek are considered minimal.",
-                            "respond_date": None
-                        }
-                    ],
-                    "stop_details": [
-                        {
-                            "detail": "Order 1 (Inspection of Mines)\nIssued Pursuant To: Mines Act Section 15(4)\n\nObservation of Contravention:\nRiprap installed to protect the toe of Sediment Pond 3 dam from creek erosion appeared damaged at the time of inspection. The 2017 DSI recommends that the erosion be repaired to protect against future recurrence (SP-2012-01), with a target deadline of Q3 2018.    \n\nRemedial Action/Results To Be Obtained:\nThe Mine shall complete repairs of the erosion protection at the toe of the SP3 dam, in accordance with the requirements of the Engineer of Record.  Pursuant to Code clause 10.5.1, the Mine shall submit to the Chief Inspector as-built documentation for the Sediment Pond 3 erosion protection and shall ensure that the Engineer of Record certifies the construction.\n\nRectify By/Completion Date: 2018-12-31",
-                            "stop_type": "Inspection Mines",
-                            "response_status": "Accepted",
-                            "stop_status": "Closed",
-                            "observation": "Order 1 (Inspection of Mines)\nIssued Pursuant To: Mines Act Section 15(4)\n\nObservation of Contravention:\nRiprap installed to protect the toe of Sediment Pond 3 dam from creek erosion appeared damaged at the time of inspection. The 2017 DSI recommends that the erosion be repaired to protect against future recurrence (SP-2012-01), with a target deadline of Q3 2018.    \n\nRemedial Action/Results To Be Obtained:\nThe Mine shall complete repairs of the erosion protection at the toe of the SP3 dam, in accordance with the requirements of the Engineer of Record.  Pursuant to Code clause 10.5.1, the Mine shall submit to the Chief Inspector as-built documentation for the Sediment Pond 3 erosion protection and shall ensure that the Engineer of Record certifies the construction.\n\nRectify By/Completion Date: 2018-12-31",
-                            "response": "as-built docs received and filed.  MM response:\n\"The observed contravention is incorrect as stated. The riprap observed is at East end of the\ndam not the riprap that was referred to in SP-2012-01 in the 2017 DSI.\nThe riprap observed that appeared damaged was riprap that was installed in 2015. The Certified\nas-built report for this riprap entitled ?Bullmoose SP3 Erosion Repair Construction and\nEnvironmental Monitoring Summary Report? dated December 2015 is being submitted to EMPR\nin a separate submission using our Secure File Transfer system due to the large size of the\nreport. Section 5.3 of the report describes modifications that were made to avoid disturbing the\ncreek bed during installation of the geotextile liner. The liner was anchored by folding the\ngeotextile material back on top of the riprap and then placing additional rock overtop as shown\nin drawing D-001, Detail 1 of the report. In the report, Photo 4 shows how this approach left\ngeotextile visibly exposed at the edge of the creek so it can be easily mistaken to look like some\nof the riprap has been eroded. The EoR inspected this area during the 2018 DSI and had no\nconcerns that any erosion had occurred to the riprap since installation.\nThere is an area west of the riprap discussed above where the creek is gradually eroding the\ncreek bank closer to the dam toe. This is the area referred to SP-2012-01 of the 2017 DSI. Teck\nhad planned on installing riprap in this area this past summer, but during the design process, it\nwas decided to first conduct an options review as part of long term dam closure planning to try\nensure this work was consistent with potential long term closure plans. This has caused a delay\nof one year (to 2019) to complete the design and schedule the riprap installation. The EoR\nrecognized the potential for a delay of installation as stated in the EoR?s recommendations in\nthe 2017 DSI (Recommendation SP-2016-05). The EoR recommended that if installation of the\nriprap was not complete by the end of 2018 that a monitoring program be put into place. Teck\nhas contracted WSP Engineers/Surveyors to install a monitoring system using stakes prior to\nthe end of October 2018 to comply with the 2017 DSI recommendation.\"",
-                            "response_received": "2018-10-10T00:00:00",
-                            "completion_date": "2018-10-22T15:05:00",
-                            "noncompliance_legislations": [],
-                            "noncompliance_permits": [],
-                            "authority_act": "Mines Act",
-                            "authority_act_section": "Section 15(4)",
-                            "documents": []
-                        }
-                    ],
-                    "warning_details": []
-                }
-            ]
-        }
-    ]
-}
+    expected_data = NRIS_Mock_data
 
     yield dict(NRIS_Mock_data=NRIS_Mock_data, expected_data=expected_data)
     cache.delete(NRIS_TOKEN)
 
 def test_happy_get_from_NRIS(test_client, auth_headers, setup_info, db_session):
     mine = MineFactory()
-    with mock.patch('requests.get') as nris_data_mock:
+    with mock.patch('app.api.utils.service_client.service_client.get') as nris_data_mock:
 
         nris_data_mock.side_effect = [MockResponse(setup_info.get('NRIS_Mock_data'), 200)]
 
@@ -263,19 +104,27 @@ def test_happy_get_from_NRIS(test_client, auth_headers, setup_info, db_session):
         expected = setup_info.get('expected_data')
 
         assert get_resp.status_code == 200, get_resp.response
-        assert get_data['last_inspection'] == expected['last_inspection']
-        assert get_data['last_inspector'] == expected['last_inspector']
-        assert get_data['num_open_orders'] == expected['num_open_orders']
-        assert get_data['num_overdue_orders'] == expected['num_overdue_orders']
-        assert get_data['last_12_months']['num_advisories'] == expected['last_12_months']['num_advisories']
-        assert get_data['last_12_months']['num_warnings'] == expected['last_12_months']['num_warnings']
-        pairs = zip(get_data['orders'], expected['orders'])
-        assert any(x != y for x, y in pairs)
+        # The core asks NRIS for the summary of the mine, not for its inspections.
+        url = nris_data_mock.call_args[0][0]
+        assert url.endswith('/inspections/summary')
+        assert nris_data_mock.call_args[1]['params'] == {'mine_no': mine.mine_no}
+
+        for key in ['last_inspection', 'last_inspector', 'num_open_orders', 'num_overdue_orders']:
+            assert get_data[key] == expected[key]
+        for period in ['all_time', 'last_12_months', 'current_fiscal']:
+            assert get_data[period] == expected[period]
+        assert len(get_data['orders']) == len(expected['orders'])
+        for order, expected_order in zip(get_data['orders'], expected['orders']):
+            for key in ['order_no', 'violation', 'report_no', 'inspector', 'order_status', 'overdue']:
+                assert order[key] == expected_order[key]
+            # Due dates are returned without their time.
+            assert order['due_date'] == expected_order['due_date'][:10]
+
 
 def test_no_NRIS_Data(test_client, auth_headers, setup_info, db_session):
     mine = MineFactory()
-    with mock.patch('requests.get') as nris_mock_return:
-        nris_mock_return.side_effect = [MockResponse({"records":[]}, 200)]
+    with mock.patch('app.api.utils.service_client.service_client.get') as nris_mock_return:
+        nris_mock_return.side_effect = [MockResponse({"orders":[]}, 200)]
 
         get_resp = test_client.get(
             f'/mines/{mine.mine_no}/compliance/summary',
@@ -288,7 +137,7 @@ def test_no_NRIS_Data(test_client, auth_headers, setup_info, db_session):
 
 def test_mine_not_found(test_client, auth_headers, setup_info, db_session):
     mine = MineFactory()
-    with mock.patch('requests.get') as nris_mock_return:
+    with mock.patch('app.api.utils.service_client.service_client.get') as nris_mock_return:
         nris_mock_return.side_effect = [MockResponse({"records":[]}, 200)]
 
         get_resp = test_client.get(
@@ -296,3 +145,156 @@ def test_mine_not_found(test_client, auth_headers, setup_info, db_session):
             headers=auth_headers['full_auth_header'])
 
         assert get_resp.status_code == 404, get_resp.response
+
+
+def test_batch_summaries_stream_one_line_per_mine(test_client, auth_headers, setup_info, db_session):
+    mines = [MineFactory(), MineFactory()]
+    mine_nos = [mine.mine_no for mine in mines] + ['not-a-mine']
+    with mock.patch('app.api.utils.service_client.service_client.get') as nris_mock_return:
+        nris_mock_return.return_value = MockResponse(setup_info.get('NRIS_Mock_data'), 200)
+
+        get_resp = test_client.get(
+            f'/mines/compliance/summaries?mine_no={",".join(mine_nos)}',
+            headers=auth_headers['full_auth_header'])
+
+        assert get_resp.status_code == 200, get_resp.response
+        lines = [json.loads(line) for line in get_resp.data.decode().splitlines()]
+        assert {line['mine_no'] for line in lines} == set(mine_nos)
+        errors = [line for line in lines if 'error' in line]
+        assert [line['mine_no'] for line in errors] == ['not-a-mine']
+        assert all(line['summary']['last_inspector'] == 'APOOLEY' for line in lines if 'summary' in line)
+        assert nris_mock_return.call_count == 2
+
+
+def test_empty_summaries_go_stale_sooner(test_client):
+    fetched_at = datetime.utcnow() - relativedelta(minutes=45)
+
+    assert NRIS_API_service._is_stale({'summary': {'orders': []}, 'fetched_at': fetched_at})
+    assert not NRIS_API_service._is_stale({
+        'summary': {
+            'orders': [{
+                'order_no': '1-1'
+            }]
+        },
+        'fetched_at': fetched_at
+    })
+
+
+@pytest.fixture(scope='function')
+def simple_cache(test_client):
+    """A real in-memory cache in place of the null cache, for the requests and the workers."""
+    simple = SimpleCache()
+    apps = {test_client.application, sched.app}
+    patches = [mock.patch.dict(app.extensions['cache'], {cache: simple}) for app in apps]
+    for patch in patches:
+        patch.start()
+    yield simple
+    for patch in patches:
+        patch.stop()
+
+
+def _wait_for(condition, seconds=5):
+    deadline = time.monotonic() + seconds
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.05)
+
+
+def test_stale_summary_is_served_while_one_refresh_runs(test_client, auth_headers, setup_info,
+                                                        db_session, simple_cache):
+    mine = MineFactory()
+    stale_summary = {**setup_info['NRIS_Mock_data'], 'last_inspector': 'STALE'}
+    simple_cache.set(NRIS_COMPLIANCE_DATA(mine.mine_no), {
+        'summary': stale_summary,
+        'fetched_at': datetime.utcnow() - relativedelta(days=1)
+    })
+    release = threading.Event()
+
+    def slow_nris(*args, **kwargs):
+        release.wait(5)
+        return MockResponse(setup_info['NRIS_Mock_data'], 200)
+
+    with mock.patch('app.api.utils.service_client.service_client.get',
+                    side_effect=slow_nris) as nris_mock_return:
+        responses = [
+            test_client.get(
+                f'/mines/{mine.mine_no}/compliance/summary',
+                headers=auth_headers['full_auth_header']) for _ in range(3)
+        ]
+
+        # Served from the cache while NRIS has not answered yet.
+        assert not release.is_set()
+        assert [json.loads(resp.data.decode())['last_inspector']
+                for resp in responses] == ['STALE'] * 3
+        release.set()
+        _wait_for(lambda: simple_cache.get(NRIS_COMPLIANCE_DATA(mine.mine_no))['summary'][
+            'last_inspector'] == 'APOOLEY')
+
+        assert nris_mock_return.call_count == 1
+
+
+def test_concurrent_misses_fetch_the_summary_once(test_client, setup_info, db_session,
+                                                  simple_cache):
+    app = test_client.application
+    summaries = []
+
+    def slow_nris(*args, **kwargs):
+        time.sleep(0.5)
+        return MockResponse(setup_info['NRIS_Mock_data'], 200)
+
+    def get_summary():
+        with app.app_context():
+            summaries.append(NRIS_API_service.get_compliance_summary('0100001', 'Bearer token'))
+
+    with mock.patch('app.api.utils.service_client.service_client.get',
+                    side_effect=slow_nris) as nris_mock_return:
+        threads = [threading.Thread(target=get_summary) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert nris_mock_return.call_count == 1
+    assert [summary['last_inspector'] for summary in summaries] == ['APOOLEY'] * 4
+
+
+def test_prewarm_caches_the_major_and_subscribed_mines(test_client, setup_info, db_session,
+                                                       simple_cache):
+    major_mine = MineFactory(major_mine_ind=True)
+    subscribed_mine = MineFactory(major_mine_ind=False)
+    SubscriptionFactory(mine=subscribed_mine)
+    other_mine = MineFactory(major_mine_ind=False)
+
+    with mock.patch.dict(sched.app.config, {'NRIS_TOKEN_URL': 'https://nris.token'}), \
+            mock.patch.object(NRIS_API_service, '_get_NRIS_token', return_value='Bearer token'), \
+            mock.patch('app.api.utils.service_client.service_client.get',
+                       return_value=MockResponse(setup_info['NRIS_Mock_data'], 200)):
+        _prewarm_compliance_summaries()
+
+    for mine in [major_mine, subscribed_mine]:
+        entry = simple_cache.get(NRIS_COMPLIANCE_DATA(mine.mine_no))
+        assert entry['summary']['last_inspector'] == 'APOOLEY'
+    assert simple_cache.get(NRIS_COMPLIANCE_DATA(other_mine.mine_no)) is None
+
+
+def test_stale_summary_is_served_while_NRIS_is_down(test_client, auth_headers, setup_info,
+                                                   db_session, simple_cache):
+    mine = MineFactory()
+    simple_cache.set(NRIS_COMPLIANCE_DATA(mine.mine_no), {
+        'summary': setup_info['NRIS_Mock_data'],
+        'fetched_at': datetime.utcnow() - relativedelta(days=1)
+    })
+
+    with mock.patch(
+            'app.api.utils.service_client.service_client.get',
+            side_effect=requests.exceptions.ConnectionError()) as nris_mock_return:
+        get_resp = test_client.get(
+            f'/mines/{mine.mine_no}/compliance/summary', headers=auth_headers['full_auth_header'])
+        # The failed refresh lets the next request try again.
+        _wait_for(lambda: simple_cache.get(NRIS_COMPLIANCE_REFRESH_LOCK(mine.mine_no)) is None)
+
+    assert nris_mock_return.call_count == 1
+    assert get_resp.status_code == 200
+    assert json.loads(get_resp.data.decode())['last_inspector'] == 'APOOLEY'
+    assert simple_cache.get(NRIS_COMPLIANCE_DATA(mine.mine_no))['summary'] == setup_info[
+        'NRIS_Mock_data']
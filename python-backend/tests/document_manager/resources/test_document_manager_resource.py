@@ -1,11 +1,51 @@
 import json, uuid, os
+import base64
+import hashlib
+import pytest
 from unittest import mock
+from werkzeug.contrib.cache import SimpleCache
 
 from app.extensions import cache
-from app.api.constants import DOWNLOAD_TOKEN
+from app.api.constants import DOWNLOAD_TOKEN, TUS_API_VERSION
 from tests.factories import DocumentManagerFactory
 
 
+@pytest.fixture
+def upload(test_client, db_session, auth_headers, tmp_path, monkeypatch):
+    """Starts a 6 byte TUS upload, with a real cache to track its offset."""
+    monkeypatch.setitem(test_client.application.config, 'UPLOADED_DOCUMENT_DEST', str(tmp_path))
+    with mock.patch.dict(test_client.application.extensions['cache'], {cache: SimpleCache()}):
+        post_resp = test_client.post(
+            '/document-manager',
+            data={
+                'folder': 'mines',
+                'pretty_folder': 'mines',
+                'filename': 'upload.pdf'
+            },
+            headers={
+                **auth_headers['full_auth_header'], 'Tus-Resumable': TUS_API_VERSION,
+                'Upload-Length': '6'
+            })
+        assert post_resp.status_code == 201
+        yield json.loads(post_resp.data.decode())['document_manager_guid']
+
+
+def _checksum(algorithm, data):
+    return f'{algorithm} {base64.b64encode(hashlib.new(algorithm, data).digest()).decode()}'
+
+
+def _patch(test_client, auth_headers, document_guid, data, offset, checksum):
+    return test_client.patch(
+        f'/document-manager/{document_guid}',
+        data=data,
+        headers={
+            **auth_headers['full_auth_header'], 'Tus-Resumable': TUS_API_VERSION,
+            'Upload-Offset': str(offset),
+            'Upload-Checksum': checksum,
+            'Content-Type': 'application/offset+octet-stream'
+        })
+
+
 def test_download_file_happy_path(test_client, db_session, auth_headers, tmp_path):
     document = DocumentManagerFactory(path_root=tmp_path, file_display_name='testfile.pdf')
 
@@ -48,3 +88,28 @@ def test_download_file_invalid_token(test_client, db_session):
     assert get_resp.status_code == 400
     assert get_data['status'] == 400
     assert get_data['message'] is not ''
+
+
+def test_patch_with_a_mismatched_checksum_keeps_the_offset(test_client, auth_headers, upload):
+    patch_resp = _patch(test_client, auth_headers, upload, b'abc', 0, _checksum('sha1', b'xyz'))
+    head_resp = test_client.head(
+        f'/document-manager/{upload}', headers=auth_headers['full_auth_header'])
+
+    assert patch_resp.status_code == 460
+    assert patch_resp.headers['Tus-Resumable'] == TUS_API_VERSION
+    assert patch_resp.headers['Upload-Offset'] == '0'
+    assert head_resp.headers['Upload-Offset'] == '0'
+
+    # The same chunk sent again with its checksum is accepted.
+    patch_resp = _patch(test_client, auth_headers, upload, b'abc', 0, _checksum('sha1', b'abc'))
+
+    assert patch_resp.status_code == 204
+    assert patch_resp.headers['Upload-Offset'] == '3'
+
+
+def test_options_advertises_the_checksum_extension(test_client, db_session):
+    options_resp = test_client.options(f'/document-manager/{uuid.uuid4()}')
+
+    assert options_resp.status_code == 204
+    assert 'checksum' in options_resp.headers['Tus-Extension'].split(',')
+    assert options_resp.headers['Tus-Checksum-Algorithm'].split(',') == ['sha1', 'sha256', 'md5']
@@ -1,6 +1,10 @@
 import json
 
 from tests.factories import MineFactory
+from tests.query_counter import count_queries, assert_max_queries
+
+# The page, its count and one SELECT ... IN per marshalled collection.
+MINE_LIST_MAX_QUERIES = 10
 
 
 def test_get_mines(test_client, db_session, auth_headers):
@@ -40,3 +44,117 @@ def test_get_mines_empty_with_per_page(test_client, db_session, auth_headers):
     context = {'mines': [], 'current_page': 2, 'total_pages': 1, 'items_per_page': 1, 'total': 1}
     assert get_resp.status_code == 200
     assert get_data == context
+
+
+def test_get_mines_filter_by_region_and_major(test_client, db_session, auth_headers):
+    mine_guid = MineFactory(mine_region='SW', major_mine_ind=True).mine_guid
+    MineFactory(mine_region='SW', major_mine_ind=False)
+    MineFactory(mine_region='NE', major_mine_ind=True)
+
+    get_resp = test_client.get(
+        '/mines?region=SW&major=true', headers=auth_headers['full_auth_header'])
+    get_data = json.loads(get_resp.data.decode())
+    assert get_resp.status_code == 200
+    assert get_data['total'] == 1
+    assert get_data['mines'][0]['mine_guid'] == str(mine_guid)
+
+
+def test_get_mines_filter_by_tsf(test_client, db_session, auth_headers):
+    mine_guid = MineFactory(mine_tailings_storage_facilities=0).mine_guid
+    MineFactory(mine_tailings_storage_facilities=2)
+
+    get_resp = test_client.get('/mines?tsf=false', headers=auth_headers['full_auth_header'])
+    get_data = json.loads(get_resp.data.decode())
+    assert get_resp.status_code == 200
+    assert get_data['total'] == 1
+    assert get_data['mines'][0]['mine_guid'] == str(mine_guid)
+
+
+def test_get_mines_search_by_permit_no(test_client, db_session, auth_headers):
+    mine = MineFactory(mine_permit=2)
+    MineFactory(mine_permit=0)
+
+    get_resp = test_client.get(
+        f'/mines?search={mine.mine_permit[0].permit_no}',
+        headers=auth_headers['full_auth_header'])
+    get_data = json.loads(get_resp.data.decode())
+    assert get_resp.status_code == 200
+    assert get_data['total'] == 1
+    assert get_data['mines'][0]['mine_guid'] == str(mine.mine_guid)
+
+
+def test_get_mines_cursor_pagination(test_client, db_session, auth_headers):
+    mine_guids = [str(mine.mine_guid) for mine in MineFactory.create_batch(size=3)]
+
+    first_resp = test_client.get('/mines?per_page=2&cursor=', headers=auth_headers['full_auth_header'])
+    first_data = json.loads(first_resp.data.decode())
+    assert first_resp.status_code == 200
+    assert first_data['total'] == 3
+    assert first_data['prev_cursor'] is None
+    assert len(first_data['mines']) == 2
+
+    second_resp = test_client.get(
+        f'/mines?per_page=2&cursor={first_data["next_cursor"]}',
+        headers=auth_headers['full_auth_header'])
+    second_data = json.loads(second_resp.data.decode())
+    assert second_resp.status_code == 200
+    assert second_data['next_cursor'] is None
+    assert len(second_data['mines']) == 1
+    assert sorted(mine['mine_guid'] for mine in first_data['mines'] + second_data['mines']) == sorted(mine_guids)
+
+    prev_resp = test_client.get(
+        f'/mines?per_page=2&cursor={second_data["prev_cursor"]}',
+        headers=auth_headers['full_auth_header'])
+    prev_data = json.loads(prev_resp.data.decode())
+    assert prev_resp.status_code == 200
+    assert prev_data['mines'] == first_data['mines']
+
+
+def test_get_mines_cursor_pagination_keeps_mines_without_a_region(test_client, db_session,
+                                                                   auth_headers):
+    mines = MineFactory.create_batch(size=2) + MineFactory.create_batch(size=3, mine_region=None)
+    mine_guids = sorted(str(mine.mine_guid) for mine in mines)
+
+    for sort_dir in ['asc', 'desc']:
+        pages, cursor = [], ''
+        while cursor is not None:
+            get_resp = test_client.get(
+                f'/mines?per_page=2&sort_field=mine_region&sort_dir={sort_dir}&cursor={cursor}',
+                headers=auth_headers['full_auth_header'])
+            assert get_resp.status_code == 200
+            get_data = json.loads(get_resp.data.decode())
+            pages.append(get_data['mines'])
+            cursor = get_data['next_cursor']
+
+        assert len(pages) == 3
+        assert sorted(mine['mine_guid'] for page in pages for mine in page) == mine_guids
+        # Mines without a region come last.
+        assert [mine['mine_region'] for mine in pages[-1]] == [None]
+
+        prev_resp = test_client.get(
+            f'/mines?per_page=2&sort_field=mine_region&sort_dir={sort_dir}'
+            f'&cursor={get_data["prev_cursor"]}',
+            headers=auth_headers['full_auth_header'])
+        assert json.loads(prev_resp.data.decode())['mines'] == pages[1]
+
+
+def test_get_mines_invalid_cursor(test_client, db_session, auth_headers):
+    get_resp = test_client.get('/mines?cursor=not-a-cursor', headers=auth_headers['full_auth_header'])
+    assert get_resp.status_code == 400
+
+
+def test_get_mines_query_count_does_not_grow_with_page_size(test_client, db_session,
+                                                           auth_headers):
+    MineFactory.create_batch(size=10, mine_permit=2)
+    # Start from an empty identity map, as a real request does.
+    db_session.expunge_all()
+
+    with count_queries() as counter:
+        get_resp = test_client.get(
+            '/mines?per_page=25', headers=auth_headers['full_auth_header'])
+    get_data = json.loads(get_resp.data.decode())
+
+    assert get_resp.status_code == 200
+    assert len(get_data['mines']) == 10
+    assert all(len(mine['mine_permit']) == 2 for mine in get_data['mines'])
+    assert_max_queries(counter, MINE_LIST_MAX_QUERIES)
@@ -0,0 +1,203 @@
+import json
+import struct
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from unittest import mock
+
+import pytest
+from werkzeug.contrib.cache import SimpleCache
+
+from app.extensions import cache
+from app.api.constants import MINE_MAP_BUILD_LOCK, MINE_MAP_CACHE
+from app.api.mines.mine.resources.mine_map import record_mine_map_change, warm_mine_map_cache
+from app.api.utils.map_encoding import MAP_BINARY_HEADER, MAP_BINARY_MAGIC, COORDINATE_SCALE
+from tests.factories import MineFactory
+
+
+@pytest.fixture
+def simple_cache(test_client):
+    """A real in-memory cache in place of the null cache, so the map versions are kept."""
+    with mock.patch.dict(test_client.application.extensions['cache'], {cache: SimpleCache()}):
+        yield
+
+
+def _map_version(test_client, auth_headers):
+    get_resp = test_client.get('/mines/map-list', headers=auth_headers['full_auth_header'])
+    assert get_resp.status_code == 200
+    return get_resp.headers['X-Map-Version']
+
+
+def _map_delta(test_client, auth_headers, since):
+    delta_resp = test_client.get(
+        f'/mines/map-list?since={since}', headers=auth_headers['full_auth_header'])
+    assert delta_resp.status_code == 200
+    return delta_resp.headers['X-Map-Version'], json.loads(delta_resp.data.decode())
+
+
+def test_get_mine_map_json(test_client, db_session, auth_headers):
+    mine = MineFactory()
+
+    get_resp = test_client.get('/mines/map-list', headers=auth_headers['full_auth_header'])
+    get_data = json.loads(get_resp.data.decode())
+    map_mine = next(m for m in get_data['mines'] if m['mine_guid'] == str(mine.mine_guid))
+
+    assert get_resp.status_code == 200
+    assert get_resp.headers['content-type'] == 'application/json'
+    assert map_mine['mine_name'] == mine.mine_name
+    assert Decimal(map_mine['mine_location']['latitude']) == round(
+        Decimal(mine.mine_location.latitude), 7)
+
+
+def test_get_mine_map_text(test_client, db_session, auth_headers):
+    mine = MineFactory()
+
+    get_resp = test_client.get(
+        '/mines/map-list',
+        headers={
+            **auth_headers['full_auth_header'], 'Accept': 'text/vnd.mds.mine-map'
+        })
+    columns = {
+        line.split('\t')[0]: line.split('\t')[1:]
+        for line in get_resp.data.decode().split('\n')
+    }
+    index = columns['mine_guid'].index(str(mine.mine_guid))
+
+    assert get_resp.status_code == 200
+    assert get_resp.headers['content-type'] == 'text/vnd.mds.mine-map'
+    assert get_resp.headers['X-Coordinate-Scale'] == str(COORDINATE_SCALE)
+    assert columns['mine_name'][index] == mine.mine_name
+    assert columns['mine_no'][index] == mine.mine_no
+    assert int(columns['longitude'][index]) == int(
+        round(Decimal(mine.mine_location.longitude), 7) * COORDINATE_SCALE)
+
+
+def test_get_mine_map_binary(test_client, db_session, auth_headers):
+    mine = MineFactory()
+
+    get_resp = test_client.get(
+        '/mines/map-list',
+        headers={
+            **auth_headers['full_auth_header'], 'Accept': 'application/vnd.mds.mine-map'
+        })
+    data = get_resp.data
+    magic, version, _, count = MAP_BINARY_HEADER.unpack_from(data)
+    offset = MAP_BINARY_HEADER.size
+    guids = [uuid.UUID(bytes=data[offset + i * 16:offset + (i + 1) * 16]) for i in range(count)]
+    offset += count * 16
+    latitudes = struct.unpack_from(f'<{count}i', data, offset)
+    offset += count * 8
+    (names_length, ) = struct.unpack_from('<I', data, offset)
+    names = data[offset + 4:offset + 4 + names_length].decode().split('\0')
+    index = guids.index(mine.mine_guid)
+
+    assert get_resp.status_code == 200
+    assert magic == MAP_BINARY_MAGIC
+    assert names[index] == mine.mine_name
+    assert latitudes[index] == int(
+        round(Decimal(mine.mine_location.latitude), 7) * COORDINATE_SCALE)
+
+
+def test_get_mine_map_since_current_version_is_empty(test_client, db_session, auth_headers):
+    MineFactory()
+
+    get_resp = test_client.get('/mines/map-list', headers=auth_headers['full_auth_header'])
+    version = get_resp.headers['X-Map-Version']
+    delta_resp = test_client.get(
+        f'/mines/map-list?since={version}', headers=auth_headers['full_auth_header'])
+    delta_data = json.loads(delta_resp.data.decode())
+
+    assert delta_resp.status_code == 200
+    assert delta_resp.headers['X-Map-Version'] == version
+    assert delta_data['mines'] == []
+    assert delta_data['deleted'] == []
+
+
+def test_get_mine_map_since_unknown_version_returns_full_map(test_client, db_session,
+                                                             auth_headers):
+    mine = MineFactory()
+
+    get_resp = test_client.get(
+        '/mines/map-list?since=1000000', headers=auth_headers['full_auth_header'])
+    get_data = json.loads(get_resp.data.decode())
+
+    assert get_resp.status_code == 200
+    assert str(mine.mine_guid) in [m['mine_guid'] for m in get_data['mines']]
+
+
+def test_get_mine_map_waits_for_a_build_in_progress(test_client, db_session, auth_headers):
+    built_map = json.dumps({'mines': []})
+    cached = [(None, None, None), (None, None, None), (built_map, datetime.utcnow(), 3)]
+
+    # Another request holds the build lock, and caches the map while this one waits.
+    with mock.patch.object(cache, 'add', return_value=False), \
+            mock.patch.object(cache, 'get', side_effect=lambda key: key == MINE_MAP_BUILD_LOCK or None), \
+            mock.patch.object(cache, 'get_many', side_effect=cached):
+        get_resp = test_client.get('/mines/map-list', headers=auth_headers['full_auth_header'])
+
+    assert get_resp.status_code == 200
+    assert get_resp.headers['X-Map-Version'] == '3'
+    assert json.loads(get_resp.data.decode()) == {'mines': []}
+
+
+def test_get_mine_map_since_returns_a_moved_mine(test_client, db_session, auth_headers,
+                                                 simple_cache):
+    mine = MineFactory()
+    version = _map_version(test_client, auth_headers)
+
+    put_resp = test_client.put(
+        f'/mines/{mine.mine_guid}',
+        json={
+            'latitude': '50.1',
+            'longitude': '-120.5'
+        },
+        headers=auth_headers['full_auth_header'])
+    new_version, delta = _map_delta(test_client, auth_headers, version)
+
+    assert put_resp.status_code == 200
+    assert int(new_version) == int(version) + 1
+    assert delta['deleted'] == []
+    assert [m['mine_guid'] for m in delta['mines']] == [str(mine.mine_guid)]
+    assert Decimal(delta['mines'][0]['mine_location']['latitude']) == Decimal('50.1')
+    assert Decimal(delta['mines'][0]['mine_location']['longitude']) == Decimal('-120.5')
+
+
+def test_get_mine_map_since_returns_a_renamed_mine(test_client, db_session, auth_headers,
+                                                   simple_cache):
+    mine = MineFactory()
+    version = _map_version(test_client, auth_headers)
+
+    put_resp = test_client.put(
+        f'/mines/{mine.mine_guid}',
+        json={'mine_name': 'Renamed Mine'},
+        headers=auth_headers['full_auth_header'])
+    _, delta = _map_delta(test_client, auth_headers, version)
+
+    assert put_resp.status_code == 200
+    assert [(m['mine_guid'], m['mine_name']) for m in delta['mines']] == [(str(mine.mine_guid),
+                                                                            'Renamed Mine')]
+    assert _map_delta(test_client, auth_headers, int(version) + 1)[1]['mines'] == []
+
+
+def test_get_mine_map_since_returns_a_deleted_mine(test_client, db_session, auth_headers,
+                                                   simple_cache):
+    mine = MineFactory()
+    location = (mine.mine_location.latitude, mine.mine_location.longitude)
+    version = _map_version(test_client, auth_headers)
+
+    db_session.delete(mine.mine_location)
+    db_session.commit()
+    record_mine_map_change(mine.mine_guid, [location])
+    _, delta = _map_delta(test_client, auth_headers, version)
+
+    assert delta['mines'] == []
+    assert delta['deleted'] == [str(mine.mine_guid)]
+
+
+def test_warm_mine_map_cache_builds_a_cold_cache(test_client, db_session, simple_cache):
+    mine = MineFactory()
+
+    warm_mine_map_cache(test_client.application)
+
+    cached_map = json.loads(cache.get(MINE_MAP_CACHE))
+    assert str(mine.mine_guid) in [m['mine_guid'] for m in cached_map['mines']]
@@ -0,0 +1,59 @@
+import json
+
+from app import auth
+from app.api.users.minespace.models.minespace_user_mine import MinespaceUserMine
+from app.api.utils.map_tiles import tile_containing
+from tests.factories import MineFactory, MinespaceUserFactory
+
+
+def test_get_mine_map_tile_returns_mines(test_client, db_session, auth_headers):
+    mine = MineFactory(mine_location__latitude=49.2, mine_location__longitude=-123.1)
+    x, y = tile_containing(49.2, -123.1, 16)
+
+    get_resp = test_client.get(
+        f'/mines/map-tiles/16/{x}/{y}', headers=auth_headers['full_auth_header'])
+    get_data = json.loads(get_resp.data.decode())
+
+    assert get_resp.status_code == 200
+    assert get_data['clustered'] == False
+    assert str(mine.mine_guid) in [m['mine_guid'] for m in get_data['mines']]
+
+
+def test_get_mine_map_tile_clusters_when_zoomed_out(test_client, db_session, auth_headers):
+    MineFactory(mine_location__latitude=49.2, mine_location__longitude=-123.1)
+
+    get_resp = test_client.get('/mines/map-tiles/0/0/0', headers=auth_headers['full_auth_header'])
+    get_data = json.loads(get_resp.data.decode())
+
+    assert get_resp.status_code == 200
+    assert get_data['clustered'] == True
+    assert sum(cluster['count'] for cluster in get_data['clusters']) >= 1
+
+
+def test_get_mine_map_tile_out_of_range(test_client, db_session, auth_headers):
+    get_resp = test_client.get('/mines/map-tiles/2/4/0', headers=auth_headers['full_auth_header'])
+    assert get_resp.status_code == 400
+
+
+def test_get_mine_map_tile_as_proponent_returns_only_their_mines(test_client, db_session,
+                                                                auth_headers, monkeypatch):
+    own_mine = MineFactory(mine_location__latitude=49.2, mine_location__longitude=-123.1)
+    other_mine = MineFactory(mine_location__latitude=49.2, mine_location__longitude=-123.1)
+    proponent = MinespaceUserFactory(email='test-proponent-email@minespace.ca')
+    other_proponent = MinespaceUserFactory()
+    MinespaceUserMine.create_minespace_user_mine(proponent.user_id, own_mine.mine_guid)
+    MinespaceUserMine.create_minespace_user_mine(other_proponent.user_id, other_mine.mine_guid)
+    monkeypatch.setattr(auth, 'apply_security', True)
+    x, y = tile_containing(49.2, -123.1, 16)
+
+    get_resp = test_client.get(
+        f'/mines/map-tiles/16/{x}/{y}', headers=auth_headers['proponent_only_auth_header'])
+    get_data = json.loads(get_resp.data.decode())
+    cluster_resp = test_client.get(
+        '/mines/map-tiles/0/0/0', headers=auth_headers['proponent_only_auth_header'])
+    cluster_data = json.loads(cluster_resp.data.decode())
+
+    assert get_resp.status_code == 200
+    assert [m['mine_guid'] for m in get_data['mines']] == [str(own_mine.mine_guid)]
+    assert cluster_resp.status_code == 200
+    assert sum(cluster['count'] for cluster in cluster_data['clusters']) == 1
@@ -2,7 +2,7 @@ import pytest
 import uuid
 
 from app.api.parties.party_appt.models.mine_party_appt import MinePartyAppointment
-from tests.factories import MinePartyAppointmentFactory
+from tests.factories import MinePartyAppointmentFactory, MineFactory
 
 
 # Party Model Class Methods
@@ -36,3 +36,21 @@ def test_mine_party_appt_to_csv(db_session):
     csv = MinePartyAppointment.to_csv([mpa], ['processed_by', 'processed_on'])
     second_row = str(mpa.processed_by) + ',' + str(mpa.processed_on)
     assert csv == "processed_by,processed_on\n" + second_row
+
+
+def test_party_appt_model_find_manager_history_by_mine_no(db_session):
+    mpa = MinePartyAppointmentFactory(mine_party_appt_type_code='MMG')
+
+    records, status_code, message = MinePartyAppointment.find_manager_history_by_mine_no(
+        mpa.mine.mine_no)
+    assert (status_code, message) == (200, 'OK')
+    assert [record.mine_party_appt_guid for record in records] == [mpa.mine_party_appt_guid]
+
+
+def test_party_appt_model_find_manager_history_by_mine_no_not_found(db_session):
+    mine = MineFactory(minimal=True)
+
+    assert MinePartyAppointment.find_manager_history_by_mine_no(mine.mine_no) == (
+        None, 404, 'No Mine Manager history found')
+    assert MinePartyAppointment.find_manager_history_by_mine_no('not-a-mine') == (
+        None, 404, 'Mine not found')
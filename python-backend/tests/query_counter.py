@@ -0,0 +1,31 @@
+from contextlib import contextmanager
+
+from app.extensions import db
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_queries():
+    """Records the SQL statements sent to the database inside the block."""
+    counter = QueryCounter()
+    db.event.listen(db.engine, 'before_cursor_execute', counter)
+    try:
+        yield counter
+    finally:
+        db.event.remove(db.engine, 'before_cursor_execute', counter)
+
+
+def assert_max_queries(counter, max_queries):
+    assert counter.count <= max_queries, '{} SQL statements, expected at most {}:\n{}'.format(
+        counter.count, max_queries, '\n\n'.join(counter.statements))
@@ -2,13 +2,14 @@ import json
 import uuid
 import pytest
 
+from app.api.search.search.models.search_document import SearchDocument
 from tests.factories import MineFactory, MinePartyAppointmentFactory, PartyFactory
 
 
 # GET
 def test_get_no_search_results(test_client, db_session, auth_headers):
     get_resp = test_client.get(
-        f'/search?search_term=Abbo', headers=auth_headers['full_auth_header'])
+        '/search?search_term=Abbo', headers=auth_headers['full_auth_header'])
     get_data = json.loads(get_resp.data.decode())
     assert get_resp.status_code == 200
     assert get_data['search_terms'] == ['Abbo']
@@ -51,7 +52,7 @@ def test_get_parties_and_mines(test_client, db_session, auth_headers):
 
 def test_simple_search_no_results(test_client, db_session, auth_headers):
     get_resp = test_client.get(
-        f'/search/simple?search_term=Abbo', headers=auth_headers['full_auth_header'])
+        '/search/simple?search_term=Abbo', headers=auth_headers['full_auth_header'])
     get_data = json.loads(get_resp.data.decode())
     assert get_resp.status_code == 200
     assert get_data['search_terms'] == ['Abbo']
@@ -81,4 +82,44 @@ def test_simple_search_parties_and_mines(test_client, db_session, auth_headers):
         f'/search/simple?search_term={searchString}', headers=auth_headers['full_auth_header'])
     get_data = json.loads(get_resp.data.decode())
     assert len(get_data['search_results']) == 6
-    assert get_resp.status_code == 200
\ No newline at end of file
+    assert get_resp.status_code == 200
+
+def test_search_mine_with_misspelled_term(test_client, db_session, auth_headers):
+    mine = MineFactory(mine_name='Abbotsford Mines')
+    MineFactory(mine_name='Test')
+    get_resp = test_client.get(
+        '/search?search_term=Abbotsforx&search_types=mine',
+        headers=auth_headers['full_auth_header'])
+    get_data = json.loads(get_resp.data.decode())
+    mines = get_data['search_results']['mine']
+    assert get_resp.status_code == 200
+    assert len(mines) == 1
+    assert uuid.UUID(mines[0]['result']['mine_guid']) == mine.mine_guid
+
+
+def test_search_finds_renamed_mine(test_client, db_session, auth_headers):
+    mine = MineFactory(mine_name='Abbotsford Mines')
+    mine.mine_name = 'Coquihalla Mines'
+    db_session.flush()
+    get_resp = test_client.get(
+        '/search?search_term=Coquihalla&search_types=mine',
+        headers=auth_headers['full_auth_header'])
+    get_data = json.loads(get_resp.data.decode())
+    mines = get_data['search_results']['mine']
+    assert get_resp.status_code == 200
+    assert len(mines) == 1
+    assert uuid.UUID(mines[0]['result']['mine_guid']) == mine.mine_guid
+
+
+def test_search_document_is_rebuilt_only_when_a_searched_field_changes(test_client, db_session):
+    mine = MineFactory(mine_name='Abbotsford Mines')
+    db_session.execute(SearchDocument.delete_document('mine', mine.mine_guid))
+
+    mine.mine_note = 'Not searched'
+    db_session.flush()
+    assert SearchDocument.query.filter_by(search_document_guid=mine.mine_guid).count() == 0
+
+    mine.mine_name = 'Coquihalla Mines'
+    db_session.flush()
+    document = SearchDocument.query.filter_by(search_document_guid=mine.mine_guid).one()
+    assert document.display_value == 'Coquihalla Mines'
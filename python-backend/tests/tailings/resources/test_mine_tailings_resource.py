@@ -1,4 +1,8 @@
 import json
+from unittest import mock
+
+from app.api.documents.expected.models.mine_expected_document import MineExpectedDocument
+from app.api.documents.required.models.required_documents import RequiredDocument
 from app.api.mines.tailings.models.tailings import MineTailingsStorageFacility
 from tests.factories import MineFactory, MineTailingsStorageFacilityFactory
 
@@ -25,3 +29,29 @@ def test_post_mine_tailings_storage_facility_by_mine_guid(test_client, db_sessio
     post_data = json.loads(post_resp.data.decode())
     assert post_resp.status_code == 200
     assert len(mine.mine_tailings_storage_facilities) == org_mine_tsf_list_len + 1
+
+
+def test_post_first_tailings_storage_facility_assigns_the_tsf_documents(
+        test_client, db_session, auth_headers):
+    mine = MineFactory(minimal=True)
+    tsf_documents = RequiredDocument.find_by_req_doc_category('TSF', 'INI')
+
+    # The documents are assigned in-process, without calling this API over HTTP.
+    with mock.patch('requests.get') as self_call:
+        post_resp = test_client.post(
+            f'/mines/{mine.mine_guid}/tailings',
+            data={'mine_tailings_storage_facility_name': 'first'},
+            headers=auth_headers['full_auth_header'])
+        second_post_resp = test_client.post(
+            f'/mines/{mine.mine_guid}/tailings',
+            data={'mine_tailings_storage_facility_name': 'second'},
+            headers=auth_headers['full_auth_header'])
+    expected_documents = MineExpectedDocument.find_by_mine_guid(str(mine.mine_guid))
+
+    assert post_resp.status_code == 200
+    assert second_post_resp.status_code == 200
+    assert not self_call.called
+    assert len(tsf_documents) > 0
+    assert sorted(str(doc.req_document_guid) for doc in expected_documents) == sorted(
+        str(doc.req_document_guid) for doc in tsf_documents)
+    assert all(doc.exp_document_status_code == 'MIA' for doc in expected_documents)
@@ -1,7 +1,7 @@
 from unittest import mock
 
 from app.extensions import jwt
-from app.api.utils.include.user_info import User
+from app.api.utils.include.user_info import User, get_auth_context, jwt_jose
 from tests.constants import VIEW_ONLY_AUTH_CLAIMS, TOKEN_HEADER
 
 
@@ -12,3 +12,21 @@ from tests.constants import VIEW_ONLY_AUTH_CLAIMS, TOKEN_HEADER
     # auth_token = jwt.create_jwt(VIEW_ONLY_AUTH_CLAIMS, TOKEN_HEADER)
     # with mock.patch.object(jwt, 'get_token_auth_header', return_value=auth_token):
         # assert User().get_user_raw_info() == VIEW_ONLY_AUTH_CLAIMS
+
+
+def test_auth_context_decodes_the_token_once_per_request(test_client):
+    auth_token = jwt.create_jwt(VIEW_ONLY_AUTH_CLAIMS, TOKEN_HEADER)
+    User._test_mode = False
+    try:
+        with test_client.application.test_request_context(
+                headers={'Authorization': 'Bearer ' + auth_token}):
+            with mock.patch.object(
+                    jwt_jose, 'get_unverified_claims',
+                    wraps=jwt_jose.get_unverified_claims) as get_unverified_claims:
+                for _ in range(3):
+                    assert User().get_user_raw_info() == VIEW_ONLY_AUTH_CLAIMS
+                    assert User().get_user_email() == 'test-email'
+                    assert get_auth_context().is_proponent == False
+            assert get_unverified_claims.call_count == 1
+    finally:
+        User._test_mode = True
@@ -0,0 +1,47 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.api.utils.search_executor import SearchExecutor
+
+
+def test_search_executor_concatenates_task_results(test_client, db_session):
+    executor = SearchExecutor(test_client.application)
+    results = executor.run(test_client.application, [lambda: [1, 2], lambda: [], lambda: [3]])
+
+    assert sorted(results) == [1, 2, 3]
+    assert executor.metrics()['tasks_completed'] == 3
+
+
+def test_search_executor_cancels_tasks_past_the_deadline(test_client, db_session):
+    executor = SearchExecutor(test_client.application)
+    executor.request_concurrency = 1
+    executor.request_timeout_ms = 100
+
+    def slow_task():
+        time.sleep(0.5)
+        return ['slow']
+
+    results = executor.run(test_client.application, [slow_task, lambda: ['queued']])
+
+    assert results == []
+    # The running task cannot be cancelled, only the one still queued is.
+    assert executor.metrics()['tasks_timed_out'] == 1
+    assert executor.metrics()['tasks_cancelled'] == 1
+
+
+def test_search_executor_cancels_tasks_waiting_for_a_worker(test_client, db_session):
+    executor = SearchExecutor(test_client.application)
+    executor._executor = ThreadPoolExecutor(max_workers=1)
+    executor.request_concurrency = 2
+    executor.request_timeout_ms = 100
+
+    def slow_task():
+        time.sleep(0.5)
+        return ['slow']
+
+    results = executor.run(test_client.application, [slow_task, lambda: ['waiting']])
+
+    assert results == []
+    # Both were submitted, but only the one a worker picked up was still running.
+    assert executor.metrics()['tasks_timed_out'] == 1
+    assert executor.metrics()['tasks_cancelled'] == 1
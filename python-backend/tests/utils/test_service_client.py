@@ -0,0 +1,63 @@
+import pytest
+import requests
+from unittest import mock
+
+from app.api.utils.service_client import ServiceClient, CircuitBreaker, CircuitOpenError
+
+
+def test_circuit_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+    breaker.record_failure()
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_circuit_breaker_lets_one_trial_call_through_after_reset():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    breaker.record_failure()
+
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_service_client_fails_fast_once_the_breaker_is_open(test_client):
+    client = ServiceClient(test_client.application)
+    client.breaker_failures = 1
+    url = 'http://nris.example.com/inspections'
+
+    with mock.patch.object(
+            client._session, 'request',
+            side_effect=requests.exceptions.ConnectionError()) as session_request:
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client.get(url)
+        with pytest.raises(CircuitOpenError):
+            client.get(url)
+
+    assert session_request.call_count == 1
+    assert session_request.call_args[1]['timeout'] == client.timeout
+    assert client.metrics()['nris.example.com']['rejected'] == 1
+
+
+def test_service_client_ends_a_trial_call_that_raises(test_client):
+    client = ServiceClient(test_client.application)
+    client.breaker_failures = 1
+    client.breaker_reset_seconds = 0
+    url = 'http://nris.example.com/inspections'
+    client._breaker('nris.example.com').record_failure()
+
+    with mock.patch.object(client._session, 'request', side_effect=ValueError()):
+        with pytest.raises(ValueError):
+            client.get(url)
+
+    # The breaker lets the next trial call through instead of staying half-open for good.
+    with mock.patch.object(
+            client._session, 'request', return_value=mock.Mock(status_code=200)) as session_request:
+        client.get(url)
+
+    assert session_request.call_count == 1
+    assert client.breaker_state(url) == CircuitBreaker.CLOSED
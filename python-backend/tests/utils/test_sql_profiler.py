@@ -0,0 +1,35 @@
+import json
+import pytest
+
+from sqlalchemy.exc import ProgrammingError
+
+from app.api.utils.sql_profiler import sql_profiler
+from tests.factories import MineFactory
+
+
+def test_metrics_report_statements_per_endpoint(test_client, db_session, auth_headers):
+    MineFactory()
+    sql_profiler.reset_metrics()
+
+    test_client.get('/mines', headers=auth_headers['full_auth_header'])
+    get_resp = test_client.get('/metrics', headers=auth_headers['admin_only_auth_header'])
+    get_data = json.loads(get_resp.data.decode())
+    mine_list = get_data['endpoints']['mines_mine_list_resource']
+
+    assert get_resp.status_code == 200
+    assert mine_list['requests'] == 1
+    assert mine_list['statements'] > 0
+    assert len(mine_list['slowest']) > 0
+
+
+def test_failed_statement_does_not_leave_its_start_time(test_client, db_session):
+    connection = db_session.connection()
+    db_session.execute('select 1')
+    starts = connection.info.get('sql_profiler_start')
+
+    savepoint = db_session.begin_nested()
+    with pytest.raises(ProgrammingError):
+        db_session.execute('select * from no_such_table')
+    savepoint.rollback()
+
+    assert starts == []
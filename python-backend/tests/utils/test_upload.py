@@ -0,0 +1,64 @@
+import base64
+import hashlib
+import io
+
+import pytest
+
+from app.api.utils.upload import parse_upload_checksum, write_chunk
+
+
+def _preallocated(tmp_path, size):
+    file_path = tmp_path / 'upload'
+    file_path.write_bytes(b'\0' * size)
+    return str(file_path)
+
+
+def _checksum(algorithm, data):
+    return f'{algorithm} {base64.b64encode(hashlib.new(algorithm, data).digest()).decode()}'
+
+
+def test_write_chunk_writes_at_the_offset_in_blocks(tmp_path):
+    file_path = _preallocated(tmp_path, 10)
+
+    written, matches = write_chunk(io.BytesIO(b'abcdef'), file_path, 2, 6, block_size=4)
+
+    assert (written, matches) == (6, True)
+    with open(file_path, 'rb') as f:
+        assert f.read() == b'\0\0abcdef\0\0'
+
+
+def test_write_chunk_does_not_read_past_the_chunk(tmp_path):
+    file_path = _preallocated(tmp_path, 4)
+    stream = io.BytesIO(b'abcdefgh')
+
+    written, _ = write_chunk(stream, file_path, 0, 4, block_size=3)
+
+    assert written == 4
+    assert stream.read() == b'efgh'
+
+
+def test_write_chunk_reports_a_chunk_cut_short(tmp_path):
+    file_path = _preallocated(tmp_path, 10)
+
+    written, matches = write_chunk(io.BytesIO(b'abc'), file_path, 0, 10)
+
+    assert (written, matches) == (3, True)
+
+
+def test_write_chunk_checks_the_checksum(tmp_path):
+    file_path = _preallocated(tmp_path, 6)
+    checksum = parse_upload_checksum(_checksum('sha1', b'abcdef'))
+
+    assert write_chunk(io.BytesIO(b'abcdef'), file_path, 0, 6, checksum, block_size=4) == (6, True)
+    assert write_chunk(io.BytesIO(b'abcxyz'), file_path, 0, 6, checksum, block_size=4) == (6, False)
+    assert write_chunk(io.BytesIO(b'abc'), file_path, 0, 6, checksum) == (3, False)
+
+
+def test_parse_upload_checksum():
+    assert parse_upload_checksum(_checksum('sha256', b'data')) == (
+        'sha256', hashlib.sha256(b'data').digest())
+
+    with pytest.raises(ValueError):
+        parse_upload_checksum(_checksum('sha512', b'data'))
+    with pytest.raises(ValueError):
+        parse_upload_checksum('sha1 not-base64!')
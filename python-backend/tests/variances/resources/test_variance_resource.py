@@ -34,6 +34,25 @@ class TestGetVariances:
         assert get_data['current_page'] == PAGE_DEFAULT
         assert get_data['total'] == batch_size
 
+    def test_get_variances_cursor_pagination(self, test_client, db_session, auth_headers):
+        """Should page through every record once with next_cursor and skip the total on request"""
+
+        batch_size = 5
+        variances = VarianceFactory.create_batch(size=batch_size)
+
+        seen_guids = []
+        url = '/variances?per_page=2&include_total=false&cursor='
+        while url:
+            get_resp = test_client.get(url, headers=auth_headers['full_auth_header'])
+            get_data = json.loads(get_resp.data.decode())
+            assert get_resp.status_code == 200
+            assert get_data['total'] is None
+            seen_guids.extend(map(lambda v: v['variance_guid'], get_data['records']))
+            next_cursor = get_data['next_cursor']
+            url = f'/variances?per_page=2&include_total=false&cursor={next_cursor}' if next_cursor else None
+
+        assert sorted(seen_guids) == sorted(str(variance.variance_guid) for variance in variances)
+
     def test_get_variances_application_status_filter(self, test_client, db_session, auth_headers):
         """Should respect variance_application_status_code query param"""
 